@@ -2,40 +2,237 @@
 # COUNTER MODULE — guardar como: counter.py
 # ============================================================
 import json
+import math
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from threading import Lock
 
 COUNTER_FILE = "counter.json"
 _lock = Lock()
 
+# Cada evento se agrega como una línea a EVENTOS_FILE (barato y ya queda en
+# disco); la foto completa (counter.json, JSON compacto) se reescribe como
+# mucho cada COMPACTAR_SEGUNDOS y ahí se vacía el log. Al cargar se reaplican
+# los eventos del log con `seq` posterior a la foto.
+EVENTOS_FILE = "counter.eventos.jsonl"
+COMPACTAR_SEGUNDOS = float(os.environ.get("COUNTER_COMPACTAR_SEGUNDOS", 60))
+
+# Rollups por franja horaria y diaria: {"hora": {"2025-10-19T13": {"Macro|ok": 3, ...}}}
+# Las claves de franja se ordenan como texto, así la retención es un corte simple.
+ROLLUPS = {
+    "hora": ("%Y-%m-%dT%H", timedelta(days=int(os.environ.get("COUNTER_RETENCION_HORAS_DIAS", 35)))),
+    "dia":  ("%Y-%m-%d",    timedelta(days=int(os.environ.get("COUNTER_RETENCION_DIAS", 400)))),
+}
+RESULTADOS = ("ok", "error", "rechazado")
+
+# Campos de un evento (éxitos y fallos); los que no se midieron quedan en None
+MEDIDAS = ("duracion", "paginas", "filas", "bytes")
+
+# Sketch de cuantiles de latencia (tipo DDSketch): cada duración cae en la
+# canasta ceil(log_γ(x)), con γ = (1+α)/(1-α). Cualquier percentil sale con
+# error relativo <= α sin guardar ni ordenar las duraciones.
+SKETCH_ALFA  = 0.02
+_GAMMA       = (1 + SKETCH_ALFA) / (1 - SKETCH_ALFA)
+_LOG_GAMMA   = math.log(_GAMMA)
+SKETCH_MINIMO = 1e-3        # segundos; lo menor cuenta como este valor
+
+# Copia en memoria del archivo; se relee solo si otro proceso lo modificó
+_cache = {"mtime": None, "data": None, "version": 0, "guardado": 0.0}
+_series_cache = {}
+
+
+def _vacio():
+    return {"total": 0, "by_bank": {}, "by_ip": {}, "history": [], "rollups": {}, "metrics_by_bank": {},
+            "seq": 0}
+
+
+def _reaplicar_eventos(data) -> int:
+    """Suma a `data` los eventos del log que la foto todavía no tiene. Devuelve cuántos."""
+    if not os.path.exists(EVENTOS_FILE):
+        return 0
+    n = 0
+    with open(EVENTOS_FILE, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                evento = json.loads(linea)
+            except ValueError:
+                continue        # última línea a medio escribir (corte abrupto)
+            if evento.get("seq", 0) > data["seq"]:
+                _aplicar(data, evento)
+                n += 1
+    return n
+
 
 def _load():
-    if not os.path.exists(COUNTER_FILE):
-        return {"total": 0, "by_bank": {}, "by_ip": {}, "history": []}
-    return json.load(open(COUNTER_FILE, "r"))
+    mtime = os.path.getmtime(COUNTER_FILE) if os.path.exists(COUNTER_FILE) else None
+    if _cache["data"] is None or mtime != _cache["mtime"]:
+        if mtime is None:
+            data = _vacio()
+        else:
+            with open(COUNTER_FILE, "r") as f:
+                data = json.load(f)
+        data.setdefault("rollups", {})
+        data.setdefault("metrics_by_bank", {})
+        data.setdefault("seq", 0)
+        reaplicados = _reaplicar_eventos(data)
+        _cache.update(mtime=mtime, data=data)
+        _cache["version"] += 1
+        if reaplicados:
+            # Foto al día y log vacío: una línea cortada no se pega a la siguiente
+            _save(data)
+    return _cache["data"]
 
 
 def _save(data):
-    with open(COUNTER_FILE, "w") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """Foto completa en JSON compacto; los eventos que ya incluye salen del log."""
+    tmp = COUNTER_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, COUNTER_FILE)
+    open(EVENTOS_FILE, "w").close()
+    _cache.update(mtime=os.path.getmtime(COUNTER_FILE), data=data, guardado=time.monotonic())
+    _cache["version"] += 1
 
 
-def increment(banco: str, ip: str = "desconocida"):
-    """Llamar cuando un PDF se procesa exitosamente."""
-    with _lock:
-        data = _load()
+def _anotar(evento: dict) -> None:
+    """Aplica `evento` en memoria, lo agrega al log y compacta si ya toca."""
+    data = _load()
+    evento["seq"] = data["seq"] + 1
+    _aplicar(data, evento)
+    with open(EVENTOS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(evento, ensure_ascii=False, separators=(",", ":")) + "\n")
+    _cache["version"] += 1
+    if time.monotonic() - _cache["guardado"] >= COMPACTAR_SEGUNDOS:
+        _save(data)
+
+
+def _acumular(data, banco: str, resultado: str, ahora: datetime):
+    """Suma 1 a la franja actual de cada rollup y descarta lo vencido."""
+    clave = f"{banco}|{resultado}"
+    for gran, (fmt, retencion) in ROLLUPS.items():
+        serie = data["rollups"].setdefault(gran, {})
+        franja = ahora.strftime(fmt)
+        if franja not in serie:
+            # Franja nueva: momento de aplicar la retención
+            limite = (ahora - retencion).strftime(fmt)
+            for vieja in [k for k in serie if k < limite]:
+                del serie[vieja]
+            serie[franja] = {}
+        serie[franja][clave] = serie[franja].get(clave, 0) + 1
+
+
+def sketch_agregar(sketch: dict, x: float) -> None:
+    """Suma `x` al sketch {"n": int, "canastas": {"indice": cantidad}}."""
+    indice = math.ceil(math.log(max(x, SKETCH_MINIMO)) / _LOG_GAMMA)
+    canastas = sketch.setdefault("canastas", {})
+    canastas[str(indice)] = canastas.get(str(indice), 0) + 1
+    sketch["n"] = sketch.get("n", 0) + 1
+
+
+def sketch_cuantil(sketch: dict, q: float):
+    """Percentil `q` (0..1) estimado; None si el sketch está vacío."""
+    n = sketch.get("n", 0)
+    if not n:
+        return None
+    rango = q * (n - 1)
+    acumulado = 0
+    for indice in sorted(map(int, sketch["canastas"])):
+        acumulado += sketch["canastas"][str(indice)]
+        if acumulado > rango:
+            # Punto medio (relativo) de la canasta (γ^(i-1), γ^i]
+            return 2 * _GAMMA ** indice / (_GAMMA + 1)
+    return None
+
+
+def _evento(banco: str, ip: str, resultado: str, medidas: dict) -> dict:
+    evento = {"banco": banco, "ip": ip, "timestamp": datetime.now().isoformat(), "resultado": resultado}
+    evento.update((k, medidas.get(k)) for k in MEDIDAS)
+    return evento
+
+
+def _aplicar(data, evento: dict) -> None:
+    """
+    Suma un evento (del pedido actual o reaplicado del log): totales,
+    historial, métricas del banco y rollups.
+    """
+    banco, resultado = evento["banco"], evento["resultado"]
+    if resultado == "ok":
+        ip = evento["ip"]
         data["total"] += 1
         data["by_bank"][banco] = data["by_bank"].get(banco, 0) + 1
         data["by_ip"][ip]      = data["by_ip"].get(ip, 0) + 1
-        data["history"].append({
-            "banco":     banco,
-            "ip":        ip,
-            "timestamp": datetime.now().isoformat()
-        })
-        # Mantener solo los últimos 500 registros en el historial
-        data["history"] = data["history"][-500:]
-        _save(data)
+
+    data["history"].append({k: v for k, v in evento.items() if k != "seq"})
+    # Mantener solo los últimos 500 registros en el historial
+    data["history"] = data["history"][-500:]
+
+    m = data["metrics_by_bank"].setdefault(banco, {
+        "ok": 0, "error": 0, "rechazado": 0,
+        "segundos": 0.0, "segundos_paginados": 0.0, "paginas": 0, "filas": 0, "bytes": 0,
+        "latencia": {},
+    })
+    m[resultado] += 1
+    if resultado == "ok":
+        # Latencia y rendimiento solo de los éxitos: los fallos suelen cortar antes
+        duracion = evento.get("duracion")
+        if duracion is not None:
+            m["segundos"] += duracion
+            sketch_agregar(m["latencia"], duracion)
+            # /process-stream no informa páginas: págs/s sale solo de los que sí
+            if evento.get("paginas"):
+                m["segundos_paginados"] += duracion
+        for k in ("paginas", "filas", "bytes"):
+            m[k] += evento.get(k) or 0
+
+    _acumular(data, banco, resultado, datetime.fromisoformat(evento["timestamp"]))
+    data["seq"] = evento["seq"]
+
+
+def increment(banco: str, ip: str = "desconocida", **medidas):
+    """
+    Llamar cuando un PDF se procesa exitosamente.
+    `medidas`: duracion (s), paginas, filas, bytes (del archivo de salida).
+    """
+    with _lock:
+        _anotar(_evento(banco, ip, "ok", medidas))
+
+
+def registrar_fallo(banco: str, resultado: str = "error", ip: str = "desconocida", **medidas):
+    """Llamar cuando un PDF falla ("error") o se rechaza por saturación ("rechazado")."""
+    if resultado not in RESULTADOS or resultado == "ok":
+        raise ValueError(f"Resultado de fallo desconocido: {resultado}")
+    with _lock:
+        _anotar(_evento(banco or "desconocido", ip, resultado, medidas))
+
+
+def get_metricas() -> list[dict]:
+    """Por banco: conteos, percentiles de latencia y rendimiento (de los éxitos)."""
+    with _lock:
+        data = _load()
+        clave_cache = (_cache["version"], "metricas")
+        if clave_cache in _series_cache:
+            return _series_cache[clave_cache]
+
+        filas = []
+        for banco, m in data["metrics_by_bank"].items():
+            seg, seg_pag = m["segundos"], m.get("segundos_paginados", 0.0)
+            filas.append({
+                "banco": banco,
+                "ok": m["ok"], "error": m["error"], "rechazado": m["rechazado"],
+                "p50": sketch_cuantil(m["latencia"], 0.50),
+                "p90": sketch_cuantil(m["latencia"], 0.90),
+                "p99": sketch_cuantil(m["latencia"], 0.99),
+                "paginas_por_seg": m["paginas"] / seg_pag if seg_pag else None,
+                "filas_por_seg":   m["filas"] / seg if seg else None,
+                "bytes_promedio":  m["bytes"] / m["ok"] if m["ok"] else None,
+            })
+        # Los bancos más caros primero
+        filas.sort(key=lambda f: -(f["p90"] or 0))
+        for vieja in [k for k in _series_cache if k[0] != _cache["version"]]:
+            del _series_cache[vieja]
+        _series_cache[clave_cache] = filas
+        return filas
 
 
 def get_stats():
@@ -43,6 +240,41 @@ def get_stats():
         return _load()
 
 
+def get_series(granularidad: str = "hora", desde: str = None, hasta: str = None, banco: str = None) -> dict:
+    """
+    Serie de una granularidad ("hora" | "dia") entre las franjas `desde` y
+    `hasta` (mismo formato que las claves, p. ej. "2025-10-19T13"), opcional
+    filtrada por banco. Se cachea hasta la próxima escritura.
+    """
+    if granularidad not in ROLLUPS:
+        raise ValueError(f"Granularidad desconocida: {granularidad} (opciones: {', '.join(ROLLUPS)})")
+    with _lock:
+        data = _load()
+        clave_cache = (_cache["version"], granularidad, desde, hasta, banco)
+        if clave_cache in _series_cache:
+            return _series_cache[clave_cache]
+
+        franjas = []
+        for franja, conteos in sorted(data["rollups"].get(granularidad, {}).items()):
+            if (desde and franja < desde) or (hasta and franja > hasta):
+                continue
+            por_banco = {}
+            for clave, n in conteos.items():
+                b, resultado = clave.rsplit("|", 1)
+                if banco and b != banco:
+                    continue
+                por_banco.setdefault(b, dict.fromkeys(RESULTADOS, 0))[resultado] += n
+            if por_banco:
+                totales = {r: sum(c[r] for c in por_banco.values()) for r in RESULTADOS}
+                franjas.append({"franja": franja, "totales": totales, "por_banco": por_banco})
+
+        serie = {"granularidad": granularidad, "franjas": franjas}
+        for vieja in [k for k in _series_cache if k[0] != _cache["version"]]:
+            del _series_cache[vieja]
+        _series_cache[clave_cache] = serie
+        return serie
+
+
 # ============================================================
 # ADMIN ROUTE — agregar esto a tu app.py (Flask)
 # ============================================================
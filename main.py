@@ -1,12 +1,30 @@
 import sys
+import argparse
 import tkinter as tk
 from tkinter import messagebox
 from pathlib import Path
-from typing import Any
 import pandas as pd
+import time
+import os
 import traceback
+import contextvars
+import contextlib
+import json
+import pickle
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
 
-from parsers import get_parser
+from PyPDF2 import PdfReader
+
+from parsers import get_parser, _parsers
+from parsers.deteccion import detectar_banco
+from parsers.presupuesto import parse_supervisado, contexto_procesos
+from parsers.utils import PdfProbe
+from parsers.consolidacion import consolidar
+from parsers.validacion import resumir
+from parsers.manifest import Manifest, sha256_archivo, huella_parser
+from parsers.traza import trazar, traza_actual
 
 DEFAULT_PDF_FOLDER = Path(__file__).resolve().parent / "pdfs"
 
@@ -28,65 +46,431 @@ def write_single_sheet_excel(df: pd.DataFrame, out_path: Path) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_excel(out_path, index=False)
 
-def process_all_pdfs(pdf_folder: str, parse_func):
+def escribir_salida(result, salida: Path) -> bool:
+    """
+    Escribe el resultado de parse() en `salida` (True si es multi-hoja).
+    Se escribe en un parcial y se renombra: un corte no deja salidas a medias.
+    """
+    parcial = salida.with_name(f"{salida.stem}.parcial.xlsx")
+    try:
+        if isinstance(result, dict):
+            if not result:
+                raise ValueError("El parser devolvió un dict vacío (sin cuentas detectadas).")
+            for k, v in result.items():
+                if not isinstance(v, pd.DataFrame):
+                    raise TypeError(f"Valor no-DataFrame para la hoja '{k}': {type(v)}")
+            write_multi_sheet_excel(result, parcial)
+        elif isinstance(result, pd.DataFrame):
+            write_single_sheet_excel(result, parcial)
+        else:
+            raise TypeError(
+                f"Tipo de retorno no soportado: {type(result)}. "
+                "Esperaba dict[str, DataFrame] o DataFrame."
+            )
+        os.replace(parcial, salida)
+    finally:
+        if parcial.exists():
+            parcial.unlink()
+    return isinstance(result, dict)
+
+# ── Lote en pipeline ───────────────────────────────────────────────────────
+# process_all_pdfs encadena tres etapas con colas acotadas (si una etapa se
+# atrasa, las anteriores esperan en vez de acumular PDFs en memoria):
+#
+#   preparar (hilo)          hash, manifiesto, PDF cifrado/ilegible
+#     → cola →
+#   parsear (procesos)       parse_func en un pool (forkserver con parsers precargado)
+#     → cola →
+#   escribir (hilo)          Excel parcial + rename, manifiesto, reporte
+#
+# Así el parseo del PDF siguiente no espera la escritura del XLSX anterior y
+# el tiempo total se acerca al de la etapa de parseo.
+FIN = None
+
+def _parsear(parse_func, pdf_path: str):
+    """Corre en el pool: (resultado, segundos de parseo)."""
+    t0 = time.perf_counter()
+    result = parse_func(pdf_path)
+    return result, time.perf_counter() - t0
+
+def _en_proceso(parse_func) -> bool:
+    """parse_func se puede mandar a otro proceso (una función de módulo, no una lambda)."""
+    try:
+        pickle.dumps(parse_func)
+        return True
+    except Exception:
+        return False
+
+def _verificar_apertura(pdf_path: Path) -> None:
+    """Falla antes de ocupar un worker si el PDF está cifrado sin contraseña válida."""
+    with PdfProbe(str(pdf_path)) as probe:
+        if probe.rapida:
+            return
+    if getattr(PdfReader(str(pdf_path)), "is_encrypted", False):
+        raise RuntimeError(
+            "Este PDF está protegido con contraseña. "
+            "Definí PDF_PASSWORD con la contraseña para procesarlo."
+        )
+
+def process_all_pdfs(pdf_folder: str, parse_func, banco: str = "", workers: int = None,
+                     cola: int = 4) -> list[str]:
+    """
+    Procesa los PDFs de la carpeta. El manifiesto (`.manifest.json`) decide
+    qué saltear: solo se reprocesan PDFs nuevos o con parser cambiado.
+    `workers`: procesos de parseo (por defecto uno por CPU; 0 = en este
+    proceso). Devuelve las líneas del reporte, en el orden de los PDFs.
+    """
     folder = Path(pdf_folder)
     if not folder.exists() or not folder.is_dir():
-        messagebox.showerror("Error", f"Carpeta inválida:\n{pdf_folder}")
-        return
+        raise NotADirectoryError(f"Carpeta inválida:\n{pdf_folder}")
 
-    pdf_paths = sorted(p for p in folder.iterdir() if p.is_file() and p.suffix.lower() == ".pdf")
-    report = []
+    pdf_paths = sorted(p for p in folder.iterdir() if p.is_file() and es_pdf_entrante(p))
+    manifest = Manifest(folder)
+    huella = huella_parser(parse_func.__module__)
+    lineas = [[] for _ in pdf_paths]    # reporte por PDF
 
-    for pdf_path in pdf_paths:
-        salida = folder / f"{pdf_path.stem}_validado.xlsx"
+    if workers is None:
+        # Con una sola CPU el pool no gana nada: se parsea acá y solo se solapan las etapas
+        cpus = os.cpu_count() or 1
+        workers = min(cpus, len(pdf_paths)) if cpus > 1 else 0
+    # Con traza activa se parsea acá: la traza vive en este proceso
+    if traza_actual() is not None or not _en_proceso(parse_func):
+        workers = 0
 
-        # 1) Skip sin resultados pegados
-        if salida.exists():
-            report.append(f"⏭️ Saltado: {pdf_path.name}")
-            continue
+    a_parsear  = queue.Queue(maxsize=cola)
+    a_escribir = queue.Queue(maxsize=cola)
 
-        try:
-            # 2) Llamada al parser y DEBUG solo aquí
-            result: Any = parse_func(str(pdf_path))
-            print(f"🔍 [DEBUG-main] parse() devolvió: {result!r}  (type={type(result)})")
+    # PDFs con el mismo contenido que otro de esta corrida: se resuelven al
+    # final, cuando el manifiesto ya tiene el resultado del primero
+    en_corrida, repetidos = set(), []
 
-            # 3) Resultado tipo dict → multi-hoja
-            if isinstance(result, dict):
-                if not result:
-                    raise ValueError("El parser devolvió un dict vacío (sin cuentas detectadas).")
-                for k, v in result.items():
-                    if not isinstance(v, pd.DataFrame):
-                        raise TypeError(f"Valor no-DataFrame para la hoja '{k}': {type(v)}")
+    # 1) Preparar: hash, skip por manifiesto, cifrado
+    def preparar():
+        try:
+            for i, pdf_path in enumerate(pdf_paths):
+                # Un PDF ilegible (borrado, sin permisos, cifrado) se reporta
+                # como error y no corta la preparación de los siguientes
+                sha = None
+                try:
+                    sha = sha256_archivo(pdf_path)
+                    if sha in en_corrida:
+                        repetidos.append((i, pdf_path, sha))
+                        continue
+                    en_corrida.add(sha)
+                    previa = manifest.vigente(sha, banco, huella)
+                    if previa:
+                        if previa["pdf"] == pdf_path.name:
+                            lineas[i].append(f"⏭️ Saltado: {pdf_path.name}")
+                        else:
+                            lineas[i].append(f"⏭️ Saltado: {pdf_path.name} (igual a {previa['pdf']} → {previa['salida']})")
+                        continue
+                    _verificar_apertura(pdf_path)
+                except Exception as e:
+                    a_escribir.put((i, pdf_path, sha, time.perf_counter(), e))
+                    continue
+                a_parsear.put((i, pdf_path, sha))
+        finally:
+            a_parsear.put(FIN)
 
-                write_multi_sheet_excel(result, salida)
-                report.append(f"✅ Procesado (multi-hoja): {pdf_path.name}")
+    # 3) Escribir: Excel, manifiesto y reporte (el único que toca el manifiesto)
+    def escribir():
+        while (item := a_escribir.get()) is not FIN:
+            escribir_item(*item)
 
-            # 4) Resultado tipo DataFrame → single sheet
-            elif isinstance(result, pd.DataFrame):
-                write_single_sheet_excel(result, salida)
-                report.append(f"✅ Procesado: {pdf_path.name}")
+    def escribir_item(i, pdf_path, sha, t0, salida_parseo):
+        salida = folder / f"{pdf_path.stem}_validado.xlsx"
+        try:
+            if isinstance(salida_parseo, Exception):
+                raise salida_parseo
+            result, t_parse = salida_parseo
+            print(f"🔍 [DEBUG-main] parse() devolvió: {result!r}  (type={type(result)})")
 
-            # 5) Cualquier otro tipo → error
-            else:
-                raise TypeError(
-                    f"Tipo de retorno no soportado: {type(result)}. "
-                    "Esperaba dict[str, DataFrame] o DataFrame."
-                )
+            multi = escribir_salida(result, salida)
+            lineas[i].append(f"✅ Procesado{' (multi-hoja)' if multi else ''}: {pdf_path.name}")
+            manifest.registrar(
+                sha, pdf=pdf_path.name, banco=banco, parser=huella, salida=salida.name,
+                estado="ok", segundos=round(time.perf_counter() - t0, 3),
+                segundos_parseo=round(t_parse, 3),
+            )
 
         except Exception as e:
-            # 1) imprime en consola la traza completa
+            # 1) imprime en consola la traza completa (la del worker viene en __cause__)
             print(f"⚠️ [DEBUG-main] Error procesando {pdf_path.name}:")
-            traceback.print_exc()
+            traceback.print_exception(e)
 
             # 2) prepara un string más legible
             msg = str(e)
             if msg == "1":
                 msg = "Error interno genérico ‘1’ (ver consola para detalles)"
 
-            report.append(f"❌ Error en {pdf_path.name}: {msg}")
-            report.append(f"❌ {type(e).__name__} en {pdf_path.name}: {msg}")
+            lineas[i].append(f"❌ Error en {pdf_path.name}: {msg}")
+            lineas[i].append(f"❌ {type(e).__name__} en {pdf_path.name}: {msg}")
+            if sha is None:         # ni siquiera se pudo leer: no hay entrada que guardar
+                return
+            manifest.registrar(
+                sha, pdf=pdf_path.name, banco=banco, parser=huella, salida=salida.name,
+                estado="error", error=msg, segundos=round(time.perf_counter() - t0, 3),
+            )
 
-    messagebox.showinfo("Resultados", "\n".join(report) or "No se encontraron PDFs.")
+    preparador = threading.Thread(target=preparar, name="lote-preparar", daemon=True)
+    escritor   = threading.Thread(target=escribir, name="lote-escribir", daemon=True)
+    preparador.start()
+    escritor.start()
+
+    # 2) Parsear: a lo sumo `workers` PDFs en el pool y `cola` esperando
+    def entregar(i, pdf_path, sha, t0, futuro):
+        error = futuro.exception()
+        a_escribir.put((i, pdf_path, sha, t0, error if error is not None else futuro.result()))
+
+    try:
+        if workers == 0:
+            while (item := a_parsear.get()) is not FIN:
+                i, pdf_path, sha = item
+                t0 = time.perf_counter()
+                if (traza := traza_actual()) is not None:
+                    traza.evento("pdf", pdf=pdf_path.name)
+                try:
+                    a_escribir.put((i, pdf_path, sha, t0, _parsear(parse_func, str(pdf_path))))
+                except Exception as e:
+                    a_escribir.put((i, pdf_path, sha, t0, e))
+        else:
+            en_curso = {}
+            with ProcessPoolExecutor(max_workers=workers, mp_context=contexto_procesos()) as pool:
+                while (item := a_parsear.get()) is not FIN:
+                    i, pdf_path, sha = item
+                    futuro = pool.submit(_parsear, parse_func, str(pdf_path))
+                    en_curso[futuro] = (i, pdf_path, sha, time.perf_counter())
+                    while len(en_curso) >= workers + cola:
+                        listos, _ = wait(list(en_curso), return_when=FIRST_COMPLETED)
+                        for f in listos:
+                            entregar(*en_curso.pop(f), f)
+                for f in as_completed(list(en_curso)):
+                    entregar(*en_curso.pop(f), f)
+    finally:
+        a_escribir.put(FIN)
+        escritor.join()
+    preparador.join()
+
+    for i, pdf_path, sha in repetidos:
+        previa = manifest.vigente(sha, banco, huella)
+        if previa:
+            lineas[i].append(f"⏭️ Saltado: {pdf_path.name} (igual a {previa['pdf']} → {previa['salida']})")
+            continue
+        t0 = time.perf_counter()
+        try:
+            escribir_item(i, pdf_path, sha, t0, _parsear(parse_func, str(pdf_path)))
+        except Exception as e:
+            escribir_item(i, pdf_path, sha, t0, e)
+
+    return [linea for grupo in lineas for linea in grupo]
+
+def listar_pdfs(rutas: list[str]) -> list[Path]:
+    """PDFs sueltos y los de cada carpeta, en orden."""
+    pdfs = []
+    for ruta in map(Path, rutas):
+        if ruta.is_dir():
+            pdfs.extend(sorted(p for p in ruta.iterdir() if p.is_file() and p.suffix.lower() == ".pdf"))
+        else:
+            pdfs.append(ruta)
+    return pdfs
+
+def consolidar_pdfs(pdf_paths: list[Path], parse_func, out_path: Path) -> pd.DataFrame:
+    """
+    Parsea todos los PDFs y escribe un único Excel: una hoja por cuenta con el
+    libro continuo y una hoja "Continuidad" con el control entre extractos.
+    """
+    resultados = []
+    for pdf_path in pdf_paths:
+        if (traza := traza_actual()) is not None:
+            traza.evento("pdf", pdf=pdf_path.name)
+        try:
+            resultados.append((pdf_path.name, parse_func(str(pdf_path))))
+            print(f"✅ Procesado: {pdf_path.name}")
+        except Exception as e:
+            print(f"❌ {type(e).__name__} en {pdf_path.name}: {e}")
+
+    libros, continuidad = consolidar(resultados)
+    if not libros:
+        raise ValueError("Ningún PDF devolvió movimientos para consolidar.")
+
+    hojas = dict(libros)
+    hojas["Continuidad"] = continuidad
+    write_multi_sheet_excel(hojas, out_path)
+    print(f"📘 Libro consolidado: {out_path}")
+    return continuidad
+
+# ── Ingesta continua (--vigilar) ───────────────────────────────────────────
+# La carpeta se recorre cada `intervalo` segundos (raíz + una subcarpeta por
+# banco). Un PDF entra cuando su tamaño y mtime no cambian durante `estable`
+# segundos; cada parseo corre en su proceso hijo con presupuesto
+# (parsers/presupuesto.py) y un pool de hilos los despacha. Los fallidos van
+# a `_cuarentena/` con un `.error.txt` al lado.
+CUARENTENA = "_cuarentena"
+
+def es_pdf_entrante(path: Path) -> bool:
+    """PDF a procesar: ni ocultos, ni archivos de bloqueo de Office (~$...)."""
+    return path.suffix.lower() == ".pdf" and not path.name.startswith(("~$", "."))
+
+def pdfs_entrantes(carpeta: Path):
+    """PDFs de la raíz y de cada subcarpeta (salvo la cuarentena y las ocultas)."""
+    for entrada in os.scandir(carpeta):
+        if entrada.is_file() and es_pdf_entrante(Path(entrada.path)):
+            yield Path(entrada.path)
+        elif entrada.is_dir() and entrada.name != CUARENTENA and not entrada.name.startswith("."):
+            try:
+                subs = list(os.scandir(entrada.path))
+            except OSError:
+                continue        # subcarpeta borrada o renombrada mientras se recorría
+            for sub in subs:
+                if sub.is_file() and es_pdf_entrante(Path(sub.path)):
+                    yield Path(sub.path)
+
+def banco_de(pdf_path: Path, carpeta: Path, banco: str = None) -> str | None:
+    """Subcarpeta con nombre de banco, si no `banco`, si no detección por texto."""
+    if pdf_path.parent != carpeta and pdf_path.parent.name in _parsers:
+        return pdf_path.parent.name
+    return banco or detectar_banco(str(pdf_path))
+
+def a_cuarentena(pdf_path: Path, carpeta: Path, motivo: str) -> Path:
+    destino_dir = carpeta / CUARENTENA / pdf_path.parent.relative_to(carpeta)
+    destino_dir.mkdir(parents=True, exist_ok=True)
+    destino = destino_dir / pdf_path.name
+    if destino.exists():
+        destino = destino_dir / f"{pdf_path.stem}-{time.strftime('%Y%m%d-%H%M%S')}{pdf_path.suffix}"
+    os.replace(pdf_path, destino)
+    destino.with_name(destino.name + ".error.txt").write_text(motivo + "\n", encoding="utf-8")
+    return destino
+
+def _ingerir(pdf_path: Path, banco: str) -> dict:
+    """Parsea y escribe la salida de un PDF (corre en el pool)."""
+    salida = pdf_path.with_name(f"{pdf_path.stem}_validado.xlsx")
+    t0 = time.perf_counter()
+    if (traza := traza_actual()) is not None:
+        traza.evento("pdf", pdf=pdf_path.name)
+    try:
+        multi = escribir_salida(parse_supervisado(banco, str(pdf_path)), salida)
+    except Exception as e:
+        return {"estado": "error", "salida": salida.name, "error": str(e) or type(e).__name__,
+                "segundos": round(time.perf_counter() - t0, 3)}
+    return {"estado": "ok", "salida": salida.name, "multi": multi,
+            "segundos": round(time.perf_counter() - t0, 3)}
+
+def vigilar(carpeta, banco: str = None, workers: int = 2, intervalo: float = 2.0, estable: float = 3.0) -> None:
+    """Procesa los PDFs que van llegando a `carpeta` hasta Ctrl+C."""
+    carpeta = Path(carpeta)
+    if not carpeta.is_dir():
+        raise NotADirectoryError(f"Carpeta inválida:\n{carpeta}")
+
+    vistos = {}         # pdf → ((tamaño, mtime), desde cuándo está así)
+    hechos = {}         # pdf → (tamaño, mtime) ya resuelto (procesado o salteado)
+    en_curso = {}       # future → (pdf, banco, sha, firma)
+    manifests = {}
+
+    def manifest_de(pdf_path):
+        return manifests.setdefault(pdf_path.parent, Manifest(pdf_path.parent))
+
+    def cerrar(futuro):
+        pdf_path, banco_pdf, sha, firma = en_curso.pop(futuro)
+        datos = futuro.result()
+        # Resuelto aunque falle lo que sigue: no se reparsea hasta que cambie
+        hechos[pdf_path] = firma
+        try:
+            manifest_de(pdf_path).registrar(
+                sha, pdf=pdf_path.name, banco=banco_pdf,
+                parser=huella_parser(get_parser(banco_pdf)), **datos,
+            )
+            if datos["estado"] == "ok":
+                print(f"✅ {pdf_path.name} → {datos['salida']} ({banco_pdf}, {datos['segundos']:.1f}s)")
+            else:
+                destino = a_cuarentena(pdf_path, carpeta, f"{banco_pdf}: {datos['error']}")
+                print(f"❌ {pdf_path.name}: {datos['error']} → {destino.relative_to(carpeta)}")
+        except OSError as e:
+            # PDF movido o borrado mientras se parseaba, manifiesto no escribible...
+            print(f"⚠️ {pdf_path.name}: {e} (se sigue vigilando)")
+
+    def resolver(pdf_path, firma):
+        """PDF ya estable: a cuarentena, salteado por el manifiesto o al pool."""
+        banco_pdf = banco_de(pdf_path, carpeta, banco)
+        if banco_pdf is None:
+            destino = a_cuarentena(pdf_path, carpeta, "No se pudo detectar el banco (usar una subcarpeta por banco)")
+            print(f"❓ {pdf_path.name}: banco no detectado → {destino.relative_to(carpeta)}")
+            return
+        sha = sha256_archivo(pdf_path)
+        previa = manifest_de(pdf_path).vigente(sha, banco_pdf, huella_parser(get_parser(banco_pdf)))
+        if previa:
+            hechos[pdf_path] = firma
+            print(f"⏭️ Saltado: {pdf_path.name} (igual a {previa['pdf']} → {previa['salida']})")
+            return
+        futuro = pool.submit(contextvars.copy_context().run, _ingerir, pdf_path, banco_pdf)
+        en_curso[futuro] = (pdf_path, banco_pdf, sha, firma)
+
+    print(f"👀 Vigilando {carpeta} (cada {intervalo:g}s, {workers} workers). Ctrl+C para salir.")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            while True:
+                ahora = time.monotonic()
+                presentes = set()
+                try:
+                    for pdf_path in pdfs_entrantes(carpeta):
+                        presentes.add(pdf_path)
+                        try:
+                            st = pdf_path.stat()
+                        except OSError:
+                            continue
+                        firma = (st.st_size, st.st_mtime_ns)
+                        if hechos.get(pdf_path) == firma or any(v[0] == pdf_path for v in en_curso.values()):
+                            continue
+                        previa = vistos.get(pdf_path)
+                        if previa is None or previa[0] != firma:
+                            vistos[pdf_path] = (firma, ahora)     # nuevo o todavía creciendo
+                            continue
+                        if ahora - previa[1] < estable or st.st_size == 0:
+                            continue
+                        del vistos[pdf_path]
+                        try:
+                            resolver(pdf_path, firma)
+                        except OSError as e:
+                            # Movido o borrado entre el stat y la lectura: se reintenta si vuelve
+                            print(f"⚠️ {pdf_path.name}: {e} (se sigue vigilando)")
+                    escaneo_completo = True
+                except OSError as e:
+                    print(f"⚠️ No se pudo recorrer {carpeta}: {e} (se reintenta)")
+                    escaneo_completo = False
+
+                # Archivos que desaparecieron antes de estabilizarse o ya resueltos
+                if escaneo_completo:
+                    for pdf_path in set(vistos) - presentes:
+                        del vistos[pdf_path]
+                    for pdf_path in set(hechos) - presentes:
+                        del hechos[pdf_path]
+
+                for futuro in [f for f in en_curso if f.done()]:
+                    cerrar(futuro)
+                if en_curso:
+                    wait(list(en_curso), timeout=intervalo, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(intervalo)
+        except KeyboardInterrupt:
+            print(f"⏹️ Deteniendo: se esperan {len(en_curso)} PDFs en curso...")
+            for futuro in list(en_curso):
+                cerrar(futuro)
+
+def validar_pdfs(pdf_paths: list[Path], parse_func) -> int:
+    """
+    Parsea y escribe en stdout un resumen JSON por PDF (parsers/validacion.py),
+    sin generar Excel. Código 1 si alguno no reconcilia o falla.
+    """
+    codigo = 0
+    for pdf_path in pdf_paths:
+        try:
+            # La consola del parser va a stderr: stdout queda para el JSON
+            with contextlib.redirect_stdout(sys.stderr):
+                resumen = resumir(parse_func(str(pdf_path)))
+        except Exception as e:
+            resumen = {"reconcilia": False, "error": str(e) or type(e).__name__}
+        codigo = codigo or (0 if resumen["reconcilia"] else 1)
+        print(json.dumps({"pdf": pdf_path.name, **resumen}, ensure_ascii=False))
+    return codigo
 
 def on_start(root, banco_var, dropdown):
     banco = banco_var.get()
@@ -97,9 +481,79 @@ def on_start(root, banco_var, dropdown):
         return
 
     root.destroy()
-    process_all_pdfs(str(DEFAULT_PDF_FOLDER), parser_module.parse)
+    try:
+        report = process_all_pdfs(str(DEFAULT_PDF_FOLDER), parser_module.parse, banco)
+    except NotADirectoryError as err:
+        messagebox.showerror("Error", str(err))
+        return
+    messagebox.showinfo("Resultados", "\n".join(report) or "No se encontraron PDFs.")
+
+def main_cli(argv) -> int:
+    ap = argparse.ArgumentParser(description="Procesa extractos bancarios sin la interfaz gráfica")
+    ap.add_argument("--banco", help="banco de los extractos (ej. Nacion); opcional con --vigilar")
+    modo = ap.add_mutually_exclusive_group(required=True)
+    modo.add_argument("--carpeta", help="procesa la carpeta (un Excel por PDF, incremental por manifiesto)")
+    modo.add_argument("--consolidar", nargs="+", metavar="PDF", help="PDFs o carpetas a consolidar en un libro")
+    modo.add_argument("--vigilar", metavar="CARPETA", help="procesa los PDFs que van llegando a la carpeta")
+    modo.add_argument("--validar", nargs="+", metavar="PDF", help="solo controla saldos: resumen JSON, sin Excel")
+    ap.add_argument("-o", "--salida", default="consolidado.xlsx", help="Excel de salida de --consolidar")
+    ap.add_argument("--traza", metavar="JSONL", help="escribe la traza de cada línea parseada (ver parsers/traza.py)")
+    ap.add_argument("--workers", type=int, help="PDFs en paralelo (--carpeta: uno por CPU, --vigilar: 2)")
+    ap.add_argument("--intervalo", type=float, default=2.0, help="segundos entre recorridas de --vigilar")
+    ap.add_argument("--estable", type=float, default=3.0, help="segundos sin cambios para tomar un PDF")
+    args = ap.parse_args(argv)
+
+    if not args.banco and not args.vigilar:
+        ap.error("--banco es obligatorio salvo con --vigilar")
+    try:
+        parser_module = get_parser(args.banco) if args.banco else None
+    except ValueError as err:
+        print(f"❌ {err}")
+        return 2
+
+    if not args.traza:
+        return _ejecutar_cli(args, parser_module)
+    with trazar(args.traza) as traza:
+        codigo = _ejecutar_cli(args, parser_module)
+    print(f"🧵 Traza: {traza.registros} registros en {args.traza}")
+    return codigo
+
+def _ejecutar_cli(args, parser_module) -> int:
+    if args.vigilar:
+        try:
+            vigilar(args.vigilar, args.banco, args.workers or 2, args.intervalo, args.estable)
+        except NotADirectoryError as err:
+            print(f"❌ {err}")
+            return 2
+        return 0
+
+    if args.validar:
+        return validar_pdfs(listar_pdfs(args.validar), parser_module.parse)
+
+    if args.carpeta:
+        try:
+            report = process_all_pdfs(args.carpeta, parser_module.parse, args.banco, args.workers)
+        except NotADirectoryError as err:
+            print(f"❌ {err}")
+            return 2
+        print("\n".join(report) or "No se encontraron PDFs.")
+        return 1 if any(r.startswith("❌") for r in report) else 0
+
+    pdfs = listar_pdfs(args.consolidar)
+    if not pdfs:
+        print("❌ No se encontraron PDFs.")
+        return 2
+    try:
+        continuidad = consolidar_pdfs(pdfs, parser_module.parse, Path(args.salida))
+    except ValueError as err:
+        print(f"❌ {err}")
+        return 1
+    return 1 if (continuidad["Continuidad"] == "ROTA").any() else 0
 
 def main():
+    if len(sys.argv) > 1:
+        sys.exit(main_cli(sys.argv[1:]))
+
     root = tk.Tk()
     root.title("Bank Parser")
 
@@ -12,8 +12,10 @@
 
 import re
 import pandas as pd
-from .utils import open_pdf, calcular_saldos, reportar_inconsistencias
+from .utils import open_pdf, calcular_saldos, reportar_inconsistencias, iter_pages
 from .bank_profiles import BANK_PROFILES
+from .movimientos import Movimientos
+from .conversion import convert_dates, fecha_referencia
 
 # Detecta encabezado de cuenta:  CC $ 081-351144/1  o  CA $ 081-351145/8
 ACCOUNT_RE = re.compile(r'\b(CC|CA)\s*\$\s*(\d[\d-]+/\d+)', re.IGNORECASE)
@@ -25,20 +27,6 @@ IMPORTE_RE = re.compile(r'-?\d{1,3}(?:\.\d{3})*,\d{2}')
 DATE_RE = re.compile(r'^\d{2}/\d{2}$')
 
 
-def convert_amount(txt: str) -> float:
-    """'1.234,56' → 1234.56  |  '-278,96' → -278.96"""
-    if not txt:
-        return 0.0
-    txt = txt.strip()
-    neg = txt.startswith('-')
-    txt = txt.lstrip('-').replace('.', '').replace(',', '.')
-    try:
-        v = float(txt)
-        return -v if neg else v
-    except ValueError:
-        return 0.0
-
-
 def extract_account_label(line: str) -> str | None:
     """Retorna 'CC $ 081-351144/1' si la línea es un encabezado de cuenta."""
     upper = line.upper()
@@ -72,18 +60,23 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
     print(f'✅ Perfil: {banco} | invertido={es_invertido} | arranca_en_1={arranca_en_1}')
 
     # ── Estado del parser ──────────────────────────────────────────────────
-    cuentas: dict[str, list[dict]] = {}
+    cuentas: dict[str, Movimientos] = {}
     cuenta_actual: str | None = None
     en_detalle: bool = False
 
     # ── Extraer texto del PDF ──────────────────────────────────────────────
     all_lines: list[str] = []
-    with open_pdf(pdf_path) as pdf:
-        for page in pdf.pages:
+    with open_pdf(pdf_path, backend=profile.get('backend')) as pdf:
+        for _, page in iter_pages(pdf):
             text = page.extract_text() or ''
             all_lines.extend(text.split('\n'))
     print(f'   → Líneas totales: {len(all_lines)}')
 
+    # Las fechas vienen como DD/MM: el año sale del encabezado
+    # "Período ... al dd/mm/aaaa"; sin encabezado, de la última fecha completa
+    referencia = fecha_referencia(all_lines)
+    print(f'   → Fecha de referencia para el año: {referencia}')
+
     # ── Procesar línea por línea ───────────────────────────────────────────
     for raw in all_lines:
         line  = raw.strip()
@@ -95,7 +88,7 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
         label = extract_account_label(line)
         if label:
             if label not in cuentas:
-                cuentas[label] = []
+                cuentas[label] = Movimientos()
                 print(f'🏦 Cuenta detectada: {label}')
             cuenta_actual = label
             en_detalle    = False
@@ -152,10 +145,6 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
                 credito_raw = unico
         # len == 1 → solo saldo, no es movimiento válido → se ignora implícitamente
 
-        debito  = abs(convert_amount(debito_raw))
-        credito = abs(convert_amount(credito_raw))
-        saldo   = convert_amount(saldo_raw)
-
         # 7) Descripción: todo entre la fecha (+ 1 token de origen) y el primer importe
         first_pos   = line.find(importes[0])
         desc_raw    = line[len(fecha):first_pos].strip()
@@ -167,13 +156,7 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
         else:
             descripcion = desc_raw
 
-        cuentas[cuenta_actual].append({
-            'Fecha':       fecha,
-            'Descripción': descripcion,
-            'Débito':      debito,
-            'Crédito':     credito,
-            'Saldo':       saldo,
-        })
+        cuentas[cuenta_actual].agregar(fecha, descripcion, debito_raw, credito_raw, saldo_raw)
 
     # ── Convertir a DataFrames ─────────────────────────────────────────────
     dfs: dict[str, pd.DataFrame] = {}
@@ -183,13 +166,14 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
             print(f'⚠️  {label} → sin movimientos')
             continue
 
-        df = pd.DataFrame(movs)
+        df = movs.to_frame()
 
-        for col in ('Débito', 'Crédito', 'Saldo'):
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
+        df['Saldo'] = df['Saldo'].fillna(0.0)
+        for col in ('Débito', 'Crédito'):
+            df[col] = df[col].fillna(0.0).abs()
 
-        # Fecha DD/MM sin año: pandas infiere año actual
-        df['Fecha'] = pd.to_datetime(df['Fecha'], format='%d/%m', errors='coerce').dt.date
+        # Fecha DD/MM sin año: se completa con el año del período
+        df['Fecha'] = convert_dates(df['Fecha'], '%d/%m', referencia=referencia)
 
         df = calcular_saldos(
             df,
@@ -26,7 +26,9 @@
 import re
 import pandas as pd
 from collections import defaultdict
-from .utils import open_pdf, calcular_saldos, reportar_inconsistencias
+from .utils import open_pdf, calcular_saldos, reportar_inconsistencias, iter_page_words
+from .movimientos import Movimientos
+from .conversion import convert_dates
 
 # Patrón de fecha: D/M/YYYY o DD/MM/YYYY
 _DATE_RE = re.compile(r'^\d{1,2}/\d{1,2}/\d{4}$')
@@ -73,20 +75,6 @@ _SKIP_PREFIXES = (
 )
 
 
-def _parse_amount(text: str) -> float:
-    """
-    Convierte importes argentinos a float.
-    Ejemplos: '1.440,00' → 1440.0 | '12.578.851,56' → 12578851.56
-    """
-    text = text.strip()
-    if not text:
-        return 0.0
-    try:
-        return float(text.replace('.', '').replace(',', '.'))
-    except ValueError:
-        return 0.0
-
-
 def parse(pdf_path: str) -> pd.DataFrame:
     """
     Parsea extractos del Banco Coinag S.A.
@@ -101,12 +89,11 @@ def parse(pdf_path: str) -> pd.DataFrame:
     """
     print(f"\n🔍 [COINAG] Parseando: {pdf_path}")
 
-    rows = []
+    rows = Movimientos(("Fecha", "Descripción", "Por Acreditar", "Débito", "Crédito", "Saldo"))
     last_date = None
 
     with open_pdf(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            words = page.extract_words()
+        for page_num, words in iter_page_words(pdf):
             if not words:
                 continue
 
@@ -142,7 +129,6 @@ def parse(pdf_path: str) -> pd.DataFrame:
                 saldo_text = saldo_words[0]['text']
                 if ',' not in saldo_text:
                     continue
-                saldo = _parse_amount(saldo_text)
 
                 # ── Fecha (x0 < 100) ───────────────────────────────────────
                 date_words = [w for w in line if w['x0'] < 100]
@@ -169,40 +155,39 @@ def parse(pdf_path: str) -> pd.DataFrame:
 
                 # ── Por Acreditar (x1 entre 390 y 425) ────────────────────
                 # (raramente tiene valores; se incluye por completitud)
+                # Los importes se guardan crudos; se convierten de a columna
                 por_acred_words = [w for w in line if 390 <= w['x1'] <= 425]
-                por_acreditar = (_parse_amount(por_acred_words[0]['text'])
-                                 if por_acred_words else 0.0)
+                por_acreditar = por_acred_words[0]['text'] if por_acred_words else ''
 
                 # ── Débito (x1 ≈ 446, rango 430-460) ─────────────────────
                 debito_words = [w for w in line if 430 <= w['x1'] <= 460]
-                debito = (_parse_amount(debito_words[0]['text'])
-                          if debito_words else 0.0)
+                debito = debito_words[0]['text'] if debito_words else ''
 
                 # ── Crédito (x1 ≈ 510, rango 495-525) ────────────────────
                 credito_words = [w for w in line if 495 <= w['x1'] <= 525]
-                credito = (_parse_amount(credito_words[0]['text'])
-                           if credito_words else 0.0)
-
-                rows.append({
-                    "Fecha":         last_date,
-                    "Descripción":   descripcion,
-                    "Por Acreditar": round(por_acreditar, 2),
-                    "Débito":        round(debito,        2),
-                    "Crédito":       round(credito,       2),
-                    "Saldo":         round(saldo,         2),
-                })
+                credito = credito_words[0]['text'] if credito_words else ''
+
+                rows.agregar(
+                    last_date,
+                    descripcion,
+                    por_acreditar,
+                    debito,
+                    credito,
+                    saldo_text,
+                )
 
     # ── Construir DataFrame ────────────────────────────────────────────────
-    df = pd.DataFrame(rows)
+    df = rows.to_frame()
 
     if df.empty:
         print("❌ [COINAG] No se extrajeron movimientos.")
         return df
 
+    importes = ["Por Acreditar", "Débito", "Crédito", "Saldo"]
+    df[importes] = df[importes].round(2)
+
     # Convertir fechas al tipo date
-    df["Fecha"] = pd.to_datetime(
-        df["Fecha"], format="%d/%m/%Y", dayfirst=True, errors="coerce"
-    ).dt.date
+    df["Fecha"] = convert_dates(df["Fecha"], "%d/%m/%Y")
 
     # Calcular saldo teórico y reportar inconsistencias
     # es_layout_invertido=True: saldo sube con créditos y baja con débitos
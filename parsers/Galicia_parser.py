@@ -2,52 +2,21 @@ import pdfplumber
 import pandas as pd
 import re
 from pathlib import Path
-from parsers.utils import calcular_saldos, reportar_inconsistencias, open_pdf
+from parsers.utils import calcular_saldos, reportar_inconsistencias, open_pdf, iter_page_words
+from parsers.movimientos import Movimientos
 
+# Los importes se guardan crudos y se convierten de a columna (parsers/conversion.py)
 
-# ------------------------------------------------
-# 1) Helpers de conversión
-# ------------------------------------------------
-def convertir_a_float(valor):
-    try:
-        valor = str(valor).strip()
-        if valor.endswith('-'):
-            valor = '-' + valor[:-1]
-        valor = valor.replace('–', '-').replace('−', '-')
-        if ',' in valor:
-            int_part, dec_part = valor.split(',')
-            int_part = int_part.replace('.', '')
-            valor = f"{int_part}.{dec_part}"
-        valor = re.sub(r'[^\d\.\-]', '', valor)
-        return float(valor)
-    except Exception as e:
-        print(f"⚠️ Error al convertir banco Galicia: '{valor}' → {e}")
-        return None
-
-def parse_amount(value):
-    if not value:
-        return 0.0
-    value = value.strip()
-    if value.endswith('-'):
-        value = '-' + value[:-1]
-    value = value.replace('.', '').replace(',', '.')
-    try:
-        return float(value)
-    except ValueError:
-        return 0.0
 
 # ------------------------------------------------
-# 2) Extracción de movimientos (tu código actual)
+# 1) Extracción de movimientos (tu código actual)
 # ------------------------------------------------
 def extract_movements_by_x0(pdf_path: str) -> pd.DataFrame:
-    rows = []
+    rows = Movimientos(("Fecha", "Descripción", "Crédito", "Débito", "Saldo"))
     with open_pdf(pdf_path) as pdf:
-        for page in pdf.pages:
-            words= page.extract_words()
-        for page_num, page in enumerate(pdf.pages, start=1):
-            words = page.extract_words()
+        for idx, words in iter_page_words(pdf):
             if not words:
-                print(f"⚠️ Página {page_num} sin contenido.")
+                print(f"⚠️ Página {idx + 1} sin contenido.")
                 continue
 
             line_map = {}
@@ -58,7 +27,7 @@ def extract_movements_by_x0(pdf_path: str) -> pd.DataFrame:
             for top in sorted(line_map):
                 line = sorted(line_map[top], key=lambda w: w['x0'])
                 fecha = descripcion = ""
-                credito = debito = saldo = 0.0
+                credito = debito = saldo = ""
 
                 for i, w in enumerate(line):
                     x, text = w['x0'], w['text'].strip()
@@ -67,25 +36,22 @@ def extract_movements_by_x0(pdf_path: str) -> pd.DataFrame:
                     elif x < 300 and not re.search(r"\d+[,\.]\d{2}-?$", text) and "/" not in text:
                         descripcion += text + " "
                     elif 250 <= x < 400:
-                        credito = abs(parse_amount(text))
+                        credito = text
                     elif 400 <= x < 500:
-                        debito = abs(parse_amount(text))
+                        debito = text
                     elif x >= 500:
-                        saldo = parse_amount(text)
+                        saldo = text
 
                 if fecha:
-                    rows.append({
-                        "Fecha": fecha.strip(),
-                        "Descripción": descripcion.strip(),
-                        "Crédito": round(credito, 2),
-                        "Débito": round(debito, 2),
-                        "Saldo": round(convertir_a_float(saldo), 2)
-                    })
+                    rows.agregar(fecha.strip(), descripcion.strip(), credito, debito, saldo)
 
-    return pd.DataFrame(rows)
+    df = rows.to_frame()
+    df[["Crédito", "Débito"]] = df[["Crédito", "Débito"]].abs().round(2)
+    df["Saldo"] = df["Saldo"].round(2)
+    return df
 
 # ------------------------------------------------
-# 3) Función pública parse()
+# 2) Función pública parse()
 # ------------------------------------------------
 es_layout_invertido = True  # Ajustalo según tu layout
 
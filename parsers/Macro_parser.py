@@ -3,8 +3,13 @@
 import re
 import pandas as pd
 from collections import defaultdict
-from .utils import open_pdf, calcular_saldos, reportar_inconsistencias
+from .utils import open_pdf, calcular_saldos, reportar_inconsistencias, PdfProbe, iter_page_words
 from .bank_profiles import BANK_PROFILES
+from .movimientos import Movimientos
+from .conversion import convert_dates
+from .progreso import cuenta_actual
+
+COLUMNAS = ("Fecha", "Descripción", "Referencia", "Débito", "Crédito", "Saldo")
 
 # Regex permisivo para distintos formatos de cuenta
 # acepta A-B-C (original) o A-B-C-D con tamaños 1-3, 1-12, 1-3 y 1-3 respectivamente - 
@@ -33,27 +38,6 @@ flags       = profile["flags"]
 excluir     = profile["excluir_si_contiene"]
 default_idx = profile["buscar_desde_pagina"]
 
-def convert_amount(txt: str) -> float:
-    if not txt:
-        return 0.0
-
-    txt = txt.replace(".", "").replace(",", ".").strip()
-
-    # Detectar guion al final o flotante
-    negativo = False
-    if txt.endswith("-"):
-        negativo = True
-        txt = txt[:-1].strip()
-    elif "-" in txt and txt.count("-") == 1:
-        txt = txt.replace("-", "").strip()
-        negativo = True
-
-    try:
-        val = float(txt)
-        return -val if negativo else val
-    except ValueError:
-        return 0.0
-
 
 def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
     """Parsea extractos de Macro y devuelve dict hoja → DataFrame."""
@@ -83,26 +67,22 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
     print(f"   → Layout invertido: {es_invertido}")
     print(f"   → Saldo arranca en fila 1: {arranca_en_1}")
 
-    cuentas        = defaultdict(list)
+    cuentas        = defaultdict(lambda: Movimientos(COLUMNAS))
     display_names  = {}
     cuenta_key     = None
     account_states = {}
 
-    with open_pdf(pdf_path) as pdf:
+    with open_pdf(pdf_path, backend=profile.get("backend")) as pdf, PdfProbe(pdf_path, fallback=pdf) as probe:
         total_pages = len(pdf.pages)
         start_idx   = default_idx
 
-        for i, page in enumerate(pdf.pages[:5]):
-            txt = (page.extract_text() or "").upper()
-            if "DETALLE DE MOVIMIENTO" in txt:
-                start_idx = i
-                break
+        # Texto plano con pdfium: pdfminer solo corre desde la página de inicio
+        inicio = probe.find("DETALLE DE MOVIMIENTO", pages=range(5))
+        if inicio is not None:
+            start_idx = inicio
         print(f"📄 Página de inicio detectada: {start_idx}/{total_pages}")
 
-        for idx in range(start_idx, total_pages):
-            page    = pdf.pages[idx]
-            cropped = page.within_bbox((0, 150, page.width, page.height))
-            words   = cropped.extract_words(use_text_flow=False)
+        for idx, words in iter_page_words(pdf, range(start_idx, total_pages), top=150, use_text_flow=False):
             if not words:
                 continue
 
@@ -124,6 +104,7 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
                         display_names[key] = label
                         account_states[key] = {"en_detalle": False, "header_found": False}
                         print(f"🏦 Cuenta detectada: {label}")
+                        cuenta_actual(label)
                     continue
 
                 if not cuenta_key:
@@ -179,26 +160,26 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
                 ):
                     continue
 
-                cuentas[cuenta_key].append({
-                    "Fecha":       fecha,
-                    "Descripción": cols["Descripción"],
-                    "Referencia":  cols["Referencia"],
-                    "Débito":      convert_amount(cols["Débito"]),
-                    "Crédito":     convert_amount(cols["Crédito"]),
-                    "Saldo":       convert_amount(cols["Saldo"])
-                })
+                cuentas[cuenta_key].agregar(
+                    fecha,
+                    cols["Descripción"],
+                    cols["Referencia"],
+                    cols["Débito"],
+                    cols["Crédito"],
+                    cols["Saldo"],
+                )
 
     # Convertir a DataFrames y calcular saldos
     dfs = {}
     for key, movs in cuentas.items():
-        df = pd.DataFrame(movs)
+        df = movs.to_frame()
         if df.empty:
             continue
 
         for col in ("Débito", "Crédito", "Saldo"):
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+            df[col] = df[col].fillna(0.0)
 
-        df["Fecha"] = pd.to_datetime(df["Fecha"], format="%d/%m/%y", dayfirst=True, errors="coerce").dt.date
+        df["Fecha"] = convert_dates(df["Fecha"], "%d/%m/%y")
 
         df = calcular_saldos(
             df,
@@ -3,8 +3,12 @@
 import re
 import pandas as pd
 from collections import defaultdict
-from .utils import open_pdf, calcular_saldos, reportar_inconsistencias
+from .utils import open_pdf, calcular_saldos, reportar_inconsistencias, PdfProbe, iter_page_words
 from .bank_profiles import BANK_PROFILES
+from .movimientos import Movimientos
+from .conversion import convert_dates
+
+COLUMNAS = ("Fecha", "Descripción", "Referencia", "Débito", "Crédito", "Saldo")
 
 # Regex permisivo para distintos formatos de cuenta
 ACCOUNT_RE = re.compile(r"\b\d{1,3}[-/]\d{1,12}[-/]\d{1,3}\b")
@@ -28,27 +32,6 @@ flags       = profile["flags"]
 excluir     = profile["excluir_si_contiene"]
 default_idx = profile["buscar_desde_pagina"]
 
-def convert_amount(txt: str) -> float:
-    if not txt:
-        return 0.0
-
-    txt = txt.replace(".", "").replace(",", ".").strip()
-
-    # Detectar guion al final o flotante
-    negativo = False
-    if txt.endswith("-"):
-        negativo = True
-        txt = txt[:-1].strip()
-    elif "-" in txt and txt.count("-") == 1:
-        txt = txt.replace("-", "").strip()
-        negativo = True
-
-    try:
-        val = float(txt)
-        return -val if negativo else val
-    except ValueError:
-        return 0.0
-
 
 def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
     """Parsea extractos de MUNICIPALROS y devuelve dict hoja → DataFrame."""
@@ -90,25 +73,20 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
     movimientos_actuales = []
 
 
-    with open_pdf(pdf_path) as pdf:
+    with open_pdf(pdf_path, backend=profile.get("backend")) as pdf, PdfProbe(pdf_path, fallback=pdf) as probe:
         total_pages = len(pdf.pages)
         start_idx   = default_idx
-        movimientos=[]
+        movimientos = Movimientos(COLUMNAS)
         start_idx = default_idx
         
-        for i, page in enumerate(pdf.pages[:5]):
-            txt = (page.extract_text() or "").upper()
-            if "HOJA NRO" in txt:
-                start_idx = i
-                print(f"📄 Primera aparición de HOJA NRO en página {i}")
-                
-                break
+        # Texto plano con pdfium: pdfminer solo corre desde la primera hoja
+        inicio = probe.find("HOJA NRO", pages=range(5))
+        if inicio is not None:
+            start_idx = inicio
+            print(f"📄 Primera aparición de HOJA NRO en página {inicio}")
         
-        for idx in range(start_idx, total_pages):
-            page    = pdf.pages[idx]
-            cropped = page.within_bbox((0, 150, page.width, page.height))
+        for idx, words in iter_page_words(pdf, range(start_idx, total_pages), top=150, use_text_flow=False):
             solo_diagnostico = (idx == 0)
-            words   = cropped.extract_words(use_text_flow=False)
             if not words:
                 continue
                
@@ -211,21 +189,21 @@ def parse(pdf_path: str) -> dict[str, pd.DataFrame]:
                         print("   ✅ Línea válida, se va a cargar")
                     '''
 
-                movimientos.append({
-                    "Fecha":       fecha,
-                    "Descripción": cols["Descripción"],
-                    "Referencia":  cols["Referencia"],
-                    "Débito":      convert_amount(cols["Débito"]),
-                    "Crédito":     convert_amount(cols["Crédito"]),
-                    "Saldo":       convert_amount(cols["Saldo"])
-                })
+                movimientos.agregar(
+                    fecha,
+                    cols["Descripción"],
+                    cols["Referencia"],
+                    cols["Débito"],
+                    cols["Crédito"],
+                    cols["Saldo"],
+                )
                 #print(f"✅ Movimiento cargado → Fecha: {fecha} | Desc: {cols['Descripción']} | Débito: {cols['Débito']} | Crédito: {cols['Crédito']} | Saldo: {cols['Saldo']}")
 
-    df = pd.DataFrame(movimientos)
+    df = movimientos.to_frame()
     if not df.empty:
         for col in ("Débito", "Crédito", "Saldo"):
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
-        df["Fecha"] = pd.to_datetime(df["Fecha"], format="%d/%m/%Y", dayfirst=True, errors="coerce").dt.date
+            df[col] = df[col].fillna(0.0)
+        df["Fecha"] = convert_dates(df["Fecha"], "%d/%m/%Y")
         df = calcular_saldos(df, es_layout_invertido=es_invertido, saldo_arranca_en_fila_1=arranca_en_1)
         reportar_inconsistencias(df)
 
@@ -1,8 +1,11 @@
 """
 santafe_parser.py - Parser para extractos del Banco Santa Fe.
 """
-import re, pdfplumber, pandas as pd
-from collections import defaultdict
+import re, pandas as pd
+from .utils import WordTable, open_pdf, iter_page_words
+from .bank_profiles import BANK_PROFILES
+from .movimientos import Movimientos
+from .progreso import cuenta_actual
 
 LAYOUT = {
     "date_x":    (38,  93),
@@ -13,32 +16,33 @@ LAYOUT = {
     "balance_x": (492, 560),
 }
 
+# Los resúmenes anuales (varios períodos en un PDF) llegan a ~600 páginas:
+# ~0,11 s por página medido, con margen para un worker más lento o cargado
+PRESUPUESTO = {"paginas": 1000, "segundos": 300}
+
 DATE_RE         = re.compile(r'^\d{1,2}/\d{2}/\d{4}$')
 CUENTA_RE       = re.compile(r'Nro\.\s+(\d{4,}/\d{2})')
 SALDO_ACTUAL_RE = re.compile(r'Saldo Actual al\s*:\s*(\d+)/(\d+)/(\d{4})', re.IGNORECASE)
 SALDO_AL_RE     = re.compile(r'^Saldo\s+al\s+\d+/\d+/\d+', re.IGNORECASE)
 
 
-def _conv(txt):
-    if not txt: return 0.0
-    t = txt.strip()
-    neg = t.endswith('-')
-    if neg: t = t[:-1]
-    try: return float(t.replace(',','.')) * (-1 if neg else 1)
-    except: return 0.0
+# Orden de prioridad de columnas (mismo orden que la cadena if/elif original)
+_COL_KEYS  = ('date_x', 'origen_x', 'concepto_x', 'debit_x', 'credit_x', 'balance_x')
+_COL_NAMES = ('Fecha',  'Origen',   'Concepto',   'Debito',  'Credito',  'Saldo')
+_MOV_COLS  = ('Fecha', 'Origen', 'Concepto', 'Debito', 'Credito', 'Saldo')
+_IMPORTES  = ('Debito', 'Credito', 'Saldo')
+# Importes sin separador de miles: '1234,56' o '1234.56' (ver conversion.py)
+_DECIMAL   = '.,'
 
 
-def _cols(line_words):
+def _cols(texts, col_ids):
+    """Arma las columnas de una línea a partir de los ids de `WordTable.classify`."""
     c = {'Fecha':None,'Origen':'','Concepto':'','Debito':None,'Credito':None,'Saldo':None}
-    L = LAYOUT
-    for w in sorted(line_words, key=lambda w: w['x0']):
-        x, txt = w['x0'], w['text'].strip()
-        if   L['date_x'][0]    <= x < L['date_x'][1]:    c['Fecha']    = txt
-        elif L['origen_x'][0]  <= x < L['origen_x'][1]:  c['Origen']   = (c['Origen']+' '+txt).strip()
-        elif L['concepto_x'][0]<= x < L['concepto_x'][1]:c['Concepto'] = (c['Concepto']+' '+txt).strip()
-        elif L['debit_x'][0]   <= x < L['debit_x'][1]:   c['Debito']   = txt
-        elif L['credit_x'][0]  <= x < L['credit_x'][1]:  c['Credito']  = txt
-        elif L['balance_x'][0] <= x < L['balance_x'][1]: c['Saldo']    = txt
+    for txt, k in zip(texts, col_ids):
+        if k < 0: continue
+        name, txt = _COL_NAMES[k], txt.strip()
+        if name in ('Origen', 'Concepto'): c[name] = (c[name]+' '+txt).strip()
+        else:                              c[name] = txt
     return c
 
 
@@ -52,8 +56,9 @@ def _saldos(df):
 def _save(resultados, pkey, movs, cuenta):
     if not movs: return
     key = pkey or f'Cta. {cuenta}'
-    df = pd.DataFrame(movs)
+    df = movs.to_frame()                  # importes convertidos de a columna
     df = df.rename(columns={'Debito':'Débito','Credito':'Crédito'})
+    df[['Débito','Crédito','Saldo']] = df[['Débito','Crédito','Saldo']].fillna(0.0)
     df['Saldo Calculado'] = _saldos(df)
     df['Diferencia'] = (df['Saldo'] - df['Saldo Calculado']).round(2)
     resultados[key] = df
@@ -70,23 +75,25 @@ def parsear_pdf(pdf_path):
     resultados  = {}
     cuenta_nro  = 'desconocida'
     periodo_key = None
-    movimientos = []
+    movimientos = Movimientos(_MOV_COLS, _IMPORTES, _DECIMAL)
     en_movs     = False
 
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f'📄 Abierto: {pdf_path} ({len(pdf.pages)} páginas)')
-
-        for page in pdf.pages:
-            words = page.extract_words(use_text_flow=False)
-            if not words: continue
+    profile = BANK_PROFILES['SANTAFE']
 
-            lmap = defaultdict(list)
-            for w in words:
-                lmap[round(w['top'])].append(w)
+    # Página por página: la memoria queda acotada a una página aunque el
+    # resumen anual tenga cientos; el estado (cuenta, período, movimientos)
+    # sigue de una página a la otra
+    with open_pdf(pdf_path, backend=profile.get('backend')) as pdf:
+        print(f'📄 Abierto: {pdf_path} ({len(pdf.pages)} páginas)')
+        for idx, words in iter_page_words(pdf, use_text_flow=False):
+            # Líneas y columnas se resuelven en bloque sobre los arrays de la página
+            tabla = WordTable.from_words([(idx, words)]).build_lines()
+            col_ids = tabla.classify(LAYOUT, _COL_KEYS).tolist()
+            textos  = tabla.text
 
-            for y in sorted(lmap):
-                lw = lmap[y]
-                joined = ' '.join(w['text'] for w in sorted(lw, key=lambda w: w['x0'])).strip()
+            for s, e in tabla.lines():
+                lt = textos[s:e]
+                joined = ' '.join(lt).strip()
 
                 # Cuenta
                 if cuenta_nro == 'desconocida':
@@ -99,17 +106,18 @@ def parsear_pdf(pdf_path):
                 mp = SALDO_ACTUAL_RE.search(joined)
                 if mp:
                     periodo_key = f'Cta. {cuenta_nro} ({mp.group(2)}/{mp.group(3)})'
+                    cuenta_actual(periodo_key)
                     continue
 
                 # SALDO ANTERIOR
                 if 'SALDO ANTERIOR' in joined.upper() and not en_movs:
                     en_movs = True
                     saldo_txt = None
-                    for w in reversed(sorted(lw, key=lambda w: w['x0'])):
-                        try: float(w['text'].replace(',','.').rstrip('-')); saldo_txt = w['text']; break
+                    for txt in reversed(lt):
+                        try: float(txt.replace(',','.').rstrip('-')); saldo_txt = txt; break
                         except: continue
-                    movimientos = [{'Fecha':'SALDO ANTERIOR','Origen':'','Concepto':'SALDO ANTERIOR',
-                                    'Debito':0.0,'Credito':0.0,'Saldo':_conv(saldo_txt or '0')}]
+                    movimientos = Movimientos(_MOV_COLS, _IMPORTES, _DECIMAL)
+                    movimientos.agregar('SALDO ANTERIOR', '', 'SALDO ANTERIOR', 0.0, 0.0, saldo_txt or '0')
                     continue
 
                 if not en_movs: continue
@@ -118,21 +126,20 @@ def parsear_pdf(pdf_path):
                 if SALDO_AL_RE.match(joined):
                     en_movs = False
                     _save(resultados, periodo_key, movimientos, cuenta_nro)
-                    movimientos = []
+                    movimientos = Movimientos(_MOV_COLS, _IMPORTES, _DECIMAL)
                     continue
 
                 if joined.startswith('Ley 25'): continue
 
-                c = _cols(lw)
+                c = _cols(lt, col_ids[s:e])
                 fecha = (c['Fecha'] or '').strip()
                 tiene = c['Debito'] or c['Credito'] or c['Saldo']
                 if fecha and DATE_RE.match(fecha) and tiene:
-                    movimientos.append({'Fecha':fecha,'Origen':c['Origen'],
-                                        'Concepto':c['Concepto'],'Debito':_conv(c['Debito']),
-                                        'Credito':_conv(c['Credito']),'Saldo':_conv(c['Saldo'])})
+                    movimientos.agregar(fecha, c['Origen'], c['Concepto'],
+                                        c['Debito'], c['Credito'], c['Saldo'])
 
-        if en_movs and movimientos:
-            _save(resultados, periodo_key, movimientos, cuenta_nro)
+    if en_movs and movimientos:
+        _save(resultados, periodo_key, movimientos, cuenta_nro)
 
     # Post-fix: reemplazar claves con cuenta desconocida
     for k in list(resultados.keys()):
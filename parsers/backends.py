@@ -0,0 +1,288 @@
+# parsers/backends.py
+#
+# Backends de extracción de palabras detrás de `utils.open_pdf`.
+#
+#   "pdfplumber"  → el de siempre (pdfminer, análisis de layout completo).
+#   "pdfium"      → pypdfium2: lee las cajas de cada carácter del text page
+#                   y las agrupa en palabras con las mismas reglas que
+#                   `extract_words()` de pdfplumber (x_tolerance/y_tolerance,
+#                   corte en espacios). Devuelve dicts con el mismo contrato
+#                   x0 / x1 / top / bottom / text, así que los parsers no
+#                   cambian. Solo sirve para PDFs con capa de texto.
+#
+# Elección del backend (en orden):
+#   1. argumento `backend` de open_pdf (los parsers pasan profile["backend"])
+#   2. variable de entorno PDF_BACKEND
+#   3. "pdfplumber"
+#
+# Modo validación: compara los dos backends página por página sobre un corpus
+# antes de pasar un banco a "pdfium":
+#
+#   python -m parsers.backends extractos/*.pdf --tol 1.0
+
+import argparse
+import ctypes
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pypdfium2.raw as pdfium_c
+
+from .utils import _open_pdfium, _PDFIUM_LOCK
+
+BACKENDS = ("pdfplumber", "pdfium")
+DEFAULT_BACKEND = "pdfplumber"
+
+# pdfium marca el guion de corte de línea con U+0002
+_PDFIUM_CHARS = {0x02: "-"}
+
+
+def resolve_backend(backend: str = None) -> str:
+    """Backend a usar según argumento, PDF_BACKEND o el default."""
+    elegido = (backend or os.environ.get("PDF_BACKEND") or DEFAULT_BACKEND).lower()
+    if elegido not in BACKENDS:
+        raise ValueError(f"Backend de extracción desconocido: '{elegido}' (opciones: {', '.join(BACKENDS)})")
+    return elegido
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Agrupado de caracteres en palabras
+# ──────────────────────────────────────────────────────────────────────────
+
+def group_words(x0, x1, top, bottom, chars, blank, x_tolerance: float = 3, y_tolerance: float = 3) -> list[dict]:
+    """
+    Agrupa caracteres en palabras como `WordExtractor` de pdfplumber con
+    use_text_flow=False: líneas por cercanía de `top` (y_tolerance), orden
+    por x0 dentro de la línea, y palabra nueva ante un blanco, un salto
+    mayor a x_tolerance o un carácter que retrocede.
+    """
+    n = len(chars)
+    if n == 0:
+        return []
+
+    # Líneas: `top` ordenado, corte cuando la diferencia supera la tolerancia
+    orden_top = np.argsort(top, kind="stable")
+    salto     = np.diff(top[orden_top]) > y_tolerance
+    linea     = np.empty(n, dtype=np.int64)
+    linea[orden_top] = np.concatenate(([0], np.cumsum(salto)))
+
+    orden = np.lexsort((x0, linea))
+    pos   = np.flatnonzero(~blank[orden])
+    if len(pos) == 0:
+        return []
+    idx = orden[pos]
+
+    cx0, cx1, ctop, lin = x0[idx], x1[idx], top[idx], linea[idx]
+    nueva = np.ones(len(idx), dtype=bool)
+    nueva[1:] = (
+        (lin[1:] != lin[:-1])
+        | (pos[1:] - 1 != pos[:-1])           # hubo un blanco en el medio
+        | (cx0[1:] < cx0[:-1])
+        | (cx0[1:] > cx1[:-1] + x_tolerance)
+        | (np.abs(ctop[1:] - ctop[:-1]) > y_tolerance)
+    )
+    inicios = np.flatnonzero(nueva)
+    fines   = np.append(inicios[1:], len(idx))
+
+    wx0 = np.minimum.reduceat(cx0, inicios)
+    wx1 = np.maximum.reduceat(cx1, inicios)
+    wtp = np.minimum.reduceat(ctop, inicios)
+    wbt = np.maximum.reduceat(bottom[idx], inicios)
+
+    textos = [chars[i] for i in idx.tolist()]
+    return [
+        {"text": "".join(textos[a:b]), "x0": float(a0), "x1": float(a1),
+         "top": float(t), "bottom": float(bt), "upright": True}
+        for a, b, a0, a1, t, bt in zip(inicios.tolist(), fines.tolist(),
+                                       wx0.tolist(), wx1.tolist(), wtp.tolist(), wbt.tolist())
+    ]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Backend pdfium
+# ──────────────────────────────────────────────────────────────────────────
+
+class PdfiumPage:
+    """Página con la parte de la API de pdfplumber que usan los parsers."""
+
+    __slots__ = ("_doc", "_idx", "page_number", "width", "height", "bbox", "_chars")
+
+    def __init__(self, doc, idx: int, width: float, height: float, bbox=None, chars=None):
+        self._doc        = doc
+        self._idx        = idx
+        self.page_number = idx + 1
+        self.width       = width
+        self.height      = height
+        self.bbox        = bbox or (0, 0, width, height)
+        self._chars      = chars
+
+    def _cargar(self):
+        """Lee los caracteres del text page (coordenadas de pdfplumber: top desde arriba)."""
+        if self._chars is None:
+            x0, x1, top, bottom, chars, blank = [], [], [], [], [], []
+            rect = pdfium_c.FS_RECTF()
+            with _PDFIUM_LOCK:
+                page = self._doc[self._idx]
+                tp   = page.get_textpage()
+                raw  = tp.raw
+                for i in range(tp.count_chars()):
+                    code = pdfium_c.FPDFText_GetUnicode(raw, i)
+                    ch = _PDFIUM_CHARS.get(code) or chr(code)
+                    es_blanco = ch.isspace()
+                    # Los espacios y saltos que pdfium inventa no cortan: decide la geometría
+                    if es_blanco and pdfium_c.FPDFText_IsGenerated(raw, i):
+                        continue
+                    if not pdfium_c.FPDFText_GetLooseCharBox(raw, i, ctypes.byref(rect)):
+                        continue
+                    x0.append(rect.left)
+                    x1.append(rect.right)
+                    top.append(self.height - rect.top)
+                    bottom.append(self.height - rect.bottom)
+                    chars.append(ch)
+                    blank.append(es_blanco)
+                tp.close()
+                page.close()
+            self._chars = (np.array(x0), np.array(x1), np.array(top), np.array(bottom),
+                           chars, np.array(blank, dtype=bool))
+        return self._chars
+
+    def within_bbox(self, bbox) -> "PdfiumPage":
+        """Vista de la página con los caracteres contenidos en `bbox`."""
+        x0, x1, top, bottom, chars, blank = self._cargar()
+        bx0, btop, bx1, bbottom = bbox
+        m = (x0 >= bx0) & (x1 <= bx1) & (top >= btop) & (bottom <= bbottom)
+        sub = (x0[m], x1[m], top[m], bottom[m], [c for c, k in zip(chars, m.tolist()) if k], blank[m])
+        return PdfiumPage(self._doc, self._idx, self.width, self.height, tuple(bbox), sub)
+
+    crop = within_bbox
+
+    def extract_words(self, x_tolerance: float = 3, y_tolerance: float = 3, **_ignorado) -> list[dict]:
+        return group_words(*self._cargar(), x_tolerance=x_tolerance, y_tolerance=y_tolerance)
+
+    def extract_text(self, **_ignorado) -> str:
+        """Palabras unidas por espacios y líneas por saltos (sin layout)."""
+        lineas, ultimo = [], None
+        for w in self.extract_words():
+            if ultimo is None or w["top"] - ultimo > 3:
+                lineas.append([])
+                ultimo = w["top"]
+            lineas[-1].append(w["text"])
+        return "\n".join(" ".join(l) for l in lineas)
+
+    def close(self) -> None:
+        """Libera los caracteres cacheados."""
+        self._chars = None
+
+
+class PdfiumPDF:
+    """Documento abierto con pdfium; se usa igual que un `pdfplumber.PDF`."""
+
+    def __init__(self, pdf_path: str, password: str = None):
+        self._doc = _open_pdfium(pdf_path, password)
+        with _PDFIUM_LOCK:
+            tamanios = [self._doc.get_page_size(i) for i in range(len(self._doc))]
+        self.pages = [PdfiumPage(self._doc, i, w, h) for i, (w, h) in enumerate(tamanios)]
+
+    def __enter__(self) -> "PdfiumPDF":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._doc is not None:
+            for p in self.pages:
+                p.close()
+            with _PDFIUM_LOCK:
+                self._doc.close()
+            self._doc = None
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Modo validación
+# ──────────────────────────────────────────────────────────────────────────
+
+def compare_words(pdf_path: str, tol: float = 1.0, **extract_kwargs) -> dict:
+    """
+    Extrae las palabras con los dos backends y las empareja por página,
+    texto y posición (|Δx0|, |Δtop| <= tol). Devuelve conteos y tiempos.
+    """
+    from .utils import open_pdf
+
+    tiempos, palabras = {}, {}
+    for backend in BACKENDS:
+        t0 = time.perf_counter()
+        with open_pdf(pdf_path, backend=backend) as pdf:
+            palabras[backend] = [p.extract_words(**extract_kwargs) for p in pdf.pages]
+        tiempos[backend] = time.perf_counter() - t0
+
+    iguales = faltan = sobran = 0
+    paginas_distintas = []
+    for n, (ref, alt) in enumerate(zip(palabras["pdfplumber"], palabras["pdfium"]), start=1):
+        pendientes = {}
+        for w in alt:
+            pendientes.setdefault(w["text"], []).append(w)
+        ok = 0
+        for w in ref:
+            candidatos = pendientes.get(w["text"], [])
+            for j, c in enumerate(candidatos):
+                if abs(c["x0"] - w["x0"]) <= tol and abs(c["top"] - w["top"]) <= tol:
+                    del candidatos[j]
+                    ok += 1
+                    break
+        iguales += ok
+        faltan  += len(ref) - ok
+        sobran  += len(alt) - ok
+        if ok != len(ref) or ok != len(alt):
+            paginas_distintas.append(n)
+
+    total = iguales + faltan
+    return {
+        "pdf": str(pdf_path),
+        "paginas": len(palabras["pdfplumber"]),
+        "palabras": total,
+        "iguales": iguales,
+        "faltan": faltan,
+        "sobran": sobran,
+        "coincidencia": (iguales / total) if total else 1.0,
+        "paginas_distintas": paginas_distintas,
+        "segundos": tiempos,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Compara pdfplumber vs pdfium sobre un corpus de PDFs")
+    ap.add_argument("pdfs", nargs="+", help="PDFs o carpetas con PDFs")
+    ap.add_argument("--tol", type=float, default=1.0, help="tolerancia en puntos para x0/top")
+    ap.add_argument("--min", type=float, default=0.995, help="coincidencia mínima aceptada")
+    args = ap.parse_args(argv)
+
+    archivos = []
+    for p in map(Path, args.pdfs):
+        archivos.extend(sorted(p.glob("*.pdf")) if p.is_dir() else [p])
+
+    fallas = 0
+    for f in archivos:
+        try:
+            r = compare_words(str(f), tol=args.tol, use_text_flow=False)
+        except Exception as e:
+            print(f"❌ {f.name}: {e}")
+            fallas += 1
+            continue
+        seg = r["segundos"]
+        rapidez = seg["pdfplumber"] / seg["pdfium"] if seg["pdfium"] else float("inf")
+        marca = "✅" if r["coincidencia"] >= args.min else "⚠️"
+        if marca != "✅":
+            fallas += 1
+        print(f"{marca} {f.name}: {r['coincidencia']:.2%} de {r['palabras']} palabras "
+              f"(faltan {r['faltan']}, sobran {r['sobran']}) | "
+              f"pdfplumber {seg['pdfplumber']:.2f}s, pdfium {seg['pdfium']:.2f}s (x{rapidez:.1f})")
+        if r["paginas_distintas"]:
+            print(f"   páginas con diferencias: {r['paginas_distintas'][:20]}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -141,7 +141,25 @@ BANK_PROFILES = {
             "CONTINUA EN PAGINA",
             "VIENE DE PAGINA"
         ],
-        "buscar_desde_pagina": 0
+        "buscar_desde_pagina": 0,
+        # Configuración del motor declarativo (parsers/engine.py)
+        "detalle": {
+            "inicio":          "SALDO ANTERIOR",
+            "saldo_anterior":  "balance_x",          # saldo inicial en la columna Saldo
+            "fin":             r"SALDO AL \d{2}/\d{2}/\d{2}",
+            "cuenta_re":       r"Cta\.\s*([\d.]+)",
+            "cuenta_formato":  "Cta. {}",
+            "cuenta_default":  "Credicoop",
+            "cuenta_paginas":  2,
+            "fecha_re":        r"^\d{2}/\d{2}/\d{2}$",
+            "formato_fecha":   "%d/%m/%y",
+            "detener_en_fin":  True,             # después del fin solo hay leyendas legales
+            "paginas_tabla_re": r"\d{2}/\d{2}/\d{2}",   # sonda pdfium: páginas sin fechas se saltean
+            "fila_requiere_importe": False,      # el saldo solo aparece al final del día
+            "continuacion": {
+                "requiere_sin_fecha": False,
+            },
+        }
     },
 # Coordenadas X calibradas con PDF real del Santander (ancho=595)
 #   Débito:  $ en x0≈358-384, importe en x0≈365-391
@@ -172,7 +190,23 @@ BANK_PROFILES = {
             "MOVIMIENTOS EN PESOS",
             "CUENTA CORRIENTE N"
         ],
-        "buscar_desde_pagina": 1
+        "buscar_desde_pagina": 1,
+        "detalle": {
+            "inicio":          "SALDO INICIAL",
+            "inicio_es_fila":  True,             # "29/11/25 Saldo Inicial $ 273.458,68" es la primera fila
+            "fin":             r"SALDO TOTAL",
+            "cuenta_re":       r"Cuenta\s+Corriente\s+N[°º]\s*([\d\-/]+)",
+            "cuenta_formato":  "CC Nº {}",
+            "cuenta_default":  "Santander",
+            "cuenta_paginas":  3,
+            "fecha_re":        r"^\d{2}/\d{2}/\d{2}$",
+            "formato_fecha":   "%d/%m/%y",
+            "paginas_tabla_re": r"\d{2}/\d{2}/\d{2}",   # sonda pdfium: páginas sin fechas se saltean
+            "simbolo_moneda":  True,             # saltar '$' y '-$' (este último niega el saldo)
+            "continuacion": {
+                "submovimiento_hereda_fecha": True,   # impuestos/SIRCREB sin fecha propia
+            },
+        }
     },
     
 "NACION": {
@@ -209,7 +243,22 @@ BANK_PROFILES = {
             "COMPROBANTE",        # encabezado de la tabla de depósitos de terceros
             "FIN DE RESUMEN"
         ],
-        "buscar_desde_pagina": 0
+        "buscar_desde_pagina": 0,
+        "detalle": {
+            "inicio":          "SALDO ANTERIOR",
+            "saldo_anterior":  "balance_x_o_ultimo",  # columna Saldo o último número de la línea
+            "fin":             r"SALDO FINAL",
+            "cuenta_re":       r"(?:NRO\.?\s*CUENTA[^\d]*)(\d{7,})",
+            "cuenta_formato":  "Cta. {}",
+            "cuenta_default":  "Nacion",
+            "cuenta_paginas":  2,
+            "fecha_re":        r"^\d{2}/\d{2}/\d{2}$",
+            "formato_fecha":   "%d/%m/%y",
+            "detener_en_fin":  True,             # después del fin solo hay leyendas legales
+            "paginas_tabla_re": r"\d{2}/\d{2}/\d{2}",   # sonda pdfium: páginas sin fechas se saltean
+            "columnas_extra":  {"Comprobante": "ref_x"},
+            "transporte_max_palabras": 3,         # "TRANSPORTE <saldo>" al cambio de página
+        }
     },
 
     "COINAG": {
@@ -0,0 +1,291 @@
+# parsers/calibrar.py
+#
+# Calibración automática del bloque "layout" de bank_profiles.py a partir de
+# extractos de ejemplo (reemplaza las tardes de DEBUG-XY).
+#
+#   python -m parsers.calibrar --perfil NACION extractos_nacion/*.pdf
+#   python -m parsers.calibrar --perfil NACION extractos/ --banco Nacion --solo-si-inconsistencias 0.05
+#
+# Cómo funciona:
+#   1. Arma un WordTable con todas las páginas y lo agrupa en líneas.
+#   2. Se queda con las líneas de movimiento: las que empiezan con una fecha.
+#   3. Los importes de esas líneas (textos tipo '1.234,56' / '1.234,56-') se
+#      agrupan por x1 (las columnas de importes están alineadas a la derecha,
+#      como usa el parser de Coinag): se ordena x1 y se corta donde hay un
+#      hueco de más de --hueco puntos.
+#   4. Cada grupo se asigna a una columna del perfil actual (debit_x,
+#      credit_x, balance_x, por_acreditar_x) por solapamiento; sin perfil,
+#      por posición (el de más a la derecha es el saldo).
+#   5. Los bordes entre columnas se ponen a mitad de camino entre el x1 de
+#      una y el x0 de la siguiente. Las columnas de texto del perfil (desc_x,
+#      ref_x...) se recortan/estiran para no pisar los importes.
+#
+# La confianza de cada columna combina qué tan alineados están sus importes
+# (fracción con x1 a ±2 pt de la mediana) y cuántos hay (satura en 30).
+#
+# Con --solo-si-inconsistencias U primero corre el parser del banco sobre los
+# ejemplos y solo calibra si la fracción de filas con |Diferencia| > 0,01
+# supera U (para correrlo automáticamente cuando las inconsistencias suben).
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .bank_profiles import BANK_PROFILES
+from .utils import open_pdf, WordTable
+
+# Fechas al inicio de la línea: '01/07', '1/7/24', '01-07-2024', '01-JUL',
+# '01.07.2024'. Con punto se exige el año: '12.50' es un importe, no una fecha
+_DIA = r"(?:0?[1-9]|[12]\d|3[01])"
+_MES = r"(?:0?[1-9]|1[0-2]|ENE|FEB|MAR|ABR|MAY|JUN|JUL|AGO|SE[PT]|OCT|NOV|DIC|JAN|APR|AUG|DEC)"
+FECHA_RE   = re.compile(
+    rf"^{_DIA}(?:([/-]){_MES}(?:\1\d{{2,4}})?|\.{_MES}\.\d{{2,4}})$",
+    re.IGNORECASE,
+)
+IMPORTE_RE = re.compile(r"^[-−]?\$?[-−]?\(?(?:[\d.]*\d,\d{2}|[\d,]*\d\.\d{2})\)?[-−]?$")
+
+# Columnas de importes posibles, de izquierda a derecha
+IMPORTE_KEYS = ("por_acreditar_x", "debit_x", "credit_x", "balance_x")
+
+HUECO   = 10.0     # pt entre x1 de importes para separar columnas
+MARGEN  = 4.0      # pt de holgura en los bordes externos
+ALINEADO = 2.0     # pt alrededor de la mediana de x1 que cuentan como alineados
+
+
+def _palabras(pdf_paths, backend: str = None) -> WordTable:
+    """WordTable de todos los PDFs (cada página con un índice único)."""
+    def todas():
+        base = 0
+        for path in pdf_paths:
+            with open_pdf(str(path), backend=backend) as pdf:
+                n = len(pdf.pages)
+                for idx, page in enumerate(pdf.pages):
+                    words = page.extract_words(use_text_flow=False)
+                    page.close()
+                    yield base + idx, words
+            base += n
+    return WordTable.from_words(todas()).build_lines(y_step=2.0)
+
+
+def _lineas_de_movimiento(wt: WordTable):
+    """Máscaras por palabra: (es fecha, es importe, está en una línea que empieza con fecha)."""
+    coincide = np.frompyfunc(lambda rx, t: bool(rx.match(t)), 2, 1)
+    es_fecha   = coincide(FECHA_RE, wt.text).astype(bool)
+    es_importe = coincide(IMPORTE_RE, wt.text).astype(bool) & ~es_fecha
+    inicios = np.asarray([a for a, _ in wt.lines()], dtype=np.int64)
+    linea_mov = es_fecha[inicios][wt.line] if len(inicios) else np.zeros(0, dtype=bool)
+    return es_fecha, es_importe, linea_mov
+
+
+def agrupar_columnas(x0: np.ndarray, x1: np.ndarray, hueco: float = HUECO, minimo: int = 3) -> list[dict]:
+    """
+    Agrupa importes por x1 (1-D, cortes en huecos > `hueco`). Devuelve un
+    dict por grupo con percentiles de x0/x1, soporte y alineación, de
+    izquierda a derecha. Los grupos con menos de `minimo` palabras o menos
+    del 2% del total se descartan.
+    """
+    if len(x1) == 0:
+        return []
+    orden = np.argsort(x1, kind="stable")
+    x0, x1 = x0[orden], x1[orden]
+    cortes = np.flatnonzero(np.diff(x1) > hueco) + 1
+    grupos = []
+    for g0, g1 in zip(np.split(x0, cortes), np.split(x1, cortes)):
+        if len(g1) < max(minimo, 0.02 * len(x1)):
+            continue
+        mediana = float(np.median(g1))
+        grupos.append({
+            "x0_min": float(np.percentile(g0, 1)),
+            "x0_max": float(np.percentile(g0, 99)),
+            "x1_med": mediana,
+            "x1_max": float(np.percentile(g1, 99)),
+            "n": int(len(g1)),
+            "alineado": float(np.mean(np.abs(g1 - mediana) <= ALINEADO)),
+        })
+    return grupos
+
+
+def _solapamiento(rango, grupo) -> float:
+    lo, hi = rango
+    return max(0.0, min(hi, grupo["x1_max"]) - max(lo, grupo["x0_min"]))
+
+
+def _etiquetar(grupos: list[dict], layout: dict) -> dict:
+    """{clave de importe: grupo}, por solapamiento con el perfil actual o por posición."""
+    claves = [k for k in IMPORTE_KEYS if k in layout]
+    if not claves:
+        claves = list(IMPORTE_KEYS[-len(grupos):]) if grupos else []
+        return dict(zip(claves, grupos))
+    asignados, usados = {}, set()
+    for k in sorted(claves, key=lambda k: layout[k][0]):
+        candidatos = [(i, _solapamiento(layout[k], g)) for i, g in enumerate(grupos) if i not in usados]
+        candidatos = [c for c in candidatos if c[1] > 0]
+        if candidatos:
+            i = max(candidatos, key=lambda c: c[1])[0]
+            usados.add(i)
+            asignados[k] = grupos[i]
+    return asignados
+
+
+def calibrar(pdf_paths, perfil: str = None, hueco: float = HUECO, backend: str = None) -> dict:
+    """
+    Propone un bloque layout para los PDFs de ejemplo. Devuelve
+    {"layout": {...}, "confianza": {...}, "antes": {...}, "lineas": n}.
+    ValueError si ninguna línea empieza con una fecha.
+    """
+    actual = dict(BANK_PROFILES.get(perfil, {}).get("layout", {})) if perfil else {}
+    wt = _palabras(pdf_paths, backend)
+    es_fecha, es_importe, linea_mov = _lineas_de_movimiento(wt)
+    n_lineas = int(np.unique(wt.line[linea_mov]).size) if len(wt) else 0
+    if not n_lineas:
+        # Sin fechas no hay líneas de movimiento: mejor avisar que proponer el perfil sin cambios
+        raise ValueError(
+            "No se encontró una columna de fechas: ninguna línea empieza con una fecha "
+            "(dd/mm, dd-mm, dd-MMM o dd.mm.aaaa)"
+        )
+
+    nuevo, confianza = dict(actual), {}
+
+    # Fecha: columna alineada a la izquierda (x0)
+    fx0 = wt.x0[es_fecha & linea_mov]
+    fx1 = wt.x1[es_fecha & linea_mov]
+    if len(fx0):
+        med = float(np.median(fx0))
+        nuevo["date_x"] = (max(0.0, float(np.percentile(fx0, 1)) - MARGEN), float(np.percentile(fx1, 99)) + MARGEN)
+        confianza["date_x"] = round(float(np.mean(np.abs(fx0 - med) <= ALINEADO)) * min(1.0, len(fx0) / 30), 2)
+
+    # Importes: columnas alineadas a la derecha (x1)
+    m = es_importe & linea_mov
+    grupos = agrupar_columnas(wt.x0[m], wt.x1[m], hueco)
+    columnas = _etiquetar(grupos, actual)
+    orden = sorted(columnas.items(), key=lambda kv: kv[1]["x1_med"])
+    for i, (k, g) in enumerate(orden):
+        if i == 0:
+            lo = g["x0_min"] - MARGEN
+        else:
+            prev = orden[i - 1][1]
+            # Mitad de camino entre el fin de la anterior y el comienzo de esta
+            lo = (prev["x1_max"] + g["x0_min"]) / 2 if prev["x1_max"] < g["x0_min"] else (prev["x0_max"] + g["x0_min"]) / 2
+            nuevo[orden[i - 1][0]] = (nuevo[orden[i - 1][0]][0], lo)
+        hi = g["x1_max"] + MARGEN
+        if i == len(orden) - 1 and k in actual:
+            # La última columna nunca se achica a la derecha: importes más largos
+            hi = max(hi, actual[k][1])
+        nuevo[k] = (lo, hi)
+        confianza[k] = round(g["alineado"] * min(1.0, g["n"] / 30), 2)
+
+    # Columnas de texto: no pisar los importes; la última se estira hasta ellos
+    if orden:
+        primer_importe = nuevo[orden[0][0]][0]
+        fecha_hi = nuevo.get("date_x", (0, 0))[1]
+        textos = sorted(
+            (k for k in nuevo if k not in IMPORTE_KEYS and k != "date_x"),
+            key=lambda k: nuevo[k][0],
+        )
+        textos = [k for k in textos if nuevo[k][0] < primer_importe]
+        for j, k in enumerate(textos):
+            lo, hi = nuevo[k]
+            if j == 0 and "date_x" in nuevo:
+                lo = fecha_hi       # pegada a la fecha, sin huecos
+            if j == len(textos) - 1:
+                hi = primer_importe
+            nuevo[k] = (lo, min(hi, primer_importe))
+
+    redondeado = {k: (round(v[0]), round(v[1])) for k, v in nuevo.items()}
+    return {"layout": redondeado, "confianza": confianza, "antes": actual, "lineas": n_lineas}
+
+
+def fraccion_inconsistente(banco: str, pdf_paths) -> float:
+    """Fracción de filas con |Diferencia| > 0,01 al parsear los ejemplos con el parser del banco."""
+    from . import get_parser
+    parser = get_parser(banco)
+    total = malas = 0
+    for path in pdf_paths:
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = parser.parse(str(path))
+        frames = resultado.values() if isinstance(resultado, dict) else [resultado]
+        for df in frames:
+            if df is None or "Diferencia" not in df.columns:
+                continue
+            total += len(df)
+            malas += int((pd.to_numeric(df["Diferencia"], errors="coerce").abs() > 0.01).sum())
+    return malas / total if total else 1.0
+
+
+def formatear(resultado: dict) -> str:
+    """Bloque listo para pegar en bank_profiles.py, con confianza y valores anteriores."""
+    lineas = ['"layout": {']
+    items = sorted(resultado["layout"].items(), key=lambda kv: kv[1][0])
+    for k, (lo, hi) in items:
+        notas = []
+        if k in resultado["confianza"]:
+            notas.append(f"confianza {resultado['confianza'][k]:.2f}")
+        antes = resultado["antes"].get(k)
+        if antes is None:
+            notas.append("nueva")
+        elif tuple(antes) != (lo, hi):
+            notas.append(f"antes {tuple(antes)}")
+        clave = f'"{k}":'
+        valor = f"({lo}, {hi}),"
+        lineas.append(f"    {clave:<19}{valor:<13}# " + ", ".join(notas) if notas else f"    {clave:<19}{valor}")
+    lineas.append("},")
+    return "\n".join(lineas)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Propone el bloque layout de un perfil a partir de extractos de ejemplo")
+    ap.add_argument("pdfs", nargs="+", help="PDFs o carpetas con PDFs")
+    ap.add_argument("--perfil", help="clave en BANK_PROFILES (ej. NACION) para comparar y nombrar columnas")
+    ap.add_argument("--hueco", type=float, default=HUECO, help="pt mínimos entre columnas de importes")
+    ap.add_argument("--backend", help="backend de extracción (pdfplumber / pdfium)")
+    ap.add_argument("--banco", help="parser a usar con --solo-si-inconsistencias (ej. Nacion)")
+    ap.add_argument("--solo-si-inconsistencias", type=float, metavar="U",
+                    help="calibrar solo si la fracción de filas inconsistentes supera U")
+    ap.add_argument("--json", action="store_true", help="salida JSON en vez del bloque para pegar")
+    args = ap.parse_args(argv)
+
+    archivos = []
+    for p in map(Path, args.pdfs):
+        archivos.extend(sorted(p.glob("*.pdf")) if p.is_dir() else [p])
+    if not archivos:
+        print("❌ No se encontraron PDFs.")
+        return 2
+    if args.perfil and args.perfil not in BANK_PROFILES:
+        print(f"❌ Perfil '{args.perfil}' no existe. Opciones: {list(BANK_PROFILES)}")
+        return 2
+
+    if args.solo_si_inconsistencias is not None:
+        if not args.banco:
+            print("❌ --solo-si-inconsistencias necesita --banco")
+            return 2
+        frac = fraccion_inconsistente(args.banco, archivos)
+        if frac <= args.solo_si_inconsistencias:
+            print(f"✅ {frac:.1%} de filas inconsistentes: no hace falta recalibrar")
+            return 0
+        print(f"⚠️ {frac:.1%} de filas inconsistentes: recalibrando")
+
+    try:
+        resultado = calibrar(archivos, args.perfil, args.hueco, args.backend)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    else:
+        print(f"📐 {len(archivos)} PDFs, {resultado['lineas']} líneas de movimiento")
+        print(formatear(resultado))
+    bajas = [k for k, c in resultado["confianza"].items() if c < 0.8]
+    if bajas:
+        print(f"⚠️ Confianza baja en: {', '.join(bajas)} (revisar a mano)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+# parsers/consolidacion.py
+#
+# Consolidación de varios extractos de la misma cuenta en un único libro.
+#
+# Entrada: los resultados de `parse()` de cada PDF (dict cuenta → DataFrame o
+# un DataFrame suelto), con el nombre del archivo de origen. Salida: un
+# DataFrame por cuenta con todos los movimientos en orden, más un reporte de
+# continuidad entre extractos.
+#
+#   ledgers, continuidad = consolidar([("2025-01.pdf", r1), ("2025-02.pdf", r2), ...])
+#
+# Cómo se arma cada cuenta:
+#   1. Se agrupa por etiqueta de cuenta ("Cta. …", "CC $ …", "PESOS – …").
+#   2. Los extractos se ordenan por período (primera y última fecha).
+#   3. Movimientos repetidos en extractos que se superponen se descartan con
+#      un índice de hashes (Fecha, Descripción, Débito, Crédito, Saldo): cada
+#      extracto se compara contra lo ya consolidado en O(filas), sin joins.
+#   4. Se controla que el saldo de apertura de cada extracto sea el de cierre
+#      del anterior (OK / ROTA; DUPLICADO si no aporta ninguna fila nueva).
+#   5. El "Saldo Calculado" se rehace de punta a punta sobre el libro entero.
+#
+# El sentido del saldo (sube con créditos o con débitos) se deduce del
+# "Saldo Calculado" que ya trae cada extracto, así no depende del banco.
+
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.util import hash_array
+
+CLAVE_DUPLICADOS = ("Fecha", "Descripción", "Débito", "Crédito", "Saldo")
+TOLERANCIA = 0.01
+
+
+def _normalizar_cuenta(label: str) -> str:
+    return re.sub(r"\s+", " ", str(label)).strip()
+
+
+def _hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash uint64 por fila sobre las columnas de CLAVE_DUPLICADOS presentes."""
+    h = np.zeros(len(df), dtype=np.uint64)
+    for c in CLAVE_DUPLICADOS:
+        if c not in df.columns:
+            continue
+        if c in ("Débito", "Crédito", "Saldo"):
+            # + 0.0 unifica -0.0 con 0.0
+            valores = np.round(df[c].to_numpy(dtype=float), 2) + 0.0
+        else:
+            valores = df[c].astype(str).to_numpy(dtype=object)
+        h = h * np.uint64(1000003) ^ hash_array(valores)
+    return h
+
+
+class _Extracto:
+    """Un DataFrame de una cuenta en un PDF, con lo que hace falta para encadenarlo."""
+
+    __slots__ = ("archivo", "orden", "df", "desde", "hasta", "inicio", "sentido")
+
+    def __init__(self, archivo: str, orden: int, df: pd.DataFrame):
+        self.archivo = archivo
+        self.orden   = orden
+        self.df      = df.reset_index(drop=True)
+        fechas       = pd.to_datetime(self.df["Fecha"], errors="coerce", dayfirst=True)
+        self.desde   = fechas.min()
+        self.hasta   = fechas.max()
+
+        calc = self.df["Saldo Calculado"].astype(float)
+        validos = np.flatnonzero(calc.notna().to_numpy())
+        self.inicio = int(validos[0]) if len(validos) else None
+
+        # +1 si el saldo sube con créditos, -1 si sube con débitos
+        neto  = (self.df["Crédito"].astype(float) - self.df["Débito"].astype(float)).to_numpy()
+        delta = calc.diff().to_numpy()
+        m = ~np.isnan(delta)
+        self.sentido = -1.0 if np.dot(delta[m], neto[m]) < 0 else 1.0
+
+    def neto(self) -> np.ndarray:
+        """Variación de saldo de cada fila según el sentido del extracto."""
+        return self.sentido * (self.df["Crédito"].astype(float) - self.df["Débito"].astype(float)).to_numpy()
+
+    def apertura(self, mantener: np.ndarray):
+        """
+        Saldo antes del primer movimiento que se agrega al libro (los
+        duplicados de un extracto superpuesto ya están antes del corte).
+        None si el extracto no tiene saldo o no aporta filas.
+        """
+        if self.inicio is None:
+            return None
+        filas = np.flatnonzero(mantener[self.inicio:])
+        if len(filas) == 0:
+            return None
+        i = self.inicio + int(filas[0])
+        base = float(self.df.at[i, "Saldo Calculado"])
+        return round(base - self.neto()[i], 2)
+
+    def es_fila_saldo(self, i: int) -> bool:
+        """Fila de arrastre ("SALDO ANTERIOR"): sin débito ni crédito."""
+        fila = self.df.loc[i]
+        return float(fila["Débito"] or 0) == 0 and float(fila["Crédito"] or 0) == 0
+
+
+def _agrupar(resultados) -> dict[str, list[_Extracto]]:
+    cuentas: dict[str, list[_Extracto]] = {}
+    for orden, (archivo, resultado) in enumerate(resultados):
+        if isinstance(resultado, pd.DataFrame):
+            resultado = {"Cuenta": resultado}
+        for label, df in (resultado or {}).items():
+            if df is None or df.empty or "Saldo Calculado" not in df.columns:
+                continue
+            cuentas.setdefault(_normalizar_cuenta(label), []).append(_Extracto(archivo, orden, df))
+    for extractos in cuentas.values():
+        # Por período (desde, hasta); sin fechas va al final, en el orden de entrada
+        extractos.sort(key=lambda e: (pd.isna(e.desde),
+                                      (e.desde, e.hasta) if not pd.isna(e.desde) else (),
+                                      e.orden))
+    return cuentas
+
+
+def _consolidar_cuenta(cuenta: str, extractos: list[_Extracto]):
+    indice: dict[int, int] = {}     # hash → veces que ya está en el libro
+    partes, netos, reporte = [], [], []
+    apertura_libro = cierre = None
+    anterior = None
+
+    for e in extractos:
+        hashes = _hashes(e.df)
+        # Ocurrencia de cada hash dentro del extracto (0, 1, 2...): una fila es
+        # duplicada si el libro ya tiene al menos esa cantidad de iguales.
+        ocurrencia = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+        previas = np.fromiter((indice.get(h, 0) for h in hashes.tolist()), dtype=np.int64, count=len(hashes))
+        mantener = ocurrencia >= previas
+
+        # La fila de saldo anterior de los extractos siguientes ya está
+        # representada por el cierre del previo
+        if anterior is not None and e.inicio is not None and e.es_fila_saldo(e.inicio):
+            mantener[e.inicio] = False
+
+        apertura = e.apertura(mantener)
+        if anterior is None:
+            apertura_libro = apertura
+        else:
+            diferencia = None if apertura is None or cierre is None else round(apertura - cierre, 2)
+            if not mantener.any():
+                estado = "DUPLICADO"    # el extracto ya estaba entero en el libro
+            elif diferencia is not None and abs(diferencia) < TOLERANCIA:
+                estado = "OK"
+            else:
+                estado = "ROTA"
+            reporte.append({
+                "Cuenta": cuenta,
+                "Archivo anterior": anterior.archivo,
+                "Archivo": e.archivo,
+                "Saldo cierre anterior": cierre,
+                "Saldo apertura": apertura,
+                "Diferencia": diferencia,
+                "Duplicados omitidos": int((ocurrencia < previas).sum()),
+                "Continuidad": estado,
+            })
+
+        # Copias en el libro = las que ya estaban + las que agrega este extracto
+        for h, n in zip(*np.unique(hashes[mantener], return_counts=True)):
+            h = int(h)
+            indice[h] = indice.get(h, 0) + int(n)
+
+        parte = e.df.loc[mantener].copy()
+        parte.insert(0, "Archivo", e.archivo)
+        partes.append(parte)
+        netos.append(e.neto()[mantener])
+
+        # Cierre según el propio extracto, para comparar con el próximo
+        calc = e.df["Saldo Calculado"].astype(float).dropna()
+        if not calc.empty:
+            cierre = round(float(calc.iloc[-1]), 2)
+        anterior = e
+
+    libro = pd.concat(partes, ignore_index=True)
+    if apertura_libro is not None:
+        libro["Saldo Calculado"] = (apertura_libro + np.cumsum(np.concatenate(netos))).round(2)
+        libro["Diferencia"] = (libro["Saldo"].astype(float) - libro["Saldo Calculado"]).round(2)
+    return libro, reporte
+
+
+def consolidar(resultados) -> tuple[dict[str, pd.DataFrame], pd.DataFrame]:
+    """
+    Consolida resultados de `parse()` de varios PDFs.
+
+    `resultados`: iterable de (nombre_archivo, resultado).
+    Devuelve ({cuenta: libro}, reporte de continuidad entre extractos).
+    """
+    libros, reporte = {}, []
+    for cuenta, extractos in _agrupar(resultados).items():
+        libro, filas = _consolidar_cuenta(cuenta, extractos)
+        libros[cuenta] = libro
+        reporte.extend(filas)
+        rotas = sum(f["Continuidad"] == "ROTA" for f in filas)
+        marca = "✅" if not rotas else "⚠️"
+        print(f"{marca} {cuenta}: {len(extractos)} extractos, {len(libro)} movimientos, "
+              f"{rotas} cortes de continuidad")
+    return libros, pd.DataFrame(reporte, columns=[
+        "Cuenta", "Archivo anterior", "Archivo", "Saldo cierre anterior",
+        "Saldo apertura", "Diferencia", "Duplicados omitidos", "Continuidad",
+    ])
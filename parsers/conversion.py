@@ -0,0 +1,175 @@
+# parsers/conversion.py
+#
+# Conversión de importes y fechas de los extractos argentinos.
+#
+# Reemplaza los `convert_amount` / `_conv` / `_parse_amount` que cada parser
+# tenía copiados. La idea es juntar los textos crudos de una columna y
+# convertirlos de una sola vez con operaciones vectorizadas de pandas, en vez
+# de llamar a Python (replace + try/except) por cada celda.
+#
+# Formatos soportados:
+#   '1.234,56'   →  1234.56        '1234,56-'  →  -1234.56  (menos al final)
+#   '-1.234,56'  → -1234.56        '−1.234,56' →  -1234.56  (menos Unicode)
+#   '$ 1.234,56' →  1234.56        '(1.234,56)'→  -1234.56
+#   Con decimal='.' : '513,252.68-' → -513252.68
+#   Con decimal='.,': '1234,56' o '1234.56' → 1234.56 (sin separador de miles)
+#
+# Solo se aceptan importes bien formados: los separadores de miles tienen que
+# estar cada tres dígitos y el signo solo puede ir adelante, atrás o como
+# paréntesis. Cualquier otro texto ('01/07/2024', '0713-25104-7', '01-JUL',
+# 'AL6,00P/MIL') toma `default`.
+
+import re
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# Guiones que los PDFs usan como signo menos
+_MINUS_RE = re.compile(r"[−–—‒]")
+# Cuerpo del número según el separador decimal: miles cada tres dígitos o nada
+_CUERPOS = {
+    ",":  r"\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:,\d+)?",
+    ".":  r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?",
+    ".,": r"\d+(?:[.,]\d+)?",
+}
+_IMPORTE_RE = {
+    decimal: re.compile(
+        r"^(?P<signo>-)?\s*(?P<abre>\()?\s*\$?\s*(?P<signo2>-)?\s*"
+        rf"(?P<num>{cuerpo})"
+        r"\s*(?P<signo3>-)?\s*(?P<cierra>\))?$"
+    )
+    for decimal, cuerpo in _CUERPOS.items()
+}
+_FULL_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})\b")
+# Encabezado de período: "Período: del 01/07/2024 al 31/07/2024"
+_PERIODO_RE = re.compile(
+    r"PER[IÍ]ODO\b\D{0,20}\d{1,2}/\d{1,2}/(?:\d{4}|\d{2})\s+AL\s+"
+    r"(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})\b",
+    re.IGNORECASE,
+)
+
+
+def _normalizar(num: str, decimal: str) -> str:
+    """Cuerpo ya validado → texto que entiende float()."""
+    if decimal == ",":
+        return num.replace(".", "").replace(",", ".")
+    if decimal == ".":
+        return num.replace(",", "")
+    return num.replace(",", ".")
+
+
+def convert_amount(txt, decimal: str = ",", default: float = 0.0) -> float:
+    """Versión escalar de `convert_amounts` para valores sueltos."""
+    if txt is None:
+        return default
+    if isinstance(txt, (int, float)):
+        return float(txt)
+    m = _IMPORTE_RE[decimal].match(_MINUS_RE.sub("-", str(txt).strip()))
+    if m is None or (m["abre"] is None) != (m["cierra"] is None):
+        return default
+    v = float(_normalizar(m["num"], decimal))
+    neg = m["signo"] or m["signo2"] or m["signo3"] or m["abre"]
+    return -v if neg else v
+
+
+def convert_amounts(values, decimal: str = ",", default: float = 0.0) -> pd.Series:
+    """
+    Convierte una columna completa de importes a float64.
+
+    Los valores que ya son numéricos se respetan, None queda como NaN y los
+    textos vacíos o que no son un importe bien formado toman `default`.
+    """
+    s = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values
+    # Un lote puede no traer ningún texto (saldos ya convertidos, celdas
+    # vacías): ahí no hay accesor .str y alcanza con to_numeric
+    if s.empty or not (
+        (s.dtype == object or pd.api.types.is_string_dtype(s.dtype))
+        and pd.api.types.infer_dtype(s, skipna=True) in ("string", "mixed")
+    ):
+        return pd.to_numeric(s, errors="coerce").astype(float)
+
+    es_texto = s.str.len().notna()
+    numeros  = pd.to_numeric(s.where(~es_texto), errors="coerce").astype(float)
+
+    t = s[es_texto].str.strip().str.replace(_MINUS_RE, "-", regex=True)
+    partes = t.str.extract(_IMPORTE_RE[decimal])
+    valido = partes["num"].notna() & (partes["abre"].isna() == partes["cierra"].isna())
+
+    num = partes["num"].where(valido)
+    if decimal == ",":
+        num = num.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    elif decimal == ".":
+        num = num.str.replace(",", "", regex=False)
+    else:
+        num = num.str.replace(",", ".", regex=False)
+    v = pd.to_numeric(num, errors="coerce")
+
+    neg = partes[["signo", "signo2", "signo3", "abre"]].notna().any(axis=1)
+    v = v.where(~neg, -v).where(valido, default)
+    return numeros.where(~es_texto, v).astype(float)
+
+
+def _fecha(d: str, m: str, y: str) -> date | None:
+    try:
+        return date(int(y) + (2000 if len(y) == 2 else 0), int(m), int(d))
+    except ValueError:
+        return None
+
+
+def fecha_cierre_periodo(textos) -> date | None:
+    """
+    Fecha de cierre del primer encabezado "Período ... al dd/mm/aaaa" de
+    `textos`, o None si el resumen no lo trae.
+    """
+    for txt in textos:
+        for d, m, y in _PERIODO_RE.findall(txt or ""):
+            f = _fecha(d, m, y)
+            if f is not None:
+                return f
+    return None
+
+
+def fecha_referencia(textos) -> date | None:
+    """
+    Cierre del período para completar fechas sin año: el del encabezado
+    "Período ... al ..." si existe; si no, la última fecha completa
+    (dd/mm/aaaa o dd/mm/aa) que aparece en `textos`.
+    """
+    textos = list(textos)
+    cierre = fecha_cierre_periodo(textos)
+    if cierre is not None:
+        return cierre
+    mejor = None
+    for txt in textos:
+        for d, m, y in _FULL_DATE_RE.findall(txt or ""):
+            f = _fecha(d, m, y)
+            if f is not None and (mejor is None or f > mejor):
+                mejor = f
+    return mejor
+
+
+def convert_dates(values, formato: str = "%d/%m/%y", referencia: date | None = None) -> pd.Series:
+    """
+    Convierte una columna de fechas con `formato` a `datetime.date`.
+
+    Si el formato no trae año (p. ej. BBVA '%d/%m') el año se infiere de
+    `referencia` (cierre del período, por defecto hoy): cada fecha toma el
+    año de la referencia, o el anterior si quedaría posterior a ella
+    (resúmenes que cruzan diciembre → enero). Los textos inválidos quedan NaT.
+    """
+    s = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values
+    if "%y" in formato or "%Y" in formato:
+        return pd.to_datetime(s, format=formato, errors="coerce").dt.date
+
+    ref = referencia or datetime.now().date()
+    # 2000 es bisiesto: así el 29/02 no se pierde antes de conocer el año real
+    base = pd.to_datetime(s.astype(str) + "/2000", format=formato + "/%Y", errors="coerce")
+    mes, dia = base.dt.month, base.dt.day
+    posterior = (mes > ref.month) | ((mes == ref.month) & (dia > ref.day))
+    anio = np.where(posterior, ref.year - 1, ref.year)
+    fechas = pd.to_datetime(
+        pd.DataFrame({"year": anio, "month": mes, "day": dia}, index=s.index),
+        errors="coerce",
+    )
+    return fechas.dt.date
@@ -0,0 +1,45 @@
+# parsers/deteccion.py
+#
+# Detección del banco de un extracto por el texto de sus primeras páginas
+# (capa de texto vía pdfium, sin pdfminer).
+#
+#   banco = detectar_banco("extracto.pdf")     # "Nacion", o None si es dudoso
+#
+# Devuelve la clave de get_parser solo si exactamente un banco coincide. Los
+# bancos con más de un parser (Macro / Macro-ctacte) no se pueden distinguir
+# por el nombre: para esos, usar una subcarpeta por banco o --banco.
+
+import re
+
+from . import _parsers
+from .utils import PdfProbe
+
+PAGINAS = 2
+
+# clave de get_parser → firma en el texto (en mayúsculas)
+FIRMAS = {
+    "Nacion":            r"BANCO DE LA NACI[OÓ]N ARGENTINA",
+    "Credicoop":         r"BANCO CREDICOOP",
+    "Santander":         r"BANCO SANTANDER",
+    "Galicia":           r"BANCO DE GALICIA|GALICIA Y BUENOS AIRES",
+    "Macro":             r"BANCO MACRO",
+    "BBVA":              r"\bBBVA\b|BANCO FRANC[EÉ]S",
+    "Coinag":            r"COINAG",
+    "Municipal Rosario": r"MUNICIPAL DE ROSARIO",
+    "Santa Fe":          r"BANCO DE SANTA FE",
+}
+_FIRMAS_RE = {banco: re.compile(firma) for banco, firma in FIRMAS.items()}
+
+
+def candidatos(texto: str) -> list[str]:
+    """Bancos (con parser cargado) cuya firma aparece en `texto`."""
+    texto = texto.upper()
+    return [b for b, rx in _FIRMAS_RE.items() if b in _parsers and rx.search(texto)]
+
+
+def detectar_banco(pdf_path: str, password: str = None) -> str | None:
+    """Clave del banco del extracto, o None si ninguno o más de uno coincide."""
+    with PdfProbe(pdf_path, password=password) as probe:
+        texto = " ".join(probe.text(i) for i in range(min(PAGINAS, len(probe))))
+    bancos = candidatos(texto)
+    return bancos[0] if len(bancos) == 1 else None
@@ -0,0 +1,431 @@
+# parsers/engine.py
+#
+# Motor declarativo para extractos "de una tabla": una sola cuenta por PDF,
+# el detalle empieza en un marcador ("SALDO ANTERIOR", "SALDO INICIAL"),
+# las columnas se asignan por coordenada X, las líneas sin fecha continúan
+# la descripción y el detalle termina en un marcador de fin.
+#
+# Todo lo específico de cada banco vive en el bloque "detalle" de su perfil
+# en bank_profiles.py:
+#
+#   "detalle": {
+#       "inicio":          "SALDO ANTERIOR",        # texto que abre el detalle
+#       "inicio_es_fila":  False,                   # True: la línea de inicio es un movimiento
+#       "saldo_anterior":  "balance_x",             # o "balance_x_o_ultimo" / None
+#       "fin":             r"SALDO FINAL",          # regex que cierra el detalle
+#       "cuenta_re":       r"Cta\.\s*([\d.]+)",     # número de cuenta (grupo 1)
+#       "cuenta_formato":  "Cta. {}",
+#       "cuenta_default":  "Credicoop",
+#       "cuenta_paginas":  2,                       # páginas donde buscar la cuenta
+#       "fecha_re":        r"^\d{2}/\d{2}/\d{2}$",
+#       "formato_fecha":   "%d/%m/%y",
+#       "columnas_extra":  {"Comprobante": "ref_x"},
+#       "fila_requiere_importe": True,              # fecha sola no alcanza para abrir fila
+#       "transporte_max_palabras": 3,               # saltar "TRANSPORTE <saldo>"
+#       "simbolo_moneda":  False,                   # saltar tokens '$' / '-$'
+#       "detener_en_fin":  True,                    # no extraer más páginas después del fin
+#       "paginas_tabla_re": r"\d{2}/\d{2}/\d{2}",   # sonda: páginas sin esto se saltean
+#       "continuacion": {
+#           "requiere_sin_fecha": True,             # la continuación no puede traer fecha
+#           "submovimiento_hereda_fecha": False,    # línea sin fecha con importes = fila nueva
+#       },
+#   }
+#
+# Con "paginas_tabla_re" el texto plano de cada página se lee antes con
+# pdfium (utils.PdfProbe) y solo pasan por extract_words() las
+# páginas que muestran el inicio, el fin o alguna fila de la tabla.
+#
+# Cada parser queda reducido a `return parse_statement(pdf_path, "BANCO")`,
+# y `parse_iter` a `return iter_statement(pdf_path, "BANCO", options)`.
+
+import re
+from contextlib import nullcontext
+
+import pandas as pd
+
+from .utils import open_pdf, calcular_saldos, reportar_inconsistencias, WordTable, PdfProbe, SaldoCorriente
+from .bank_profiles import BANK_PROFILES
+from .movimientos import Movimientos
+from .conversion import convert_amount, convert_dates
+from .progreso import cuenta_actual, pagina_procesada
+from .paralelo import PaginasCompartidas, workers_paginas, PAGINAS_MIN
+from .traza import traza_actual
+from . import vista_previa
+
+_BASE_KEYS = ("date_x", "desc_x")
+_IMPORTE_KEYS = ("debit_x", "credit_x", "balance_x")
+
+
+class _Config:
+    """Perfil de un banco ya compilado (regex, columnas) para el loop principal."""
+
+    __slots__ = (
+        "banco", "layout", "keys", "extras", "excluir_re", "inicio", "inicio_es_fila",
+        "saldo_anterior", "fin_re", "cuenta_re", "cuenta_formato", "cuenta_default",
+        "cuenta_paginas", "fecha_re", "formato_fecha", "requiere_importe",
+        "transporte_max", "simbolo_moneda", "cont_sin_fecha", "hereda_fecha",
+        "detener_en_fin", "tabla_re", "es_invertido", "arranca_en_1", "backend",
+    )
+
+    def __init__(self, banco: str, profile: dict):
+        det    = profile["detalle"]
+        flags  = profile.get("flags", {})
+        cont   = det.get("continuacion", {})
+        extras = det.get("columnas_extra", {})
+
+        self.banco   = banco
+        self.layout  = profile["layout"]
+        self.extras  = tuple(extras)
+        self.keys    = _BASE_KEYS + tuple(extras.values()) + _IMPORTE_KEYS
+
+        excluir = profile.get("excluir_si_contiene", [])
+        self.excluir_re = re.compile("|".join(map(re.escape, excluir))) if excluir else None
+
+        self.inicio         = det["inicio"]
+        self.inicio_es_fila = bool(det.get("inicio_es_fila", False))
+        self.saldo_anterior = det.get("saldo_anterior")
+        self.fin_re         = re.compile(det["fin"])
+        self.cuenta_re      = re.compile(det["cuenta_re"], re.IGNORECASE) if det.get("cuenta_re") else None
+        self.cuenta_formato = det.get("cuenta_formato", "{}")
+        self.cuenta_default = det.get("cuenta_default", banco.title())
+        self.cuenta_paginas = int(det.get("cuenta_paginas", 2))
+        self.fecha_re       = re.compile(det["fecha_re"])
+        self.formato_fecha  = det["formato_fecha"]
+        self.requiere_importe = bool(det.get("fila_requiere_importe", True))
+        self.transporte_max = det.get("transporte_max_palabras")
+        self.simbolo_moneda = bool(det.get("simbolo_moneda", False))
+        self.cont_sin_fecha = bool(cont.get("requiere_sin_fecha", True))
+        self.hereda_fecha   = bool(cont.get("submovimiento_hereda_fecha", False))
+        self.detener_en_fin = bool(det.get("detener_en_fin", False))
+        self.tabla_re       = re.compile(det["paginas_tabla_re"]) if det.get("paginas_tabla_re") else None
+
+        self.es_invertido = bool(flags.get("es_layout_invertido", False))
+        self.arranca_en_1 = bool(flags.get("saldo_arranca_en_fila_1", True))
+        self.backend      = profile.get("backend")
+
+    @property
+    def columnas(self) -> tuple:
+        return ("Fecha", "Descripción") + self.extras + ("Débito", "Crédito", "Saldo")
+
+
+def _detectar_cuenta(probe: PdfProbe, cfg: _Config) -> str:
+    """Busca el número de cuenta en el texto plano de las primeras páginas."""
+    if cfg.cuenta_re is not None:
+        numero = probe.search(cfg.cuenta_re, pages=range(cfg.cuenta_paginas))
+        if numero:
+            return cfg.cuenta_formato.format(numero)
+    return cfg.cuenta_default
+
+
+def _saldo_anterior(cfg: _Config, texts, x0s):
+    """Saldo de la línea de inicio según `detalle.saldo_anterior`."""
+    lo, hi = cfg.layout["balance_x"]
+    for txt, x0 in zip(texts, x0s):
+        if lo <= x0 < hi:
+            return convert_amount(txt.strip())
+    if cfg.saldo_anterior == "balance_x_o_ultimo":
+        # Si el saldo no cae en la columna, tomar el último token numérico
+        for txt in reversed(texts):
+            try:
+                return float(txt.strip().replace(".", "").replace(",", "."))
+            except ValueError:
+                continue
+    return None
+
+
+def _etiquetar_paginas(probe: PdfProbe, cfg: _Config):
+    """
+    Etiquetas ("inicio", "fin", "tabla") de cada página según su texto plano,
+    o None si el perfil no pide poda o la sonda no sirve (sin pdfium, o no
+    encuentra el inicio en ninguna página).
+    """
+    if cfg.tabla_re is None or not probe.rapida:
+        return None
+    etiquetas = probe.classify({"inicio": cfg.inicio, "fin": cfg.fin_re, "tabla": cfg.tabla_re})
+    if not any("inicio" in e for e in etiquetas):
+        print('⚠️ La sonda no encontró el inicio del detalle: se procesan todas las páginas')
+        return None
+    return etiquetas
+
+
+_ETIQUETAS_UTILES = frozenset(("inicio", "tabla", "fin"))
+
+
+def _pagina_util(etiquetas: frozenset, en_detalle: bool) -> bool:
+    """True si la página puede aportar algo según sus etiquetas."""
+    if not en_detalle:
+        return "inicio" in etiquetas
+    return "tabla" in etiquetas or "fin" in etiquetas
+
+
+def _trazar(traza, cfg: _Config, tabla: WordTable, col_ids: list, s: int, e: int, decision: str):
+    """Registra la línea [s, e) con la columna de cada palabra (ver traza.py)."""
+    traza.linea(int(tabla.page[s]) + 1, tabla.top[s], tabla.text[s:e], tabla.x0[s:e], tabla.x1[s:e],
+                [cfg.keys[k] if k >= 0 else None for k in col_ids[s:e]], decision)
+
+
+def _procesar_pagina(cfg: _Config, tabla: WordTable, movimientos: Movimientos, en_detalle: bool):
+    """
+    Recorre las líneas de una página y agrega sus movimientos.
+    Devuelve (en_detalle, terminado); `terminado` es True cuando se llegó al
+    fin del detalle y el perfil pide `detener_en_fin`.
+    """
+    # Líneas y columnas se resuelven en bloque sobre los arrays
+    tabla.build_lines()
+    col_ids = tabla.classify(cfg.layout, cfg.keys).tolist()
+    x0s     = tabla.x0.tolist()
+    textos  = tabla.text
+
+    n_extra = len(cfg.extras)
+    i_desc  = 1
+    i_deb, i_cred, i_sal = 2 + n_extra, 3 + n_extra, 4 + n_extra
+    bal_lo, bal_hi = cfg.layout["balance_x"]
+    traza = traza_actual()
+
+    for s, e in tabla.lines():
+        texts = textos[s:e]
+        upper = ' '.join(texts).strip().upper()
+
+        # 1) Detectar inicio
+        if not en_detalle:
+            if cfg.inicio not in upper:
+                if traza is not None:
+                    _trazar(traza, cfg, tabla, col_ids, s, e, "antes_del_inicio")
+                continue
+            en_detalle = True
+            if traza is not None:
+                _trazar(traza, cfg, tabla, col_ids, s, e, "inicio")
+            if not cfg.inicio_es_fila:
+                # Capturar el saldo anterior como primera fila
+                if cfg.saldo_anterior:
+                    saldo = _saldo_anterior(cfg, texts, x0s[s:e])
+                    if saldo is not None:
+                        movimientos.agregar('SALDO ANTERIOR', 'SALDO ANTERIOR',
+                                            *([''] * n_extra), 0.0, 0.0, saldo)
+                continue
+            # Si no, la línea de inicio sigue como un movimiento más
+
+        # 2) Detectar fin
+        if cfg.fin_re.search(upper):
+            if traza is not None:
+                _trazar(traza, cfg, tabla, col_ids, s, e, "fin")
+            movimientos.cerrar()
+            en_detalle = False
+            if cfg.detener_en_fin:
+                return en_detalle, True
+            continue
+
+        # 3) Transporte, excluidos y encabezados
+        if cfg.transporte_max and 'TRANSPORTE' in upper and len(texts) <= cfg.transporte_max:
+            if traza is not None:
+                _trazar(traza, cfg, tabla, col_ids, s, e, "transporte")
+            continue
+        if cfg.excluir_re is not None and cfg.excluir_re.search(upper):
+            if traza is not None:
+                _trazar(traza, cfg, tabla, col_ids, s, e, "excluida")
+            continue
+        if 'FECHA' in upper and ('DEBITO' in upper or 'DÉBITO' in upper):
+            if traza is not None:
+                _trazar(traza, cfg, tabla, col_ids, s, e, "encabezado")
+            continue
+
+        # 4) Mapear columnas (ids calculados por WordTable.classify)
+        vals = [None, ''] + [''] * n_extra + [None, None, None]
+        saldo_negativo = False
+        for txt, k, x0 in zip(texts, col_ids[s:e], x0s[s:e]):
+            txt = txt.strip()
+            if cfg.simbolo_moneda and txt in ('$', '-$'):
+                if txt == '-$' and bal_lo <= x0 < bal_hi:
+                    saldo_negativo = True
+                continue
+            if k < 0:
+                continue
+            if k == 0 or k >= i_deb:
+                vals[k] = ('-' + txt) if (k == i_sal and saldo_negativo) else txt
+            else:
+                vals[k] = f'{vals[k]} {txt}' if vals[k] else txt
+
+        fecha = (vals[0] or '').strip()
+        desc  = vals[i_desc].strip()
+        tiene_importe = vals[i_deb] or vals[i_cred] or vals[i_sal]
+
+        # 5) Fecha válida → nuevo movimiento
+        if fecha and cfg.fecha_re.match(fecha) and (tiene_importe or not cfg.requiere_importe):
+            movimientos.agregar(fecha, desc, *(v.strip() for v in vals[2:i_deb]),
+                                vals[i_deb], vals[i_cred], vals[i_sal])
+            decision = "nuevo"
+
+        elif movimientos.pendiente and desc and not tiene_importe and (not fecha or not cfg.cont_sin_fecha):
+            # Continuación de descripción (sin importes)
+            movimientos.continuar('Descripción', desc)
+            decision = "continuacion"
+
+        elif cfg.hereda_fecha and movimientos.pendiente and not fecha and desc and tiene_importe:
+            # Sub-movimiento sin fecha propia: hereda la fecha del anterior
+            movimientos.agregar(movimientos.ultimo('Fecha'), desc,
+                                *(v.strip() for v in vals[2:i_deb]),
+                                vals[i_deb], vals[i_cred], vals[i_sal])
+            decision = "submovimiento"
+
+        else:
+            decision = "ignorada"
+
+        if traza is not None:
+            _trazar(traza, cfg, tabla, col_ids, s, e, decision)
+
+    return en_detalle, False
+
+
+def _config(banco: str) -> _Config | None:
+    profile = BANK_PROFILES.get(banco)
+    if not profile or "detalle" not in profile:
+        print(f'❌ No se encontró perfil (con bloque "detalle") para banco "{banco}"')
+        return None
+    cfg = _Config(banco, profile)
+    print(f'✅ Perfil: {banco} | invertido={cfg.es_invertido} | arranca_en_1={cfg.arranca_en_1}')
+    return cfg
+
+
+def _recorrer(pdf_path: str, cfg: _Config, movimientos: Movimientos, opciones: dict):
+    """
+    Procesa el PDF página por página cargando `movimientos`.
+    Genera (cuenta_label, idx, n_paginas) después de cada página procesada.
+    """
+    en_detalle = False
+    salteadas  = 0
+    backend    = opciones.get("backend") or cfg.backend
+
+    with open_pdf(pdf_path, password=opciones.get("password"), backend=backend) as pdf, \
+            PdfProbe(pdf_path, password=opciones.get("password"), fallback=pdf) as probe:
+        cuenta_label = _detectar_cuenta(probe, cfg)
+        print(f'🏦 Cuenta detectada: {cuenta_label}')
+        cuenta_actual(cuenta_label)
+        n_paginas = len(pdf.pages)
+        etiquetas = _etiquetar_paginas(probe, cfg)
+
+        traza = traza_actual()
+        if traza is not None:
+            traza.lineas_propias = True
+            traza.evento("cuenta", cuenta=cuenta_label)
+
+        # PDFs largos: las páginas candidatas se extraen en paralelo (paralelo.py)
+        candidatas = [idx for idx in range(n_paginas)
+                      if etiquetas is None or etiquetas[idx] & _ETIQUETAS_UTILES]
+        workers = workers_paginas(opciones)
+        if workers and len(candidatas) >= PAGINAS_MIN and not vista_previa.activa():
+            print(f'⚡ Extracción en paralelo: {len(candidatas)} páginas, {workers} workers')
+            compartidas = PaginasCompartidas(pdf_path, candidatas, workers, password=opciones.get("password"),
+                                             backend=backend, use_text_flow=False)
+        else:
+            compartidas = None
+
+        with compartidas or nullcontext():
+            for idx in range(n_paginas):
+                if etiquetas is not None and not _pagina_util(etiquetas[idx], en_detalle):
+                    salteadas += 1
+                    if traza is not None:
+                        traza.evento("pagina_salteada", pagina=idx + 1, motivo="sonda")
+                    continue
+                if not vista_previa.pagina_permitida():
+                    print(f'👁️ Vista previa: se detiene en la página {idx + 1}')
+                    break
+                if compartidas is not None:
+                    tabla = compartidas.tabla(idx)
+                    pagina_procesada(idx, n_paginas)
+                else:
+                    tabla = WordTable.from_pdf(pdf, pages=(idx,), use_text_flow=False)
+                en_detalle, terminado = _procesar_pagina(cfg, tabla, movimientos, en_detalle)
+                yield cuenta_label, idx, n_paginas
+                if terminado:
+                    if idx + 1 < n_paginas:
+                        print(f'⏹️ Fin del detalle en página {idx + 1}: se omiten {n_paginas - idx - 1} páginas')
+                    break
+
+    if salteadas:
+        print(f'⏭️ Páginas salteadas por la sonda: {salteadas}')
+
+
+def parse_statement(pdf_path: str, banco: str, options: dict = None) -> dict[str, pd.DataFrame]:
+    """
+    Parsea un extracto de una sola cuenta con la configuración `detalle`
+    del perfil `banco`. Devuelve { 'Cta. 123': DataFrame } o {} si no hay
+    movimientos.
+    """
+    print(f'\n🔍 [DEBUG-parse] Inicio parse(): {pdf_path}')
+
+    cfg = _config(banco)
+    if cfg is None:
+        return {}
+
+    movimientos  = Movimientos(cfg.columnas)
+    cuenta_label = None
+    for cuenta_label, _, _ in _recorrer(pdf_path, cfg, movimientos, options or {}):
+        pass
+
+    if not movimientos:
+        print('❌ No se encontraron movimientos válidos.')
+        return {}
+
+    # ── Construir DataFrame ────────────────────────────────────────────────
+    df = movimientos.to_frame()
+    for col in ('Débito', 'Crédito', 'Saldo'):
+        df[col] = df[col].fillna(0.0)
+
+    # La fila "SALDO ANTERIOR" no tiene fecha: queda NaT
+    df['Fecha'] = convert_dates(df['Fecha'], cfg.formato_fecha)
+
+    df = calcular_saldos(
+        df,
+        es_layout_invertido=cfg.es_invertido,
+        saldo_arranca_en_fila_1=cfg.arranca_en_1
+    )
+    reportar_inconsistencias(df)
+
+    print(f'\n📊 {cuenta_label} → {len(df)} filas procesadas')
+    return {cuenta_label: df}
+
+
+def _registros(cfg: _Config, filas: list, saldos: SaldoCorriente):
+    """Filas crudas de `Movimientos.vaciar()` → dicts con fecha, importes y saldo calculado."""
+    if not filas:
+        return
+    columnas = cfg.columnas
+    fechas   = convert_dates([f[0] for f in filas], cfg.formato_fecha).tolist()
+    for fila, fecha in zip(filas, fechas):
+        mov = dict(zip(columnas, fila))
+        mov['Fecha'] = None if pd.isna(fecha) else fecha
+        for col in ('Débito', 'Crédito', 'Saldo'):
+            if mov[col] != mov[col]:        # NaN → 0.0, igual que fillna
+                mov[col] = 0.0
+        mov['Saldo Calculado'], mov['Diferencia'] = saldos.agregar(mov['Débito'], mov['Crédito'], mov['Saldo'])
+        yield mov
+
+
+def iter_statement(pdf_path: str, banco: str, options: dict = None):
+    """
+    Versión en streaming de `parse_statement`: genera (cuenta_label, movimiento)
+    a medida que se procesan las páginas. `movimiento` es un dict con las
+    columnas del perfil más 'Saldo Calculado' y 'Diferencia', validados en
+    forma incremental (SaldoCorriente).
+
+    options: {"password": ..., "backend": "pdfplumber" | "pdfium"}
+    """
+    cfg = _config(banco)
+    if cfg is None:
+        return
+
+    movimientos  = Movimientos(cfg.columnas)
+    saldos       = SaldoCorriente(cfg.es_invertido, cfg.arranca_en_1)
+    cuenta_label = None
+
+    for cuenta_label, _, _ in _recorrer(pdf_path, cfg, movimientos, options or {}):
+        # La última fila puede recibir continuaciones en la página siguiente
+        for mov in _registros(cfg, movimientos.vaciar(conservar=1), saldos):
+            yield cuenta_label, mov
+
+    for mov in _registros(cfg, movimientos.vaciar(), saldos):
+        yield cuenta_label, mov
+
+    if saldos.filas:
+        estado = '✅' if not saldos.inconsistencias else '⚠️'
+        print(f'\n{estado} {cuenta_label} → {saldos.filas} filas | inconsistencias: {saldos.inconsistencias}')
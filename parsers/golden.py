@@ -0,0 +1,215 @@
+# parsers/golden.py
+#
+# Corpus de regresión: salida esperada ("golden") por PDF de prueba, con
+# control de exactitud y de tiempo.
+#
+# Estructura del corpus (la carpeta de cada banco es la clave de get_parser):
+#
+#   corpus/
+#     Nacion/
+#       2025-10.pdf
+#       2025-10.golden.json      ← lo genera --actualizar
+#     Credicoop/
+#       ...
+#
+# Uso:
+#   python -m parsers.golden corpus/ --actualizar     # graba/actualiza los golden
+#   python -m parsers.golden corpus/                  # compara contra los golden
+#   python -m parsers.golden corpus/ --banco Nacion   # solo un banco
+#
+# Por cada PDF compara cuentas, columnas, filas (fechas ISO, importes a 2
+# decimales) y cantidad de inconsistencias (|Diferencia| > 0,01), y el mejor
+# tiempo de --repeticiones corridas contra el tiempo grabado. Sale con
+# código 1 si algún PDF cambió de salida o se volvió más lento que
+# tiempo_golden * (1 + --tolerancia-tiempo) + --margen-tiempo.
+#
+# Antes de tocar coordenadas en bank_profiles.py o de optimizar un parser:
+# correr el corpus, hacer el cambio y volver a correrlo. Solo se regraba con
+# --actualizar cuando el cambio de salida es intencional.
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from . import get_parser
+from .manifest import sha256_archivo, huella_parser
+from .streaming import _valor
+
+SUFIJO = ".golden.json"
+VERSION = 1
+MAX_FILAS_REPORTE = 5
+
+
+def _normalizar_valor(v):
+    v = _valor(v)
+    if isinstance(v, float):
+        return round(v, 2) + 0.0
+    if isinstance(v, str):
+        return v.strip()
+    return v
+
+
+def normalizar(resultado) -> dict:
+    """Resultado de parse() → {cuenta: {columnas, filas, inconsistencias}} comparable y serializable."""
+    if isinstance(resultado, pd.DataFrame):
+        resultado = {"": resultado}
+    cuentas = {}
+    for label, df in (resultado or {}).items():
+        incons = 0
+        if "Diferencia" in df.columns:
+            incons = int((pd.to_numeric(df["Diferencia"], errors="coerce").abs() > 0.01).sum())
+        cuentas[str(label)] = {
+            "columnas": [str(c) for c in df.columns],
+            "filas": [[_normalizar_valor(v) for v in fila] for fila in df.itertuples(index=False, name=None)],
+            "inconsistencias": incons,
+        }
+    return cuentas
+
+
+def correr(banco: str, pdf_path: Path, repeticiones: int = 1) -> tuple[dict, float]:
+    """Parsea `repeticiones` veces (sin la salida de consola) y devuelve (normalizado, mejor tiempo)."""
+    parser = get_parser(banco)
+    mejor, resultado = math.inf, None
+    for _ in range(max(1, repeticiones)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            resultado = parser.parse(str(pdf_path))
+            mejor = min(mejor, time.perf_counter() - t0)
+    return normalizar(resultado), mejor
+
+
+def comparar(esperado: dict, actual: dict) -> list[str]:
+    """Diferencias legibles entre dos salidas normalizadas (vacía si son iguales)."""
+    difs = []
+    for cuenta in sorted(set(esperado) | set(actual)):
+        if cuenta not in actual:
+            difs.append(f"falta la cuenta '{cuenta}'")
+            continue
+        if cuenta not in esperado:
+            difs.append(f"cuenta nueva '{cuenta}' ({len(actual[cuenta]['filas'])} filas)")
+            continue
+        e, a = esperado[cuenta], actual[cuenta]
+        if e["columnas"] != a["columnas"]:
+            difs.append(f"{cuenta}: columnas {e['columnas']} → {a['columnas']}")
+            continue
+        if len(e["filas"]) != len(a["filas"]):
+            difs.append(f"{cuenta}: {len(e['filas'])} filas → {len(a['filas'])}")
+        distintas = [i for i, (fe, fa) in enumerate(zip(e["filas"], a["filas"])) if fe != fa]
+        if distintas:
+            difs.append(f"{cuenta}: {len(distintas)} filas distintas")
+            for i in distintas[:MAX_FILAS_REPORTE]:
+                cambios = {
+                    col: (ve, va)
+                    for col, ve, va in zip(e["columnas"], e["filas"][i], a["filas"][i])
+                    if ve != va
+                }
+                difs.append(f"   fila {i}: {cambios}")
+        if e["inconsistencias"] != a["inconsistencias"]:
+            difs.append(f"{cuenta}: inconsistencias {e['inconsistencias']} → {a['inconsistencias']}")
+    return difs
+
+
+def _golden_path(pdf_path: Path) -> Path:
+    return pdf_path.with_name(pdf_path.stem + SUFIJO)
+
+
+def _fixtures(corpus: Path, banco: str = None):
+    """(banco, pdf) del corpus, una carpeta por banco."""
+    for carpeta in sorted(p for p in corpus.iterdir() if p.is_dir()):
+        if banco and carpeta.name != banco:
+            continue
+        for pdf in sorted(carpeta.glob("*.pdf")):
+            yield carpeta.name, pdf
+
+
+def actualizar(banco: str, pdf_path: Path, repeticiones: int) -> None:
+    cuentas, segundos = correr(banco, pdf_path, repeticiones)
+    golden = {
+        "version": VERSION,
+        "banco": banco,
+        "pdf": pdf_path.name,
+        "sha256": sha256_archivo(pdf_path),
+        "parser": huella_parser(get_parser(banco)),
+        "segundos": round(segundos, 4),
+        "cuentas": cuentas,
+    }
+    _golden_path(pdf_path).write_text(json.dumps(golden, ensure_ascii=False, indent=1), encoding="utf-8")
+    filas = sum(len(c["filas"]) for c in cuentas.values())
+    print(f"💾 {banco}/{pdf_path.name}: {len(cuentas)} cuentas, {filas} filas, {segundos:.2f}s")
+
+
+def verificar(banco: str, pdf_path: Path, repeticiones: int, tol_tiempo: float, margen: float) -> bool:
+    golden_path = _golden_path(pdf_path)
+    if not golden_path.exists():
+        print(f"⚠️ {banco}/{pdf_path.name}: sin golden (correr con --actualizar)")
+        return False
+    golden = json.loads(golden_path.read_text(encoding="utf-8"))
+    if golden.get("sha256") != sha256_archivo(pdf_path):
+        print(f"⚠️ {banco}/{pdf_path.name}: el PDF cambió desde que se grabó el golden")
+        return False
+
+    try:
+        cuentas, segundos = correr(banco, pdf_path, repeticiones)
+    except Exception as e:
+        print(f"❌ {banco}/{pdf_path.name}: {type(e).__name__}: {e}")
+        return False
+
+    difs = comparar(golden["cuentas"], cuentas)
+    limite = golden["segundos"] * (1 + tol_tiempo) + margen
+    lento = segundos > limite
+    tiempo = f"{segundos:.2f}s (golden {golden['segundos']:.2f}s)"
+
+    if not difs and not lento:
+        print(f"✅ {banco}/{pdf_path.name}: igual | {tiempo}")
+        return True
+    if difs:
+        print(f"❌ {banco}/{pdf_path.name}: salida distinta | {tiempo}")
+        for d in difs:
+            print(f"   {d}")
+    if lento:
+        print(f"🐢 {banco}/{pdf_path.name}: {tiempo} supera el límite de {limite:.2f}s")
+    return False
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Corpus de regresión: salida y tiempo contra los golden grabados")
+    ap.add_argument("corpus", help="carpeta con una subcarpeta por banco")
+    ap.add_argument("--banco", help="solo este banco")
+    ap.add_argument("--actualizar", action="store_true", help="graba los golden con la salida actual")
+    ap.add_argument("--repeticiones", type=int, default=3, help="corridas por PDF (se toma la más rápida)")
+    ap.add_argument("--tolerancia-tiempo", type=float, default=0.25, help="aumento relativo de tiempo aceptado")
+    ap.add_argument("--margen-tiempo", type=float, default=0.05, help="segundos extra aceptados (ruido)")
+    args = ap.parse_args(argv)
+
+    corpus = Path(args.corpus)
+    if not corpus.is_dir():
+        print(f"❌ Carpeta de corpus inválida: {corpus}")
+        return 2
+
+    fixtures = list(_fixtures(corpus, args.banco))
+    if not fixtures:
+        print("❌ El corpus no tiene PDFs.")
+        return 2
+
+    if args.actualizar:
+        for banco, pdf in fixtures:
+            actualizar(banco, pdf, args.repeticiones)
+        return 0
+
+    fallas = sum(
+        not verificar(banco, pdf, args.repeticiones, args.tolerancia_tiempo, args.margen_tiempo)
+        for banco, pdf in fixtures
+    )
+    print(f"\n{'✅' if not fallas else '❌'} {len(fixtures) - fallas}/{len(fixtures)} PDFs sin regresiones")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
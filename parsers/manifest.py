@@ -0,0 +1,109 @@
+# parsers/manifest.py
+#
+# Manifiesto de procesamiento por lotes (main.process_all_pdfs).
+#
+# En la carpeta de salida queda un `.manifest.json` con una entrada por PDF,
+# indexada por el SHA-256 del contenido:
+#
+#   {"version": 1,
+#    "archivos": {"<sha256>": {"pdf": "Resumen 2024-07.pdf", "banco": "Nacion",
+#                              "parser": "<huella>", "salida": "..._validado.xlsx",
+#                              "estado": "ok", "segundos": 1.42, "procesado": "2025-..."}}}
+#
+# Un PDF se saltea solo si el manifiesto ya tiene su hash con el mismo banco,
+# la misma huella de parser, estado "ok" y la salida todavía existe. Así:
+#   - un parser corregido (cambia la huella) reprocesa sus PDFs,
+#   - un PDF renombrado no se vuelve a parsear (mismo hash),
+#   - un PDF reemplazado con otro contenido sí.
+#
+# La huella del parser es el hash de su módulo más los módulos compartidos del
+# camino de parseo (`MODULOS_PARSEO`), que también cambian el resultado. Los
+# demás (web, traza, consolidación, validación...) no invalidan el manifiesto.
+#
+# El manifiesto se reescribe (archivo temporal + os.replace) después de cada
+# PDF, así una corrida cortada a la mitad retoma desde el primer PDF sin
+# entrada "ok".
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+MANIFEST_FILE = ".manifest.json"
+VERSION = 1
+
+_PARSERS_DIR = Path(__file__).resolve().parent
+# Módulos de `parsers/` que cambian lo que devuelve un parser
+MODULOS_PARSEO = ("utils", "conversion", "movimientos", "engine", "bank_profiles", "backends")
+_huellas: dict[str, str] = {}
+
+
+def sha256_archivo(path, bloque: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(bloque):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def huella_parser(modulo) -> str:
+    """
+    Hash del código que produce la salida de `modulo`: su archivo más los
+    módulos compartidos de `MODULOS_PARSEO`.
+    `modulo` puede ser el módulo o su nombre ("parsers.Nacion_parser").
+    """
+    if isinstance(modulo, str):
+        modulo = sys.modules[modulo]
+    origen = Path(modulo.__file__).resolve()
+    if str(origen) not in _huellas:
+        compartidos = [_PARSERS_DIR / f"{nombre}.py" for nombre in MODULOS_PARSEO]
+        h = hashlib.sha256()
+        for p in [origen, *compartidos]:
+            h.update(p.name.encode())
+            h.update(p.read_bytes())
+        _huellas[str(origen)] = h.hexdigest()[:16]
+    return _huellas[str(origen)]
+
+
+class Manifest:
+    """Entradas de `.manifest.json` de una carpeta de salida."""
+
+    def __init__(self, carpeta):
+        self.carpeta = Path(carpeta)
+        self.path    = self.carpeta / MANIFEST_FILE
+        self.archivos: dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("version") == VERSION:
+                    self.archivos = data.get("archivos", {})
+            except (OSError, ValueError) as e:
+                # Manifiesto roto: se reprocesa todo y se reescribe
+                print(f"⚠️ Manifiesto ilegible ({e}); se reprocesan todos los PDFs")
+
+    def vigente(self, sha: str, banco: str, huella: str):
+        """Entrada previa si el PDF ya está procesado con este banco y parser; si no, None."""
+        entrada = self.archivos.get(sha)
+        if (
+            entrada
+            and entrada.get("estado") == "ok"
+            and entrada.get("banco") == banco
+            and entrada.get("parser") == huella
+            and (self.carpeta / entrada.get("salida", "")).is_file()
+        ):
+            return entrada
+        return None
+
+    def registrar(self, sha: str, **datos) -> None:
+        """Guarda la entrada de `sha` y persiste el manifiesto."""
+        datos["procesado"] = datetime.now().isoformat(timespec="seconds")
+        self.archivos[sha] = datos
+        self.guardar()
+
+    def guardar(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "archivos": self.archivos}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
@@ -0,0 +1,137 @@
+# parsers/movimientos.py
+#
+# Acumulador columnar de movimientos.
+#
+# Reemplaza el patrón `movimientos.append({...})` + `pd.DataFrame(movimientos)`:
+# cada columna vive en su propia lista (los importes en array('d'), 8 bytes
+# por valor) y los textos repetidos ("IMPUESTO LEY 25413", fechas, ...) se
+# internan, así que no hay un dict con claves repetidas por fila.
+#
+# Los importes se pueden pasar como texto crudo ('1.234,56-'): se juntan en
+# lotes y se convierten de a columna con `conversion.convert_amounts`.
+#
+# También reemplaza el `mov_pendiente` de Nación/Credicoop/Santander: la
+# última fila agregada queda "pendiente" y acepta líneas de continuación
+# hasta que se agrega otra o se llama a `cerrar()`.
+#
+# Para streaming (`parse_iter`), `vaciar()` entrega las filas ya cerradas y
+# deja la pendiente, así la memoria no crece con el largo del extracto.
+
+import sys
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from .conversion import convert_amounts
+from .progreso import fila_agregada
+from .vista_previa import fila_leida
+
+COLUMNAS = ("Fecha", "Descripción", "Débito", "Crédito", "Saldo")
+IMPORTES = ("Débito", "Crédito", "Saldo", "Por Acreditar")
+
+# Cantidad de importes crudos que se acumulan antes de convertirlos en bloque
+LOTE = 4096
+
+
+class Movimientos:
+    """
+    Movimientos de una cuenta guardados por columna.
+
+    Uso:
+        movs = Movimientos(("Fecha", "Descripción", "Débito", "Crédito", "Saldo"))
+        movs.agregar("01/10/25", "IMPUESTO LEY 25413", "12,50", "", "1.000,00")
+        movs.continuar("Descripción", "S/DEBITOS")
+        df = movs.to_frame()
+    """
+
+    __slots__ = ("columnas", "decimal", "_datos", "_crudos", "_numericas", "_indice", "_lote", "_abierto")
+
+    def __init__(self, columnas=COLUMNAS, importes=IMPORTES, decimal: str = ","):
+        self.columnas   = tuple(columnas)
+        self.decimal    = decimal
+        self._numericas = tuple(c in importes for c in self.columnas)
+        self._datos     = [array("d") if num else [] for num in self._numericas]
+        self._crudos    = [[] if num else None for num in self._numericas]
+        self._indice    = {c: i for i, c in enumerate(self.columnas)}
+        # Columna de importes que se usa para contar filas crudas (None si no hay)
+        self._lote      = next((i for i, num in enumerate(self._numericas) if num), None)
+        self._abierto   = False
+
+    def __len__(self) -> int:
+        if self._lote is None:
+            return len(self._datos[0])
+        return len(self._datos[self._lote]) + len(self._crudos[self._lote])
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def agregar(self, *valores) -> None:
+        """Agrega una fila (valores en el orden de `columnas`) y la deja pendiente."""
+        for col, crudo, v in zip(self._datos, self._crudos, valores):
+            if crudo is not None:
+                crudo.append(v)
+            else:
+                col.append(sys.intern(v) if isinstance(v, str) else v)
+        self._abierto = True
+        fila_agregada()
+        fila_leida()
+        if self._lote is not None and len(self._crudos[self._lote]) >= LOTE:
+            self._volcar()
+
+    def _volcar(self) -> None:
+        """Convierte en bloque los importes crudos pendientes."""
+        for col, crudo in zip(self._datos, self._crudos):
+            if crudo:
+                valores = convert_amounts(crudo, decimal=self.decimal).to_numpy(dtype=float)
+                col.frombytes(valores.tobytes())
+                crudo.clear()
+
+    @property
+    def pendiente(self) -> bool:
+        """True si la última fila todavía acepta continuaciones."""
+        return self._abierto
+
+    def cerrar(self) -> None:
+        """Cierra la fila pendiente (equivale a `mov_pendiente = None`)."""
+        self._abierto = False
+
+    def continuar(self, columna: str, texto: str, sep: str = " ") -> None:
+        """Concatena `texto` a `columna` de la fila pendiente."""
+        col = self._datos[self._indice[columna]]
+        col[-1] = f"{col[-1]}{sep}{texto}"
+
+    def ultimo(self, columna: str):
+        """Valor de `columna` en la última fila agregada."""
+        i = self._indice[columna]
+        if self._crudos[i]:
+            return self._crudos[i][-1]
+        return self._datos[i][-1]
+
+    def filas(self):
+        """Itera las filas como tuplas, sin armar el DataFrame (escritura en streaming)."""
+        self._volcar()
+        return zip(*self._datos)
+
+    def vaciar(self, conservar: int = 0) -> list[tuple]:
+        """
+        Saca y devuelve las filas ya convertidas, dejando las últimas
+        `conservar` (p. ej. 1 para la fila pendiente). Para `parse_iter`.
+        """
+        self._volcar()
+        n = len(self) - conservar
+        if n <= 0:
+            return []
+        filas = list(zip(*(col[:n] for col in self._datos)))
+        for col in self._datos:
+            del col[:n]
+        return filas
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame con una columna por lista; los importes van directo a float64."""
+        self._volcar()
+        data = {
+            nombre: (np.array(col, dtype=float) if num else col)
+            for nombre, num, col in zip(self.columnas, self._numericas, self._datos)
+        }
+        return pd.DataFrame(data, columns=list(self.columnas))
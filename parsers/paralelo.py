@@ -0,0 +1,173 @@
+# parsers/paralelo.py
+#
+# Extracción de palabras en paralelo, por tramos de páginas, con la
+# transferencia worker → padre en memoria compartida.
+#
+# Mandar de vuelta las listas de dicts de pdfplumber por pickle cuesta tanto
+# como extraerlas en páginas chicas. Cada worker escribe en cambio sus
+# palabras en un bloque de `multiprocessing.shared_memory` con formato
+# columnar:
+#
+#   float64[4, n]   x0, x1, top, bottom
+#   int32[n]        página (+ relleno a 8 bytes)
+#   int64[n + 1]    offsets de cada texto dentro del blob (en caracteres)
+#   bytes           blob UTF-8 con todos los textos concatenados
+#
+# y devuelve solo (nombre del bloque, n, largo del blob). El padre arma vistas
+# NumPy sobre el bloque sin copiar; los textos salen de un único decode del
+# blob. Cada WordTable de página apunta a esas vistas hasta que build_lines()
+# la reordena.
+#
+#   with PaginasCompartidas(pdf_path, paginas, workers=4) as compartidas:
+#       for idx in paginas:
+#           tabla = compartidas.tabla(idx)
+#
+# Lo usa el motor declarativo (engine.py) con la opción "workers" o
+# PDF_WORKERS_PAGINAS, en PDFs de al menos PAGINAS_MIN páginas útiles. Dentro
+# de un proceso daemon (parseo supervisado de la web) no se pueden crear
+# hijos: ahí se extrae en serie.
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .utils import WordTable, open_pdf, iter_page_words
+
+PAGINAS_MIN = 8
+
+_pool = None
+_pool_workers = 0
+
+
+def workers_paginas(opciones: dict) -> int:
+    """Workers pedidos (opción "workers" o PDF_WORKERS_PAGINAS); 0 si no se puede paralelizar."""
+    workers = opciones.get("workers")
+    if workers is None:
+        env = os.environ.get("PDF_WORKERS_PAGINAS", "").strip()
+        workers = int(env) if env.isdigit() else 0
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        return 0
+    return workers
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        from .presupuesto import contexto_procesos
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=contexto_procesos())
+        _pool_workers = workers
+    return _pool
+
+
+def _tamanos(n: int, n_blob: int) -> tuple[int, int, int, int]:
+    """Offsets (páginas, offsets de texto, blob, total) dentro del bloque."""
+    o_pag = 4 * n * 8
+    o_off = o_pag + ((4 * n + 7) // 8) * 8
+    o_blob = o_off + (n + 1) * 8
+    return o_pag, o_off, o_blob, o_blob + max(n_blob, 1)
+
+
+def _extraer(pdf_path: str, paginas: list, password, backend, top: float, extract_kwargs: dict):
+    """Worker: extrae `paginas` y las deja en un bloque compartido. Devuelve (nombre, n, n_blob)."""
+    # Los dicts de cada página pasan a columnas apenas se extraen (como WordTable.from_words)
+    with open_pdf(pdf_path, password=password, backend=backend) as pdf:
+        tabla = WordTable.from_words(iter_page_words(pdf, paginas, top, **extract_kwargs))
+
+    n = len(tabla)
+    textos = tabla.text.tolist()
+    largos = np.fromiter((len(t) for t in textos), np.int64, n)
+    blob = "".join(textos).encode("utf-8")
+    o_pag, o_off, o_blob, total = _tamanos(n, len(blob))
+
+    shm = shared_memory.SharedMemory(create=True, size=total)
+    try:
+        cols = np.ndarray((4, n), np.float64, shm.buf)
+        cols[0], cols[1], cols[2], cols[3] = tabla.x0, tabla.x1, tabla.top, tabla.bottom
+        np.ndarray(n, np.int32, shm.buf, o_pag)[:] = tabla.page
+        offsets = np.ndarray(n + 1, np.int64, shm.buf, o_off)
+        offsets[0] = 0
+        np.cumsum(largos, out=offsets[1:])
+        shm.buf[o_blob:o_blob + len(blob)] = blob
+        return shm.name, n, len(blob)
+    finally:
+        # El padre lo libera (unlink) cuando terminó de leerlo
+        shm.close()
+
+
+class PaginasCompartidas:
+    """WordTable por página, extraídas en paralelo y leídas desde memoria compartida."""
+
+    def __init__(self, pdf_path: str, paginas, workers: int, password: str = None,
+                 backend: str = None, top: float = 0, **extract_kwargs):
+        paginas = list(paginas)
+        # Tramos contiguos: cada worker abre el PDF una vez y recorre en orden
+        paso = -(-len(paginas) // workers)
+        tramos = [paginas[i:i + paso] for i in range(0, len(paginas), paso)]
+        pool = _get_pool(workers)
+        futuros = [pool.submit(_extraer, pdf_path, t, password, backend, top, extract_kwargs) for t in tramos]
+
+        self._bloques = []
+        self._tablas = {}
+        pendientes = list(futuros)
+        try:
+            while pendientes:
+                nombre, n, n_blob = pendientes[0].result()
+                pendientes.pop(0)
+                shm = shared_memory.SharedMemory(name=nombre)
+                self._bloques.append(shm)
+                self._leer(shm, n, n_blob)
+        except BaseException:
+            # Los tramos que igual terminaron dejaron su bloque creado: hay
+            # que engancharlo para que close() lo borre, si no queda en /dev/shm
+            for futuro in pendientes:
+                futuro.cancel()
+            for futuro in pendientes:
+                if futuro.cancelled() or futuro.exception() is not None:
+                    continue
+                try:
+                    self._bloques.append(shared_memory.SharedMemory(name=futuro.result()[0]))
+                except OSError:
+                    pass
+            self.close()
+            raise
+
+    def _leer(self, shm, n: int, n_blob: int) -> None:
+        o_pag, o_off, o_blob, _ = _tamanos(n, n_blob)
+        cols    = np.ndarray((4, n), np.float64, shm.buf)
+        pags    = np.ndarray(n, np.int32, shm.buf, o_pag)
+        offsets = np.ndarray(n + 1, np.int64, shm.buf, o_off).tolist()
+        todo    = bytes(shm.buf[o_blob:o_blob + n_blob]).decode("utf-8")
+        textos  = [todo[a:b] for a, b in zip(offsets, offsets[1:])]
+        # Las páginas vienen en orden dentro del tramo: cortes por searchsorted
+        presentes = np.unique(pags)
+        cortes = np.searchsorted(pags, presentes, side="left").tolist() + [n]
+        for idx, a, b in zip(presentes.tolist(), cortes, cortes[1:]):
+            self._tablas[idx] = WordTable(cols[0, a:b], cols[1, a:b], cols[2, a:b],
+                                          cols[3, a:b], pags[a:b], textos[a:b])
+        del cols, pags
+
+    def tabla(self, idx: int) -> WordTable:
+        """Palabras de la página `idx` (vacía si no tiene palabras)."""
+        tabla = self._tablas.pop(idx, None)
+        return tabla if tabla is not None else WordTable([], [], [], [], [], [])
+
+    def close(self) -> None:
+        self._tablas.clear()
+        for shm in self._bloques:
+            try:
+                shm.close()
+            except BufferError:
+                pass        # queda alguna vista viva: el mapeo se libera con ella
+            shm.unlink()
+        self._bloques = []
+
+    def __enter__(self) -> "PaginasCompartidas":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
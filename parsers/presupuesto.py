@@ -0,0 +1,304 @@
+# parsers/presupuesto.py
+#
+# Presupuesto por parseo: máximo de páginas, de segundos y de memoria (RSS).
+#
+# El parseo corre en un proceso hijo supervisado; si se pasa de cualquiera de
+# los límites el padre lo mata y levanta PresupuestoExcedido con el límite
+# que se cruzó. Así un PDF patológico no deja a un worker colgado ni se come
+# la memoria del servidor.
+#
+#   resultado = parse_supervisado("Nacion", "/tmp/extracto.pdf")
+#   for cuenta, mov in iter_supervisado("Nacion", "/tmp/extracto.pdf"): ...
+#   vista = previsualizar_supervisado("Nacion", "/tmp/extracto.pdf", filas=20, paginas=2)
+#
+# En iter_supervisado el hijo manda los movimientos de a lotes por el pipe
+# mientras parsea (/process-stream); la vista previa no usa el límite de
+# páginas porque lee solo las primeras.
+#
+# Límites (0 = sin límite), de menor a mayor prioridad:
+#   1. Del despliegue: PARSE_MAX_PAGINAS (500), PARSE_MAX_SEGUNDOS (120),
+#      PARSE_MAX_RSS_MB (PDF_MAX_RSS_MB o 1536).
+#   2. Del banco, en su módulo:  PRESUPUESTO = {"paginas": 2000, "segundos": 300}
+#   3. Del banco, por entorno:   PARSE_PRESUPUESTOS='{"Macro": {"segundos": 300}}'
+#
+# Con PARSE_AISLADO=0 se parsea en el mismo proceso (desarrollo / Windows):
+# solo se controla la memoria por página como siempre (utils.iter_pages).
+#
+# El progreso (seguir_progreso) y la traza (trazar) activos en el padre
+# siguen funcionando: el hijo reenvía sus eventos y registros por el pipe.
+
+import importlib
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+
+from . import get_parser, progreso
+from .streaming import iter_movimientos
+from .traza import trazar, traza_actual
+from .utils import PdfProbe, con_password, rss_mb
+from .vista_previa import previsualizar
+
+LIMITES = {
+    "paginas":  ("PARSE_MAX_PAGINAS",  500,  "páginas"),
+    "segundos": ("PARSE_MAX_SEGUNDOS", 120,  "tiempo (segundos)"),
+    "rss_mb":   ("PARSE_MAX_RSS_MB",   1536, "memoria (MB)"),
+}
+INTERVALO = 0.1         # cada cuánto mira el padre tiempo y memoria del hijo
+FILAS_POR_MENSAJE = 256 # movimientos por mensaje del hijo en iter_supervisado
+
+_contexto = None
+
+
+class PresupuestoExcedido(RuntimeError):
+    """El parseo superó uno de sus límites (`limite`: paginas, segundos o rss_mb)."""
+
+    def __init__(self, limite: str, maximo: float, valor: float):
+        self.limite = limite
+        self.maximo = maximo
+        self.valor  = valor
+        super().__init__(
+            f"El PDF superó el presupuesto de {LIMITES[limite][2]} por parseo "
+            f"({valor:g} > {maximo:g}); se canceló el procesamiento."
+        )
+
+    def __reduce__(self):
+        return type(self), (self.limite, self.maximo, self.valor)
+
+    def datos(self) -> dict:
+        return {"limite": self.limite, "maximo": self.maximo, "valor": self.valor}
+
+
+def _numero(texto, origen: str):
+    try:
+        return float(texto)
+    except (TypeError, ValueError):
+        print(f"⚠️ {origen} inválido: {texto!r} (se ignora)")
+        return None
+
+
+def presupuesto(banco: str, parser_module=None) -> dict:
+    """{limite: máximo o None} para `banco` (ver prioridades arriba)."""
+    limites = {}
+    for limite, (env, defecto, _) in LIMITES.items():
+        valor = os.environ.get(env, "").strip()
+        if not valor and limite == "rss_mb":
+            valor = os.environ.get("PDF_MAX_RSS_MB", "").strip()
+        numero = _numero(valor, env) if valor else None
+        limites[limite] = defecto if numero is None else numero
+
+    propios = dict(getattr(parser_module, "PRESUPUESTO", None) or {})
+    env = os.environ.get("PARSE_PRESUPUESTOS", "").strip()
+    if env:
+        try:
+            propios.update(json.loads(env).get(banco, {}))
+        except (ValueError, AttributeError):
+            print(f"⚠️ PARSE_PRESUPUESTOS inválido: {env!r} (se ignora)")
+    for limite, valor in propios.items():
+        numero = _numero(valor, f"presupuesto {banco}.{limite}") if limite in LIMITES else None
+        if numero is not None:
+            limites[limite] = numero
+
+    return {limite: valor or None for limite, valor in limites.items()}
+
+
+def aislado() -> bool:
+    return os.environ.get("PARSE_AISLADO", "1").strip().lower() not in ("0", "false", "no")
+
+
+def contexto_procesos():
+    """forkserver con `parsers` precargado: cada hijo nace con pandas y los parsers importados."""
+    global _contexto
+    if _contexto is None:
+        metodos = multiprocessing.get_all_start_methods()
+        metodo = "forkserver" if "forkserver" in metodos else "spawn"
+        _contexto = multiprocessing.get_context(metodo)
+        if metodo == "forkserver":
+            _contexto.set_forkserver_preload(["parsers"])
+    return _contexto
+
+
+class _Reenvio:
+    """Archivo de la traza del hijo: cada registro viaja al padre por el pipe."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, texto: str) -> None:
+        self.conn.send(("traza", texto))
+
+    def flush(self) -> None:
+        pass
+
+
+def _trabajador(conn, banco: str, pdf_path: str, password, max_paginas, con_traza: bool,
+                tarea: tuple = ("parse",)) -> None:
+    """
+    Proceso hijo: corre `tarea` y manda ("ok", resultado) o ("error", excepción, traceback).
+      ("parse",)                 → resultado de parse()
+      ("iter",)                  → ("filas", [(cuenta, movimiento), ...]) de a lotes, y ("ok", None)
+      ("vista", filas, paginas)  → resultado de previsualizar()
+    """
+    try:
+        if password:
+            os.environ["PDF_PASSWORD"] = password
+        # Los bancos agregados después de arrancar el forkserver también existen
+        import parsers
+        importlib.reload(parsers)
+        parser_module = parsers.get_parser(banco)
+
+        if max_paginas:
+            with PdfProbe(pdf_path, password=password) as probe:
+                if len(probe) > max_paginas:
+                    raise PresupuestoExcedido("paginas", max_paginas, len(probe))
+
+        with progreso.seguir_progreso(lambda ev: conn.send(("progreso", ev))), \
+                (trazar(_Reenvio(conn)) if con_traza else nullcontext()):
+            if tarea[0] == "iter":
+                # El primer movimiento sale solo; después, de a lotes o cada INTERVALO
+                lote, enviado = [], 0.0
+                for registro in iter_movimientos(parser_module, pdf_path, {"password": password}):
+                    lote.append(registro)
+                    if len(lote) >= FILAS_POR_MENSAJE or time.monotonic() - enviado >= INTERVALO:
+                        conn.send(("filas", lote))
+                        lote, enviado = [], time.monotonic()
+                if lote:
+                    conn.send(("filas", lote))
+                resultado = None
+            elif tarea[0] == "vista":
+                _, filas, paginas = tarea
+                resultado = previsualizar(parser_module, pdf_path, filas=filas, paginas=paginas,
+                                          options={"password": password})
+            else:
+                resultado = parser_module.parse(pdf_path)
+        conn.send(("ok", resultado))
+    except BaseException as e:
+        detalle = traceback.format_exc()
+        try:
+            conn.send(("error", e, detalle))
+        except Exception:
+            # Excepción que no se puede serializar: viaja como texto
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}"), detalle))
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _hijo(banco: str, pdf_path: str, password, limites: dict, tarea: tuple):
+    """Arranca el proceso hijo con `tarea`; al salir lo mata si sigue vivo."""
+    traza = traza_actual()
+    ctx = contexto_procesos()
+    recibir, enviar = ctx.Pipe(duplex=False)
+    proc = ctx.Process(
+        target=_trabajador,
+        args=(enviar, banco, pdf_path, password, limites.get("paginas"), traza is not None, tarea),
+        daemon=True,
+    )
+    proc.start()
+    enviar.close()
+    try:
+        yield proc, recibir
+    finally:
+        recibir.close()
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+
+
+def _mensajes(proc, recibir, limites: dict):
+    """
+    Genera los mensajes ("filas", lote) / ("ok", resultado) del hijo. Reenvía
+    progreso y traza, controla páginas, tiempo y memoria y levanta el error
+    del hijo o PresupuestoExcedido.
+    """
+    traza = traza_actual()
+    t0 = time.monotonic()
+    while True:
+        if recibir.poll(INTERVALO):
+            try:
+                mensaje = recibir.recv()
+            except EOFError:
+                proc.join(1)
+                raise RuntimeError(
+                    f"El proceso de parseo terminó inesperadamente (código {proc.exitcode})"
+                ) from None
+            tipo = mensaje[0]
+            if tipo == "progreso":
+                ev = mensaje[1]
+                progreso.reflejar(ev)
+                if limites.get("paginas") and ev.get("paginas", 0) > limites["paginas"]:
+                    raise PresupuestoExcedido("paginas", limites["paginas"], ev["paginas"])
+            elif tipo == "traza":
+                traza.volcar(mensaje[1])
+            elif tipo in ("filas", "ok"):
+                yield mensaje
+            else:
+                _, error, detalle = mensaje
+                if not isinstance(error, PresupuestoExcedido):
+                    print(f"⚠️ Error en el proceso de parseo:\n{detalle}")
+                raise error
+
+        segundos = time.monotonic() - t0
+        if limites.get("segundos") and segundos > limites["segundos"]:
+            raise PresupuestoExcedido("segundos", limites["segundos"], round(segundos, 1))
+        uso = rss_mb(proc.pid)
+        if limites.get("rss_mb") and uso is not None and uso > limites["rss_mb"]:
+            raise PresupuestoExcedido("rss_mb", limites["rss_mb"], round(uso))
+
+
+def parse_supervisado(banco: str, pdf_path: str, password: str = None, limites: dict = None):
+    """
+    Parsea `pdf_path` con el parser de `banco` en un proceso hijo con
+    presupuesto. Devuelve lo mismo que `parse()`; levanta la excepción del
+    parser o PresupuestoExcedido.
+    """
+    if not aislado():
+        with con_password(password):
+            return get_parser(banco).parse(pdf_path)
+
+    if limites is None:
+        limites = presupuesto(banco, get_parser(banco))
+    with _hijo(banco, pdf_path, password, limites, ("parse",)) as (proc, recibir):
+        for tipo, dato in _mensajes(proc, recibir, limites):
+            if tipo == "ok":
+                return dato
+
+
+def iter_supervisado(banco: str, pdf_path: str, password: str = None, limites: dict = None):
+    """
+    Como `streaming.iter_movimientos`, pero el parser corre en el proceso
+    hijo con presupuesto y los movimientos llegan por el pipe. El tiempo
+    corre mientras se consume: cerrar el generador mata al hijo.
+    """
+    if not aislado():
+        yield from iter_movimientos(get_parser(banco), pdf_path, {"password": password})
+        return
+
+    if limites is None:
+        limites = presupuesto(banco, get_parser(banco))
+    with _hijo(banco, pdf_path, password, limites, ("iter",)) as (proc, recibir):
+        for tipo, dato in _mensajes(proc, recibir, limites):
+            if tipo == "ok":
+                return
+            yield from dato
+
+
+def previsualizar_supervisado(banco: str, pdf_path: str, filas: int, paginas: int,
+                              password: str = None, limites: dict = None) -> dict:
+    """
+    `vista_previa.previsualizar` en el proceso hijo. Del presupuesto del
+    banco valen tiempo y memoria: el de páginas no, porque la vista previa
+    lee solo las primeras aunque el PDF tenga miles.
+    """
+    if not aislado():
+        return previsualizar(get_parser(banco), pdf_path, filas=filas, paginas=paginas,
+                             options={"password": password})
+
+    if limites is None:
+        limites = dict(presupuesto(banco, get_parser(banco)), paginas=None)
+    with _hijo(banco, pdf_path, password, limites, ("vista", filas, paginas)) as (proc, recibir):
+        for tipo, dato in _mensajes(proc, recibir, limites):
+            if tipo == "ok":
+                return dato
@@ -0,0 +1,98 @@
+# parsers/progreso.py
+#
+# Progreso del parseo (páginas hechas / total, filas, cuenta actual) para
+# mostrarlo en vivo en la web.
+#
+# Los parsers no reciben ningún parámetro nuevo: el callback vive en un
+# ContextVar que fija quien llama,
+#
+#   with seguir_progreso(lambda ev: print(ev)):
+#       parser.parse(pdf_path)
+#
+# y los puntos de avance ya están en el camino común:
+#   - utils.iter_pages          → pagina_procesada(idx, total)
+#   - Movimientos.agregar       → fila_agregada()
+#   - parsers que detectan cuenta → cuenta_actual(label)
+#   - presupuesto.parse_supervisado → reflejar(evento) con lo que manda el hijo
+#
+# Sin `seguir_progreso` activo cada aviso es un ContextVar.get() y nada más.
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+_actual = contextvars.ContextVar("progreso", default=None)
+
+
+class Progreso:
+    """Estado acumulado del parseo; llama a `callback(evento)` al avanzar de página."""
+
+    __slots__ = ("callback", "intervalo", "pagina", "paginas", "filas", "cuenta", "_ultimo")
+
+    def __init__(self, callback, intervalo: float = 0.0):
+        self.callback  = callback
+        self.intervalo = intervalo
+        self.pagina    = 0
+        self.paginas   = 0
+        self.filas     = 0
+        self.cuenta    = None
+        self._ultimo   = 0.0
+
+    def evento(self) -> dict:
+        return {"pagina": self.pagina, "paginas": self.paginas, "filas": self.filas, "cuenta": self.cuenta}
+
+    def emitir(self, forzar: bool = False) -> None:
+        """Avisa al callback, como mucho una vez cada `intervalo` segundos."""
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo < self.intervalo:
+            return
+        self._ultimo = ahora
+        try:
+            self.callback(self.evento())
+        except Exception as e:
+            # Un callback roto no debe cortar el parseo
+            print(f"⚠️ Callback de progreso falló: {e}")
+
+
+@contextmanager
+def seguir_progreso(callback, intervalo: float = 0.2):
+    """Activa `callback` para todo parseo que corra dentro del bloque."""
+    progreso = Progreso(callback, intervalo)
+    token = _actual.set(progreso)
+    try:
+        yield progreso
+    finally:
+        _actual.reset(token)
+        progreso.emitir(forzar=True)
+
+
+def pagina_procesada(idx: int, total: int) -> None:
+    p = _actual.get()
+    if p is not None:
+        p.pagina  = idx + 1
+        p.paginas = total
+        p.emitir(forzar=(idx + 1 == total))
+
+
+def fila_agregada(n: int = 1) -> None:
+    p = _actual.get()
+    if p is not None:
+        p.filas += n
+
+
+def cuenta_actual(label: str) -> None:
+    p = _actual.get()
+    if p is not None and label != p.cuenta:
+        p.cuenta = label
+        p.emitir(forzar=True)
+
+
+def reflejar(evento: dict) -> None:
+    """Copia un evento de otro proceso (parseo supervisado) al progreso activo."""
+    p = _actual.get()
+    if p is not None:
+        p.pagina  = evento.get("pagina", p.pagina)
+        p.paginas = evento.get("paginas", p.paginas)
+        p.filas   = evento.get("filas", p.filas)
+        p.cuenta  = evento.get("cuenta", p.cuenta)
+        p.emitir(forzar=True)      # el hijo ya espació sus avisos
@@ -0,0 +1,112 @@
+# parsers/traza.py
+#
+# Modo traza: un registro JSONL por línea del extracto con las palabras, sus
+# coordenadas, la columna asignada y la decisión que tomó el parser, para
+# diagnosticar un parseo sin agregar prints (los viejos DEBUG-XY).
+#
+#   with trazar("traza.jsonl"):
+#       parser.parse(pdf_path)
+#
+#   python main.py --banco Nacion --carpeta pdfs/ --traza traza.jsonl
+#
+# En la web: campo `traza=1` en /process (ver web_app.py).
+#
+# Igual que `progreso`, la traza vive en un ContextVar: los parsers no
+# reciben parámetros nuevos. Los puntos de traza leen el ContextVar una vez
+# por página y, si está apagada, cada línea cuesta una comparación con None.
+#
+# Registros:
+#   {"tipo": "linea", "pagina": 3, "y": 412.5, "decision": "nuevo",
+#    "palabras": [{"t": "01/10/25", "x0": 65.1, "x1": 98.2, "col": "date_x"}, ...]}
+#   {"tipo": "pagina_salteada", "pagina": 7, "motivo": "sonda"}
+#   {"tipo": "cuenta", "cuenta": "Cta. 123"}
+#   {"tipo": "pdf", "pdf": "2025-10.pdf"}        (main.py, antes de cada PDF)
+#
+# Decisiones del motor declarativo (engine.py): antes_del_inicio, inicio,
+# fin, transporte, excluida, encabezado, nuevo, continuacion,
+# submovimiento, ignorada. Los parsers propios de cada banco registran las
+# líneas con decision = null (solo palabras y coordenadas).
+
+import contextvars
+import json
+from contextlib import contextmanager
+
+import numpy as np
+
+_actual = contextvars.ContextVar("traza", default=None)
+
+
+class Traza:
+    """Destino de los registros; `lineas_propias` lo marca quien traza sus líneas con decisiones."""
+
+    __slots__ = ("_f", "_propio", "lineas_propias", "registros")
+
+    def __init__(self, destino):
+        if hasattr(destino, "write"):
+            self._f, self._propio = destino, False
+        else:
+            self._f, self._propio = open(destino, "w", encoding="utf-8"), True
+        self.lineas_propias = False
+        self.registros = 0
+
+    def escribir(self, registro: dict) -> None:
+        self._f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.registros += 1
+
+    def volcar(self, texto: str) -> None:
+        """Registros ya serializados (los que reenvía el parseo supervisado)."""
+        self._f.write(texto)
+        self.registros += texto.count("\n")
+
+    def evento(self, tipo: str, **datos) -> None:
+        self.escribir({"tipo": tipo, **datos})
+
+    def linea(self, pagina: int, y: float, textos, x0s, x1s, columnas, decision: str = None) -> None:
+        """`columnas`: nombre de la columna de cada palabra (o None)."""
+        self.escribir({
+            "tipo": "linea",
+            "pagina": pagina,
+            "y": round(float(y), 1),
+            "decision": decision,
+            "palabras": [
+                {"t": t, "x0": round(float(a), 1), "x1": round(float(b), 1), "col": c}
+                for t, a, b, c in zip(textos, x0s, x1s, columnas)
+            ],
+        })
+
+    def palabras_pagina(self, idx: int, words: list) -> None:
+        """Líneas crudas de una página (parsers sin traza propia): agrupadas por top redondeado."""
+        if self.lineas_propias or not words:
+            return
+        top = np.fromiter((w["top"] for w in words), float, len(words))
+        x0  = np.fromiter((w["x0"] for w in words), float, len(words))
+        clave = np.round(top)
+        orden = np.lexsort((x0, clave))
+        cortes = np.flatnonzero(np.diff(clave[orden]) != 0) + 1
+        for grupo in np.split(orden, cortes):
+            ws = [words[i] for i in grupo.tolist()]
+            self.linea(idx + 1, ws[0]["top"], [w["text"] for w in ws],
+                       [w["x0"] for w in ws], [w["x1"] for w in ws], [None] * len(ws))
+
+    def close(self) -> None:
+        if self._propio:
+            self._f.close()
+        else:
+            self._f.flush()
+
+
+def traza_actual() -> Traza | None:
+    """La traza activa o None (lo único que pagan los parsers con la traza apagada)."""
+    return _actual.get()
+
+
+@contextmanager
+def trazar(destino):
+    """Activa la traza para todo parseo dentro del bloque. `destino`: ruta o archivo abierto."""
+    traza = Traza(destino)
+    token = _actual.set(traza)
+    try:
+        yield traza
+    finally:
+        _actual.reset(token)
+        traza.close()
@@ -1,8 +1,19 @@
+import numpy as np
 import pandas as pd
 import pdfplumber
+import pypdfium2 as pdfium
 import sys
 from PyPDF2 import PdfReader
+import contextvars
+import gc
 import os
+import re
+import threading
+from contextlib import contextmanager
+
+from .progreso import pagina_procesada
+from .traza import traza_actual
+from .vista_previa import pagina_permitida, pagina_leida
 
 # ✅ Parámetro para definir el layout contable
 
@@ -68,6 +79,45 @@ def calcular_saldos(
     return df
 
 
+class SaldoCorriente:
+    """
+    Versión incremental de `calcular_saldos` para movimientos que llegan de
+    a uno (parse_iter): mismas reglas de fila de inicio y de layout.
+
+        saldos = SaldoCorriente(es_layout_invertido=False, saldo_arranca_en_fila_1=True)
+        calc, dif = saldos.agregar(debito, credito, saldo)
+    """
+
+    __slots__ = ("invertido", "arranca_en_1", "filas", "inconsistencias", "_saldo")
+
+    def __init__(self, es_layout_invertido: bool = False, saldo_arranca_en_fila_1: bool = False):
+        self.invertido       = es_layout_invertido
+        self.arranca_en_1    = saldo_arranca_en_fila_1
+        self.filas           = 0
+        self.inconsistencias = 0
+        self._saldo          = None
+
+    def agregar(self, debito: float, credito: float, saldo: float) -> tuple:
+        """Devuelve (Saldo Calculado, Diferencia) de la fila; (None, None) antes del inicio."""
+        primera = self.filas == 0
+        self.filas += 1
+
+        if self._saldo is None:
+            # La primera fila en cero (encabezado sin saldo) no cuenta como base
+            if primera and not self.arranca_en_1 and saldo == 0 and credito == 0 and debito == 0:
+                return None, None
+            self._saldo = round(saldo, 2)
+        elif self.invertido:
+            self._saldo = round(self._saldo + credito - debito, 2)
+        else:
+            self._saldo = round(self._saldo + debito - credito, 2)
+
+        diferencia = saldo - self._saldo
+        if abs(diferencia) > 0.01:
+            self.inconsistencias += 1
+        return self._saldo, diferencia
+
+
 def reportar_inconsistencias(df: pd.DataFrame) -> None:
     """
     Imprime en consola las filas donde la diferencia absoluta
@@ -86,21 +136,59 @@ def reportar_inconsistencias(df: pd.DataFrame) -> None:
 # Cache en memoria: contraseña para PDFs cifrados
 _cached_pdf_password = None
 
-def open_pdf(pdf_path: str, password: str = None):
+# Contraseña del pedido en curso (web): la ven los parsers que no reciben
+# `password` sin tocar os.environ, que es compartido entre hilos
+_password_pedido = contextvars.ContextVar("password_pedido", default=None)
+
+
+@contextmanager
+def con_password(password: str = None):
+    """Dentro del bloque, `open_pdf` prueba `password` aunque el parser no la pase."""
+    token = _password_pedido.set(password or None)
+    try:
+        yield
+    finally:
+        _password_pedido.reset(token)
+
+
+def _password_candidates(password: str = None) -> list[str]:
+    """Contraseñas a probar, en orden de prioridad y sin repetir."""
+    passwords_to_try = []
+
+    # 1. Contraseña proporcionada directamente (o la del pedido en curso)
+    for candidata in (password, _password_pedido.get()):
+        if candidata and candidata not in passwords_to_try:
+            passwords_to_try.append(candidata)
+
+    # 2. Contraseña desde variable de entorno (desde el formulario web)
+    env_password = os.environ.get('PDF_PASSWORD')
+    if env_password and env_password not in passwords_to_try:
+        passwords_to_try.append(env_password)
+
+    # 3. Contraseña cacheada
+    if _cached_pdf_password and _cached_pdf_password not in passwords_to_try:
+        passwords_to_try.append(_cached_pdf_password)
+
+    return passwords_to_try
+
+
+def open_pdf(pdf_path: str, password: str = None, backend: str = None):
     """
     Abre un PDF con pdfplumber.
     
     VERSIÓN WEB: Si el PDF está cifrado, intenta usar:
-    1. La contraseña proporcionada como parámetro
+    1. La contraseña proporcionada como parámetro (o la de `con_password`)
     2. La contraseña en la variable de entorno PDF_PASSWORD
     3. La contraseña cacheada en memoria
     
     Args:
         pdf_path: Ruta al archivo PDF
         password: Contraseña del PDF (opcional, solo si está cifrado)
+        backend: "pdfplumber" o "pdfium" (por defecto PDF_BACKEND o pdfplumber,
+                 ver parsers/backends.py)
     
     Returns:
-        Objeto pdfplumber PDF
+        Objeto pdfplumber PDF (o PdfiumPDF, con la misma interfaz)
         
     Raises:
         RuntimeError: Si el PDF está cifrado y no se proporcionó contraseña válida
@@ -110,27 +198,25 @@ def open_pdf(pdf_path: str, password: str = None):
     full_path = os.path.abspath(pdf_path)
     print(f"🔍 [DEBUG] open_pdf invocado para: {full_path}")
 
+    from .backends import resolve_backend, PdfiumPDF
+    if resolve_backend(backend) == "pdfium":
+        try:
+            pdf = PdfiumPDF(full_path, password)
+        except RuntimeError:
+            raise RuntimeError(
+                "Este PDF está protegido con contraseña o no se puede leer. "
+                "Por favor, verifique la contraseña e intente nuevamente."
+            )
+        print(f"   ✅ Abierto con pdfium: {full_path}")
+        return pdf
+
     reader = PdfReader(full_path)
     
     # Verificar si está cifrado
     if getattr(reader, "is_encrypted", False):
         print("🔒 PDF cifrado detectado")
         
-        # Lista de contraseñas a probar (en orden de prioridad)
-        passwords_to_try = []
-        
-        # 1. Contraseña proporcionada directamente
-        if password:
-            passwords_to_try.append(password)
-            
-        # 2. Contraseña desde variable de entorno (desde el formulario web)
-        env_password = os.environ.get('PDF_PASSWORD')
-        if env_password and env_password not in passwords_to_try:
-            passwords_to_try.append(env_password)
-            
-        # 3. Contraseña cacheada
-        if _cached_pdf_password and _cached_pdf_password not in passwords_to_try:
-            passwords_to_try.append(_cached_pdf_password)
+        passwords_to_try = _password_candidates(password)
 
         # Intentar con cada contraseña
         for idx, pwd in enumerate(passwords_to_try):
@@ -156,3 +242,337 @@ def open_pdf(pdf_path: str, password: str = None):
     pdf = pdfplumber.open(full_path)
     print(f"   ✅ Abierto sin cifrar: {full_path}")
     return pdf
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Sonda de texto rápida (pdfium)
+# ──────────────────────────────────────────────────────────────────────────
+#
+# pdfium devuelve el texto plano de una página sin análisis de layout, varias
+# veces más rápido que `extract_text()` / `extract_words()` de pdfminer.
+# Alcanza para buscar marcadores ("DETALLE DE MOVIMIENTO"), el número de
+# cuenta y decidir qué páginas vale la pena pasar por pdfplumber.
+#
+#   with PdfProbe(pdf_path, fallback=pdf) as probe:
+#       inicio = probe.find("DETALLE DE MOVIMIENTO", pages=range(5))
+#       cuenta = probe.search(r"Cta\.\s*([\d.]+)", pages=range(2))
+#       tipos  = probe.classify({"inicio": "SALDO ANTERIOR", "tabla": FECHA_RE})
+
+# pdfium no es thread-safe: el servidor web puede procesar varios PDFs a la vez
+_PDFIUM_LOCK = threading.RLock()
+
+
+def _open_pdfium(pdf_path: str, password: str = None):
+    """Abre el PDF con pdfium probando sin contraseña y luego las candidatas."""
+    full_path = os.path.abspath(pdf_path)
+    for pwd in [None] + _password_candidates(password):
+        try:
+            with _PDFIUM_LOCK:
+                return pdfium.PdfDocument(full_path, password=pwd)
+        except pdfium.PdfiumError:
+            continue
+    raise RuntimeError(f"pdfium no pudo abrir el PDF: {full_path}")
+
+
+class PdfProbe:
+    """
+    Texto plano por página (espacios normalizados, en mayúsculas), leído a
+    demanda y cacheado.
+
+    Si pdfium no puede abrir el archivo y se pasa `fallback` (un PDF de
+    pdfplumber ya abierto) se usa su `extract_text()` (lento: `rapida` queda
+    en False); sin fallback las páginas quedan vacías.
+    """
+
+    __slots__ = ("_doc", "_fallback", "_textos", "_n")
+
+    def __init__(self, pdf_path: str, password: str = None, fallback=None):
+        self._fallback = fallback
+        try:
+            self._doc = _open_pdfium(pdf_path, password)
+            with _PDFIUM_LOCK:
+                self._n = len(self._doc)
+        except RuntimeError as e:
+            print(f"⚠️ Sonda pdfium no disponible: {e}")
+            self._doc = None
+            self._n = len(fallback.pages) if fallback is not None else 0
+        self._textos = [None] * self._n
+
+    def __enter__(self) -> "PdfProbe":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def rapida(self) -> bool:
+        """True si el texto sale de pdfium (barato de leer completo)."""
+        return self._doc is not None
+
+    def close(self) -> None:
+        if self._doc is not None:
+            with _PDFIUM_LOCK:
+                self._doc.close()
+            self._doc = None
+
+    def text(self, idx: int) -> str:
+        """Texto plano de la página `idx` (0-based)."""
+        txt = self._textos[idx]
+        if txt is None:
+            if self._doc is not None:
+                with _PDFIUM_LOCK:
+                    page = self._doc[idx]
+                    tp   = page.get_textpage()
+                    raw  = tp.get_text_bounded()
+                    tp.close()
+                    page.close()
+            elif self._fallback is not None:
+                raw = self._fallback.pages[idx].extract_text() or ""
+            else:
+                raw = ""
+            txt = self._textos[idx] = " ".join(raw.split()).upper()
+        return txt
+
+    def _indices(self, pages):
+        if pages is None:
+            return range(self._n)
+        return (i for i in pages if 0 <= i < self._n)
+
+    def find(self, marker, pages=None) -> int | None:
+        """Primera página (de `pages`) que contiene `marker` (texto o regex)."""
+        es_texto = isinstance(marker, str)
+        for i in self._indices(pages):
+            txt = self.text(i)
+            if (marker.upper() in txt) if es_texto else marker.search(txt):
+                return i
+        return None
+
+    def search(self, pattern, pages=None, group: int = 1) -> str | None:
+        """Primer match de `pattern` (sin distinguir mayúsculas) en `pages`."""
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, re.IGNORECASE)
+        for i in self._indices(pages):
+            m = pattern.search(self.text(i))
+            if m:
+                return m.group(group)
+        return None
+
+    def classify(self, rules: dict, pages=None) -> list[frozenset]:
+        """
+        Etiquetas de cada página según `rules` ({etiqueta: texto o regex}).
+        Una página puede tener varias etiquetas o ninguna.
+        """
+        compiladas = {
+            k: re.compile(re.escape(v.upper())) if isinstance(v, str) else v
+            for k, v in rules.items()
+        }
+        return [
+            frozenset(k for k, rx in compiladas.items() if rx.search(self.text(i)))
+            for i in self._indices(pages)
+        ]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Páginas en streaming con techo de memoria
+# ──────────────────────────────────────────────────────────────────────────
+#
+# pdfplumber guarda en cada `Page` sus chars, objetos y layout hasta que se
+# cierra el PDF: recorrer un resumen anual de 600 páginas deja todo eso vivo.
+# `iter_pages` entrega una página por vez y la libera (`page.close()`) apenas
+# el parser pide la siguiente. Opcionalmente controla el RSS del proceso
+# (PDF_MAX_RSS_MB o `max_rss_mb`) y corta con LimiteMemoriaError.
+
+class LimiteMemoriaError(RuntimeError):
+    """El proceso superó el techo de memoria configurado durante el parseo."""
+
+
+def rss_mb(pid: int = None) -> float | None:
+    """Memoria residente del proceso (o de `pid`) en MB (None si no hay /proc, p. ej. Windows)."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            paginas = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _limite_rss(max_rss_mb: float = None) -> float | None:
+    if max_rss_mb:
+        return float(max_rss_mb)
+    env = os.environ.get("PDF_MAX_RSS_MB", "").strip()
+    try:
+        return float(env) if env else None
+    except ValueError:
+        print(f"⚠️ PDF_MAX_RSS_MB inválido: {env!r} (se ignora)")
+        return None
+
+
+def _controlar_memoria(limite: float | None, idx: int) -> None:
+    if limite is None:
+        return
+    uso = rss_mb()
+    if uso is None or uso <= limite:
+        return
+    gc.collect()
+    uso = rss_mb()
+    if uso > limite:
+        raise LimiteMemoriaError(
+            f"El PDF es demasiado grande para procesarlo: se superó el límite de memoria "
+            f"({uso:.0f} MB > {limite:.0f} MB) en la página {idx + 1}."
+        )
+
+
+def iter_pages(pdf, pages=None, max_rss_mb: float = None):
+    """
+    Genera (idx, page) de `pages` (índices, por defecto todas) y cierra cada
+    página cuando se pide la siguiente, así sus caches no se acumulan.
+    """
+    limite  = _limite_rss(max_rss_mb)
+    indices = range(len(pdf.pages)) if pages is None else pages
+    for idx in indices:
+        # Vista previa: se corta cuando se agota el cupo (vista_previa.py)
+        if not pagina_permitida():
+            break
+        page = pdf.pages[idx]
+        try:
+            yield idx, page
+        finally:
+            page.close()
+        pagina_leida()
+        pagina_procesada(idx, len(pdf.pages))
+        _controlar_memoria(limite, idx)
+
+
+def iter_page_words(pdf, pages=None, top: float = 0, max_rss_mb: float = None, **extract_kwargs):
+    """
+    Genera (idx, words) de a una página. Con `top` > 0 recorta el
+    encabezado igual que `within_bbox((0, top, width, height))`.
+    """
+    traza = traza_actual()
+    for idx, page in iter_pages(pdf, pages, max_rss_mb):
+        area = page.within_bbox((0, top, page.width, page.height)) if top else page
+        words = area.extract_words(**extract_kwargs)
+        if traza is not None:
+            traza.palabras_pagina(idx, words)
+        yield idx, words
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Tabla columnar de palabras (documento completo)
+# ──────────────────────────────────────────────────────────────────────────
+
+def band_edges(layout: dict, keys: tuple) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte los rangos X del perfil en bordes para `np.searchsorted`.
+
+    Devuelve (edges, labels): `labels[i]` es el índice en `keys` de la
+    columna que cubre el intervalo [edges[i], edges[i+1]), o -1.
+    Si dos rangos se solapan gana el primero de `keys`, igual que la
+    cadena if/elif de los parsers.
+    """
+    edges = sorted({v for k in keys for v in layout[k]})
+    labels = []
+    for lo, hi in zip(edges, edges[1:]):
+        label = -1
+        for i, k in enumerate(keys):
+            a, b = layout[k]
+            if a <= lo and hi <= b:
+                label = i
+                break
+        labels.append(label)
+    return np.asarray(edges, dtype=float), np.asarray(labels, dtype=np.int8)
+
+
+class WordTable:
+    """
+    Palabras de un documento en formato columnar.
+
+    En lugar de una lista de dicts por palabra guarda arrays NumPy
+    (x0, x1, top, bottom, page) y un array con los textos internados.
+    `build_lines()` ordena todo por (página, línea, x0) con un solo lexsort.
+    """
+
+    __slots__ = ("x0", "x1", "top", "bottom", "page", "text", "line", "_starts")
+
+    def __init__(self, x0, x1, top, bottom, page, text):
+        self.x0     = np.asarray(x0, dtype=float)
+        self.x1     = np.asarray(x1, dtype=float)
+        self.top    = np.asarray(top, dtype=float)
+        self.bottom = np.asarray(bottom, dtype=float)
+        self.page   = np.asarray(page, dtype=np.int32)
+        self.text   = np.asarray(text, dtype=object)
+        self.line   = None
+        self._starts = None
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @classmethod
+    def from_words(cls, pages_words) -> "WordTable":
+        """Construye la tabla a partir de pares (índice de página, words)."""
+        x0, x1, top, bottom, page, text = [], [], [], [], [], []
+        for idx, words in pages_words:
+            n = len(words)
+            if not n:
+                continue
+            x0.append(np.fromiter((w["x0"] for w in words), float, n))
+            x1.append(np.fromiter((w["x1"] for w in words), float, n))
+            top.append(np.fromiter((w["top"] for w in words), float, n))
+            bottom.append(np.fromiter((w["bottom"] for w in words), float, n))
+            page.append(np.full(n, idx, dtype=np.int32))
+            text.extend(sys.intern(w["text"]) for w in words)
+        if not text:
+            return cls([], [], [], [], [], [])
+        return cls(np.concatenate(x0), np.concatenate(x1), np.concatenate(top),
+                   np.concatenate(bottom), np.concatenate(page), text)
+
+    @classmethod
+    def from_pdf(cls, pdf, pages=None, top: float = 0, **extract_kwargs) -> "WordTable":
+        """
+        Extrae las palabras de `pages` (índices, por defecto todas).
+        Con `top` > 0 se recorta el encabezado igual que `within_bbox`.
+        Los dicts de cada página se descartan apenas se copian a los arrays
+        y la página se cierra (ver `iter_pages`).
+        """
+        return cls.from_words(iter_page_words(pdf, pages, top, **extract_kwargs))
+
+    def build_lines(self, y_step: float = 1.0) -> "WordTable":
+        """
+        Asigna un id de línea a cada palabra agrupando por round(top / y_step)
+        dentro de cada página, y reordena la tabla por (página, línea, x0).
+        """
+        if not len(self):
+            self.line = np.zeros(0, dtype=np.int64)
+            self._starts = np.zeros(1, dtype=np.int64)
+            return self
+        key = np.round(self.top / y_step)
+        order = np.lexsort((self.x0, key, self.page))
+        for name in ("x0", "x1", "top", "bottom", "page", "text"):
+            setattr(self, name, getattr(self, name)[order])
+        key = key[order]
+        change = (np.diff(self.page) != 0) | (np.diff(key) != 0)
+        self.line = np.concatenate(([0], np.cumsum(change)))
+        self._starts = np.concatenate(([0], np.flatnonzero(change) + 1, [len(self)]))
+        return self
+
+    def lines(self):
+        """Itera (inicio, fin) de cada línea, en orden de lectura."""
+        if self._starts is None:
+            self.build_lines()
+        starts = self._starts
+        return zip(starts[:-1].tolist(), starts[1:].tolist())
+
+    def classify(self, layout: dict, keys: tuple, by: str = "x0") -> np.ndarray:
+        """
+        Índice de columna (en `keys`) de cada palabra, o -1 si no cae en
+        ningún rango. `by="x1"` clasifica por borde derecho (columnas
+        alineadas a la derecha).
+        """
+        edges, labels = band_edges(layout, keys)
+        x = getattr(self, by)
+        pos = np.searchsorted(edges, x, side="right") - 1
+        valid = (pos >= 0) & (pos < len(labels))
+        return np.where(valid, labels[np.clip(pos, 0, max(len(labels) - 1, 0))], -1)
@@ -0,0 +1,85 @@
+# parsers/validacion.py
+#
+# Resumen de validación de un extracto sin armar el Excel: si reconcilia
+# (ninguna fila con |Diferencia| > 0,01, el mismo criterio que
+# reportar_inconsistencias), y por cuenta filas, saldos de apertura y cierre,
+# totales y las filas inconsistentes.
+#
+#   resumen = resumir(parser.parse(pdf_path))
+#   {"reconcilia": false,
+#    "cuentas": [{"cuenta": "Cta. 123", "filas": 121,
+#                 "saldo_apertura": 100000.0, "saldo_cierre": 83072.28,
+#                 "saldo_final_extracto": 83073.28,
+#                 "total_debitos": ..., "total_creditos": ...,
+#                 "inconsistencias": 1,
+#                 "filas_inconsistentes": [{"fila": 120, "Fecha": "2025-10-03", ...}]}]}
+#
+# Lo usan /validate (web_app.py) y `main.py --validar`.
+
+import numpy as np
+import pandas as pd
+
+from .consolidacion import _Extracto
+from .streaming import _valor
+
+TOLERANCIA = 0.01
+MAX_FILAS = 100         # filas inconsistentes listadas por cuenta
+COLUMNAS_FILA = ("Fecha", "Descripción", "Débito", "Crédito", "Saldo", "Saldo Calculado", "Diferencia")
+
+
+def _redondear(v):
+    v = _valor(v)
+    return round(float(v), 2) if isinstance(v, float) else v
+
+
+def _resumir_cuenta(cuenta: str, df: pd.DataFrame) -> dict:
+    resumen = {
+        "cuenta": cuenta,
+        "filas": len(df),
+        "saldo_apertura": None,
+        "saldo_cierre": None,
+        "saldo_final_extracto": None,
+        "total_debitos": None,
+        "total_creditos": None,
+        "inconsistencias": 0,
+        "filas_inconsistentes": [],
+    }
+    for col, clave in (("Débito", "total_debitos"), ("Crédito", "total_creditos")):
+        if col in df.columns:
+            resumen[clave] = round(float(pd.to_numeric(df[col], errors="coerce").sum()), 2)
+    if "Saldo" in df.columns:
+        saldos = pd.to_numeric(df["Saldo"], errors="coerce").dropna()
+        if not saldos.empty:
+            resumen["saldo_final_extracto"] = round(float(saldos.iloc[-1]), 2)
+
+    if df.empty or "Saldo Calculado" not in df.columns or "Diferencia" not in df.columns:
+        return resumen
+
+    if {"Fecha", "Débito", "Crédito"} <= set(df.columns):
+        # Saldo antes del primer movimiento, con el sentido que usa la consolidación
+        extracto = _Extracto(cuenta, 0, df)
+        apertura = extracto.apertura(np.ones(len(extracto.df), dtype=bool))
+        resumen["saldo_apertura"] = None if apertura is None else float(apertura)
+    calc = pd.to_numeric(df["Saldo Calculado"], errors="coerce").dropna()
+    if not calc.empty:
+        resumen["saldo_cierre"] = round(float(calc.iloc[-1]), 2)
+
+    malas = np.flatnonzero((pd.to_numeric(df["Diferencia"], errors="coerce").abs() > TOLERANCIA).to_numpy())
+    resumen["inconsistencias"] = int(len(malas))
+    columnas = [c for c in COLUMNAS_FILA if c in df.columns]
+    for i in malas[:MAX_FILAS].tolist():
+        fila = {"fila": i}
+        fila.update((c, _redondear(df[c].iat[i])) for c in columnas)
+        resumen["filas_inconsistentes"].append(fila)
+    return resumen
+
+
+def resumir(resultado) -> dict:
+    """Resultado de parse() (dict cuenta → DataFrame o un DataFrame) → resumen JSON-serializable."""
+    if isinstance(resultado, pd.DataFrame):
+        resultado = {"Cuenta": resultado}
+    cuentas = [_resumir_cuenta(str(label), df) for label, df in (resultado or {}).items()]
+    return {
+        "reconcilia": bool(cuentas) and all(c["inconsistencias"] == 0 for c in cuentas),
+        "cuentas": cuentas,
+    }
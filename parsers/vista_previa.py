@@ -0,0 +1,122 @@
+# parsers/vista_previa.py
+#
+# Vista previa rápida: las primeras filas de un extracto sin parsearlo entero,
+# para confirmar que se eligió el banco correcto y que las columnas caen donde
+# deben antes de lanzar el parseo completo.
+#
+#   vista = previsualizar(get_parser("Nacion"), "extracto.pdf", filas=20)
+#   {"cuentas": ["Cta. 123"], "columnas": ["Cuenta", "Fecha", ...],
+#    "filas": [{"Cuenta": "Cta. 123", "Fecha": "2025-10-01", ...}, ...],
+#    "paginas_leidas": 2, "completo": false, "segundos": 0.31}
+#
+# Los parsers no reciben ningún parámetro nuevo: el cupo vive en un ContextVar
+# que miran los puntos comunes del recorrido,
+#   - utils.iter_pages        → pagina_permitida() antes de cada página y
+#                               pagina_leida() después
+#   - Movimientos.agregar     → fila_leida()
+#   - engine._recorrer        → corta el loop de páginas y no extrae en paralelo
+#
+# Cada parser sigue arrancando donde siempre (buscar_desde_pagina, la página
+# detectada por la sonda o las páginas útiles del motor); desde ahí se leen
+# como mucho `paginas` páginas con movimientos, hasta juntar `filas` filas. Si
+# en las primeras SIN_FILAS páginas no aparece ningún movimiento (banco
+# equivocado) se corta ahí. Sin cupo activo cada aviso es un ContextVar.get().
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+from .streaming import iter_movimientos, _valor
+
+FILAS = 20
+PAGINAS = 2
+SIN_FILAS = 3           # páginas sin ningún movimiento antes de rendirse
+
+_actual = contextvars.ContextVar("vista_previa", default=None)
+
+
+class Cupo:
+    """Páginas y filas que quedan por leer en una vista previa."""
+
+    __slots__ = ("filas", "paginas", "sin_filas", "filas_leidas", "paginas_leidas", "paginas_con_filas", "agotado")
+
+    def __init__(self, filas: int = FILAS, paginas: int = PAGINAS, sin_filas: int = SIN_FILAS):
+        self.filas     = filas
+        self.paginas   = paginas
+        self.sin_filas = sin_filas
+        self.filas_leidas      = 0
+        self.paginas_leidas    = 0
+        self.paginas_con_filas = 0
+        self.agotado   = False
+
+    def permite(self) -> bool:
+        if (self.filas_leidas >= self.filas
+                or self.paginas_con_filas >= self.paginas
+                or (not self.filas_leidas and self.paginas_leidas >= self.sin_filas)):
+            self.agotado = True
+        return not self.agotado
+
+
+@contextmanager
+def limitar(filas: int = FILAS, paginas: int = PAGINAS, sin_filas: int = SIN_FILAS):
+    """Todo parseo que corra dentro del bloque se detiene al agotar el cupo."""
+    cupo = Cupo(filas, paginas, sin_filas)
+    token = _actual.set(cupo)
+    try:
+        yield cupo
+    finally:
+        _actual.reset(token)
+
+
+def activa() -> bool:
+    return _actual.get() is not None
+
+
+def pagina_permitida() -> bool:
+    c = _actual.get()
+    return c is None or c.permite()
+
+
+def pagina_leida() -> None:
+    c = _actual.get()
+    if c is not None:
+        c.paginas_leidas += 1
+        if c.filas_leidas:
+            c.paginas_con_filas += 1
+
+
+def fila_leida() -> None:
+    c = _actual.get()
+    if c is not None:
+        c.filas_leidas += 1
+
+
+def previsualizar(parser, pdf_path: str, filas: int = FILAS, paginas: int = PAGINAS, options: dict = None) -> dict:
+    """Primeras `filas` filas del extracto (leyendo como mucho `paginas` páginas con movimientos)."""
+    t0 = time.monotonic()
+    cuentas, columnas, salida = [], ["Cuenta"], []
+    with limitar(filas, paginas) as cupo:
+        registros = iter_movimientos(parser, pdf_path, options)
+        try:
+            for cuenta, mov in registros:
+                if cuenta not in cuentas:
+                    cuentas.append(cuenta)
+                columnas.extend(c for c in mov if c not in columnas)
+                fila = {"Cuenta": cuenta}
+                fila.update((k, _valor(v)) for k, v in mov.items())
+                salida.append(fila)
+                if len(salida) >= filas:
+                    cupo.agotado = True
+                    break
+        finally:
+            # Cierra el recorrido del parser (y su PDF) si quedó a mitad
+            registros.close()
+
+    return {
+        "cuentas": cuentas,
+        "columnas": columnas if salida else [],
+        "filas": salida,
+        "paginas_leidas": cupo.paginas_leidas,
+        "completo": not cupo.agotado,
+        "segundos": round(time.monotonic() - t0, 3),
+    }
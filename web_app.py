@@ -1,12 +1,27 @@
-from flask import Flask, render_template, request, send_file, jsonify
+from flask import Flask, render_template, request, send_file, jsonify, Response, stream_with_context, after_this_request
 from werkzeug.utils import secure_filename
 import os
 import tempfile
 from pathlib import Path
 import traceback
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from collections import deque
+from contextlib import contextmanager, nullcontext
+import secrets
 import pandas as pd
 import counter
 from parsers import get_parser
+from parsers.utils import LimiteMemoriaError
+from parsers.streaming import iter_csv, iter_jsonl
+from parsers.progreso import seguir_progreso
+from parsers.traza import trazar
+from parsers.presupuesto import (parse_supervisado, iter_supervisado, previsualizar_supervisado,
+                                 PresupuestoExcedido)
+from parsers.validacion import resumir
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
@@ -14,6 +29,324 @@ app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
 
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# ── Vista previa (/preview) ─────────────────────────────────────────────────
+PREVIEW_FILAS = 20          # filas por defecto
+PREVIEW_PAGINAS = 2         # páginas con movimientos por defecto
+PREVIEW_MAX_FILAS = 100
+PREVIEW_MAX_PAGINAS = 5
+
+# ── Progreso en vivo (/progress/<job_id>, Server-Sent Events) ──────────────
+# El navegador genera un job_id, abre el EventSource y lo manda junto con el
+# PDF a /process; el parseo publica acá su avance y el SSE lo reenvía.
+JOB_ID_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+PROGRESS_TTL = 300          # segundos que se guarda un job terminado
+PROGRESS_ESPERA = 60        # cuánto espera el SSE a que arranque /process
+
+class ProgressJobs:
+    """Último evento de cada job, con una Condition para despertar a los SSE."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._jobs = {}     # job_id -> {"evento": dict, "version": int, "fin": bool, "t": float}
+
+    def publicar(self, job_id, evento, fin=False):
+        with self._cond:
+            job = self._jobs.setdefault(job_id, {"evento": {}, "version": 0, "fin": False, "t": 0})
+            job["evento"] = {**job["evento"], **evento}
+            job["version"] += 1
+            job["fin"] = fin
+            job["t"] = time.monotonic()
+            self._purgar()
+            self._cond.notify_all()
+
+    def esperar(self, job_id, version, timeout):
+        """(version, evento, fin) cuando hay algo más nuevo que `version`, o None al vencer."""
+        with self._cond:
+            hay_novedad = lambda: self._jobs.get(job_id, {}).get("version", 0) > version
+            if not self._cond.wait_for(hay_novedad, timeout=timeout):
+                return None
+            job = self._jobs[job_id]
+            return job["version"], dict(job["evento"]), job["fin"]
+
+    def _purgar(self):
+        limite = time.monotonic() - PROGRESS_TTL
+        for k in [k for k, j in self._jobs.items() if j["fin"] and j["t"] < limite]:
+            del self._jobs[k]
+
+progress_jobs = ProgressJobs()
+
+# ── Control de admisión ─────────────────────────────────────────────────────
+# Como mucho PARSE_MAX_CONCURRENTES parseos a la vez; los que llegan después
+# esperan en una cola acotada (PARSE_MAX_COLA) que se atiende por turnos entre
+# IPs, así un cliente que sube un lote no deja esperando a los demás. Una IP
+# no puede ocupar más de PARSE_MAX_POR_IP lugares en la cola. Fuera de eso, o
+# si la espera supera PARSE_ESPERA_MAX segundos, 503 con Retry-After.
+
+class Saturado(Exception):
+    def __init__(self, mensaje, retry_after):
+        super().__init__(mensaje)
+        self.retry_after = retry_after
+
+class _Turno:
+    __slots__ = ('ip', 'otorgado')
+
+    def __init__(self, ip):
+        self.ip = ip
+        self.otorgado = False
+
+class Admision:
+    def __init__(self, max_concurrentes, max_cola, max_por_ip, espera_max):
+        self.max_concurrentes = max_concurrentes
+        self.max_cola   = max_cola
+        self.max_por_ip = max_por_ip
+        self.espera_max = espera_max
+        self._cond   = threading.Condition()
+        self._activos = 0
+        self._colas  = {}           # ip -> deque de _Turno
+        self._ronda  = deque()      # ips con turnos esperando, en orden de atención
+        self._en_cola = 0
+        self._duracion = 5.0        # promedio móvil de un parseo (segundos)
+
+    def _retry_after(self):
+        """Segundos estimados hasta que se libere lugar."""
+        tandas = (self._en_cola + self._activos) / max(1, self.max_concurrentes)
+        return max(1, int(round(tandas * self._duracion)))
+
+    def _despachar(self):
+        while self._activos < self.max_concurrentes and self._ronda:
+            ip = self._ronda.popleft()
+            cola = self._colas[ip]
+            turno = cola.popleft()
+            if cola:
+                self._ronda.append(ip)      # la IP vuelve al final de la ronda
+            else:
+                del self._colas[ip]
+            self._en_cola -= 1
+            self._activos += 1
+            turno.otorgado = True
+        self._cond.notify_all()
+
+    def _quitar(self, turno):
+        cola = self._colas.get(turno.ip)
+        if cola and turno in cola:
+            cola.remove(turno)
+            self._en_cola -= 1
+            if not cola:
+                del self._colas[turno.ip]
+                self._ronda.remove(turno.ip)
+
+    def entrar(self, ip):
+        with self._cond:
+            if self._activos < self.max_concurrentes and not self._en_cola:
+                self._activos += 1
+                return
+            if self._en_cola >= self.max_cola:
+                raise Saturado('Servidor ocupado, reintentá en unos segundos', self._retry_after())
+            if len(self._colas.get(ip, ())) >= self.max_por_ip:
+                raise Saturado('Demasiados archivos en espera desde tu IP', self._retry_after())
+
+            turno = _Turno(ip)
+            if ip not in self._colas:
+                self._colas[ip] = deque()
+                self._ronda.append(ip)
+            self._colas[ip].append(turno)
+            self._en_cola += 1
+
+            if not self._cond.wait_for(lambda: turno.otorgado, timeout=self.espera_max):
+                self._quitar(turno)
+                raise Saturado('Tiempo de espera agotado, reintentá en unos segundos', self._retry_after())
+
+    def salir(self, duracion=None):
+        with self._cond:
+            self._activos -= 1
+            if duracion is not None:
+                self._duracion = 0.8 * self._duracion + 0.2 * duracion
+            self._despachar()
+
+    @contextmanager
+    def turno(self, ip):
+        self.entrar(ip)
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.salir(time.monotonic() - t0)
+
+    def estado(self):
+        with self._cond:
+            return {'activos': self._activos, 'en_cola': self._en_cola,
+                    'max_concurrentes': self.max_concurrentes, 'max_cola': self.max_cola}
+
+_concurrentes = int(os.environ.get('PARSE_MAX_CONCURRENTES', os.cpu_count() or 2))
+admision = Admision(
+    max_concurrentes=_concurrentes,
+    max_cola=int(os.environ.get('PARSE_MAX_COLA', 2 * _concurrentes)),
+    max_por_ip=int(os.environ.get('PARSE_MAX_POR_IP', max(1, _concurrentes))),
+    espera_max=float(os.environ.get('PARSE_ESPERA_MAX', 30)),
+)
+
+def client_ip():
+    """IP del cliente (primera de X-Forwarded-For si hay proxy)."""
+    ip = request.headers.get("X-Forwarded-For", request.remote_addr) or "desconocida"
+    return ip.split(",")[0].strip()
+
+def respuesta_saturado(e):
+    resp = jsonify({'error': str(e)})
+    resp.status_code = 503
+    resp.headers['Retry-After'] = str(e.retry_after)
+    return resp
+
+# ── Traza de parseo (/process con traza=1) ─────────────────────────────────
+# Un JSONL por pedido con cada línea, sus columnas y la decisión del parser
+# (ver parsers/traza.py). El nombre vuelve en el header X-Traza y se baja
+# de /admin/trazas/<nombre>.
+TRAZA_DIR = Path(os.environ.get('TRAZA_DIR', os.path.join(tempfile.gettempdir(), 'bank-parser-trazas')))
+TRAZA_TTL = float(os.environ.get('TRAZA_TTL_HORAS', 24)) * 3600
+TRAZA_RE = re.compile(r'^traza-\d{8}-\d{6}-[0-9a-f]{8}\.jsonl$')
+
+def nueva_traza():
+    """Nombre para la traza de este pedido (purga las vencidas de paso)."""
+    TRAZA_DIR.mkdir(parents=True, exist_ok=True)
+    limite = time.time() - TRAZA_TTL
+    for viejo in TRAZA_DIR.glob('traza-*.jsonl'):
+        try:
+            if viejo.stat().st_mtime < limite:
+                viejo.unlink()
+        except OSError:
+            pass
+    return f"traza-{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(4)}.jsonl"
+
+# ── Resultados (/resultados/<id>) ───────────────────────────────────────────
+# Cada Excel de /process se guarda con un id propio para volver a bajarlo sin
+# reparsear. Se escribe a un .parcial y se renombra (nunca se sirve un archivo
+# a medio escribir); un hilo de barrido borra los vencidos (RESULTADOS_TTL_HORAS)
+# y, si el total pasa de RESULTADOS_MAX_MB, los más viejos primero.
+RESULTADOS_DIR = Path(os.environ.get('RESULTADOS_DIR', os.path.join(tempfile.gettempdir(), 'bank-parser-resultados')))
+RESULTADOS_TTL = float(os.environ.get('RESULTADOS_TTL_HORAS', 24)) * 3600
+RESULTADOS_MAX_BYTES = float(os.environ.get('RESULTADOS_MAX_MB', 512)) * 1024 * 1024
+RESULTADOS_BARRIDO = 60     # segundos entre barridos
+RESULTADO_RE = re.compile(r'^[0-9a-f]{32}$')
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+class Resultados:
+    """Archivos generados por pedido: <id>.xlsx + <id>.json (nombre de descarga, mimetype, banco)."""
+
+    def __init__(self, carpeta, ttl, max_bytes, intervalo):
+        self.carpeta   = Path(carpeta)
+        self.ttl       = ttl
+        self.max_bytes = max_bytes
+        self.intervalo = intervalo
+        self._lock     = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo     = None
+        self._bytes    = 0      # total estimado desde el último barrido
+
+    def guardar(self, escribir, nombre, mimetype, banco=None):
+        """
+        Llama a `escribir(path)` sobre un archivo temporal y lo publica con un
+        id nuevo. Devuelve (id, path final).
+        """
+        self._arrancar()
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        rid = secrets.token_hex(16)
+        extension = Path(nombre).suffix      # pandas elige el writer por la extensión
+        final = self.carpeta / f'{rid}{extension}'
+        parcial = self.carpeta / f'{rid}.parcial{extension}'
+        try:
+            escribir(parcial)
+            os.replace(parcial, final)
+        except BaseException:
+            parcial.unlink(missing_ok=True)
+            raise
+        tamano = final.stat().st_size
+        meta = {'nombre': nombre, 'archivo': final.name, 'mimetype': mimetype, 'banco': banco,
+                'bytes': tamano, 'creado': datetime.now().isoformat(timespec='seconds')}
+        # El .json aparece último y también por rename: si existe, el resultado está completo
+        meta_parcial = self.carpeta / f'{rid}.parcial.json'
+        meta_parcial.write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+        os.replace(meta_parcial, self.carpeta / f'{rid}.json')
+
+        with self._lock:
+            self._bytes += tamano
+            if self._bytes > self.max_bytes:
+                self._despertar.set()
+        return rid, final
+
+    def abrir(self, rid):
+        """(path, meta) del resultado `rid`, o None si no existe o venció."""
+        if not RESULTADO_RE.match(rid):
+            return None
+        try:
+            meta = json.loads((self.carpeta / f'{rid}.json').read_text(encoding='utf-8'))
+            final = self.carpeta / meta['archivo']
+            if final.stat().st_mtime < time.time() - self.ttl:
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return final, meta
+
+    def barrer(self):
+        """Borra vencidos, parciales huérfanos y, si hace falta, los más viejos hasta entrar en la cuota."""
+        ahora = time.time()
+        vivos = []
+        try:
+            archivos = list(self.carpeta.iterdir())
+        except FileNotFoundError:
+            archivos = []
+        datos = {a.stem for a in archivos if a.suffix != '.json'}
+        for archivo in archivos:
+            rid = archivo.name.split('.', 1)[0]
+            try:
+                st = archivo.stat()
+            except FileNotFoundError:
+                continue
+            if not RESULTADO_RE.match(rid):
+                continue
+            if '.parcial.' in archivo.name:
+                # Una escritura en curso no tarda tanto: si quedó, el proceso murió
+                if st.st_mtime < ahora - 3600:
+                    archivo.unlink(missing_ok=True)
+            elif archivo.suffix != '.json':
+                if st.st_mtime < ahora - self.ttl:
+                    self._borrar(archivo)
+                else:
+                    vivos.append((st.st_mtime, st.st_size, archivo))
+            elif rid not in datos:
+                archivo.unlink(missing_ok=True)
+
+        total = sum(tamano for _, tamano, _ in vivos)
+        if total > self.max_bytes:
+            for _, tamano, archivo in sorted(vivos):
+                self._borrar(archivo)
+                total -= tamano
+                if total <= self.max_bytes:
+                    break
+        with self._lock:
+            self._bytes = total
+
+    def _borrar(self, archivo):
+        # Primero el .json: deja de servirse antes de que falte el archivo
+        archivo.with_suffix('.json').unlink(missing_ok=True)
+        archivo.unlink(missing_ok=True)
+
+    def _arrancar(self):
+        # Perezoso: los procesos hijos que importan este módulo no barren
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._barrido, name='barrido-resultados', daemon=True)
+                self._hilo.start()
+
+    def _barrido(self):
+        while True:
+            try:
+                self.barrer()
+            except Exception as e:
+                print(f"⚠️ Barrido de resultados falló: {e}")
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+resultados = Resultados(RESULTADOS_DIR, RESULTADOS_TTL, RESULTADOS_MAX_BYTES, RESULTADOS_BARRIDO)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -113,23 +446,66 @@ def process_pdf():
     except ValueError as err:
         return jsonify({'error': str(err)}), 400
 
-    # Guardar archivo temporal
     filename = secure_filename(file.filename)
-    temp_pdf = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(temp_pdf)
-
-    # Guardar contraseña en variable de entorno temporal para que utils.py la use
-    if password:
-        os.environ['PDF_PASSWORD'] = password
+    # Nombre único por pedido: dos subidas del mismo archivo no se pisan
+    fd, temp_pdf = tempfile.mkstemp(suffix='.pdf', dir=app.config['UPLOAD_FOLDER'])
+    os.close(fd)
+
+    # Progreso en vivo (opcional): el navegador manda su job_id
+    job_id = request.form.get('job_id', '')
+    if not JOB_ID_RE.match(job_id):
+        job_id = None
+
+    # Turno de parseo (503 + Retry-After si el servidor está saturado)
+    ip = client_ip()
+    if job_id:
+        progress_jobs.publicar(job_id, {'estado': 'en cola', 'banco': banco})
+    try:
+        admision.entrar(ip)
+    except Saturado as e:
+        counter.registrar_fallo(banco, 'rechazado', ip=ip)
+        if job_id:
+            progress_jobs.publicar(job_id, {'estado': 'error'}, fin=True)
+        return respuesta_saturado(e)
+    t_turno = time.monotonic()
+    estado_final = 'error'
+    medidas = {}        # paginas / filas / bytes para el contador
+
+    traza_nombre = nueva_traza() if request.form.get('traza', '').lower() in ('1', 'true', 'on') else None
+    if traza_nombre:
+        @after_this_request
+        def header_traza(resp):
+            resp.headers['X-Traza'] = traza_nombre
+            return resp
 
     try:
-        # Procesar PDF
-        result = parser_module.parse(temp_pdf)
+        # Guardar archivo temporal
+        file.save(temp_pdf)
+
+        # Guardar contraseña en variable de entorno temporal para que utils.py la use
+        if password:
+            os.environ['PDF_PASSWORD'] = password
+
+        if job_id:
+            progress_jobs.publicar(job_id, {'estado': 'procesando'})
+            avisar = lambda ev: progress_jobs.publicar(job_id, ev)
+        else:
+            avisar = lambda ev: None
+
+        # Procesar PDF (el progreso también da las páginas para el contador)
+        with seguir_progreso(avisar) as progreso, \
+                (trazar(TRAZA_DIR / traza_nombre) if traza_nombre else nullcontext()):
+            try:
+                # En un proceso hijo con presupuesto de páginas, tiempo y memoria
+                result = parse_supervisado(banco, temp_pdf, password=password or None)
+            finally:
+                medidas['paginas'] = progreso.paginas or None
+        if job_id:
+            progress_jobs.publicar(job_id, {'estado': 'generando excel'})
 
         # Generar nombre de salida
         base_name = Path(filename).stem
         output_filename = f"{base_name}_validado.xlsx"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
 
         # Guardar Excel según el tipo de resultado
         if isinstance(result, dict):
@@ -140,28 +516,42 @@ def process_pdf():
                 if not isinstance(v, pd.DataFrame):
                     return jsonify({'error': f'Error interno: valor no-DataFrame para hoja {k}'}), 500
 
-            write_multi_sheet_excel(result, Path(output_path))
+            escribir = lambda path: write_multi_sheet_excel(result, path)
 
         elif isinstance(result, pd.DataFrame):
             if result.empty:
                 return jsonify({'error': 'No se extrajeron movimientos del PDF'}), 400
 
-            write_single_sheet_excel(result, Path(output_path))
+            escribir = lambda path: write_single_sheet_excel(result, path)
 
         else:
             return jsonify({'error': f'Tipo de retorno no soportado: {type(result).__name__}'}), 500
 
-        ip = request.headers.get("X-Forwarded-For", request.remote_addr)
-        ip = ip.split(",")[0].strip()
-        counter.increment(banco, ip=ip)
+        # En el almacén de resultados: se puede volver a bajar de /resultados/<id>
+        resultado_id, output_path = resultados.guardar(escribir, output_filename, XLSX_MIME, banco)
+
+        frames = result.values() if isinstance(result, dict) else [result]
+        medidas['filas'] = sum(len(df) for df in frames)
+        medidas['bytes'] = os.path.getsize(output_path)
+        estado_final = 'listo'
 
         # Retornar archivo
-        return send_file(
+        resp = send_file(
             output_path,
             as_attachment=True,
             download_name=output_filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype=XLSX_MIME
         )
+        resp.headers['X-Resultado'] = resultado_id
+        return resp
+
+    except PresupuestoExcedido as e:
+        print(f"⛔ {e}")
+        return jsonify({'error': str(e), 'presupuesto': e.datos()}), 413
+
+    except LimiteMemoriaError as e:
+        print(f"⚠️ {e}")
+        return jsonify({'error': str(e)}), 413
 
     except Exception as e:
         print(f"⚠️ Error procesando PDF:")
@@ -170,6 +560,15 @@ def process_pdf():
         return jsonify({'error': error_msg}), 500
 
     finally:
+        duracion = time.monotonic() - t_turno
+        admision.salir(duracion)
+        medidas['duracion'] = round(duracion, 3)
+        if estado_final == 'listo':
+            counter.increment(banco, ip=ip, **medidas)
+        else:
+            counter.registrar_fallo(banco, 'error', ip=ip, **medidas)
+        if job_id:
+            progress_jobs.publicar(job_id, {'estado': estado_final}, fin=True)
         # Limpiar archivo temporal y contraseña
         try:
             if os.path.exists(temp_pdf):
@@ -180,10 +579,362 @@ def process_pdf():
         except:
             pass
 
+@app.route('/validate', methods=['POST'])
+def validate_pdf():
+    """
+    Solo validación: parsea y devuelve en JSON si el extracto reconcilia, con
+    saldos, totales y filas inconsistentes por cuenta (parsers/validacion.py).
+    No arma el Excel.
+    """
+    if 'pdf_file' not in request.files:
+        return jsonify({'error': 'No se encontró archivo PDF'}), 400
+
+    file = request.files['pdf_file']
+    banco = request.form.get('banco')
+    password = request.form.get('password', '').strip()
+
+    if file.filename == '':
+        return jsonify({'error': 'No se seleccionó ningún archivo'}), 400
+    if not banco:
+        return jsonify({'error': 'No se seleccionó ningún banco'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Tipo de archivo no permitido. Solo PDF.'}), 400
+
+    try:
+        get_parser(banco)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+
+    ip = client_ip()
+    try:
+        admision.entrar(ip)
+    except Saturado as e:
+        counter.registrar_fallo(banco, 'rechazado', ip=ip)
+        return respuesta_saturado(e)
+    t_turno = time.monotonic()
+    estado_final = 'error'
+    medidas = {}
+
+    # Nombre único: dos validaciones del mismo archivo no se pisan
+    fd, temp_pdf = tempfile.mkstemp(suffix='.pdf', dir=app.config['UPLOAD_FOLDER'])
+    os.close(fd)
+    try:
+        file.save(temp_pdf)
+
+        with seguir_progreso(lambda ev: None) as progreso:
+            try:
+                result = parse_supervisado(banco, temp_pdf, password=password or None)
+            finally:
+                medidas['paginas'] = progreso.paginas or None
+
+        resumen = resumir(result)
+        cuerpo = json.dumps(resumen, ensure_ascii=False)
+        medidas['filas'] = sum(c['filas'] for c in resumen['cuentas'])
+        medidas['bytes'] = len(cuerpo.encode('utf-8'))
+        estado_final = 'listo'
+        return Response(cuerpo, mimetype='application/json')
+
+    except PresupuestoExcedido as e:
+        print(f"⛔ {e}")
+        return jsonify({'error': str(e), 'presupuesto': e.datos()}), 413
+
+    except LimiteMemoriaError as e:
+        print(f"⚠️ {e}")
+        return jsonify({'error': str(e)}), 413
+
+    except Exception as e:
+        print(f"⚠️ Error validando PDF:")
+        traceback.print_exc()
+        return jsonify({'error': str(e) or "Error interno al validar el PDF"}), 500
+
+    finally:
+        duracion = time.monotonic() - t_turno
+        admision.salir(duracion)
+        medidas['duracion'] = round(duracion, 3)
+        if estado_final == 'listo':
+            counter.increment(banco, ip=ip, **medidas)
+        else:
+            counter.registrar_fallo(banco, 'error', ip=ip, **medidas)
+        try:
+            os.remove(temp_pdf)
+        except OSError:
+            pass
+
+@app.route('/preview', methods=['POST'])
+def preview_pdf():
+    """
+    Vista previa: parsea solo las primeras páginas con movimientos y devuelve
+    las primeras filas en JSON (parsers/vista_previa.py), para confirmar banco
+    y columnas antes del parseo completo.
+    """
+    if 'pdf_file' not in request.files:
+        return jsonify({'error': 'No se encontró archivo PDF'}), 400
+
+    file = request.files['pdf_file']
+    banco = request.form.get('banco')
+    password = request.form.get('password', '').strip()
+
+    if file.filename == '':
+        return jsonify({'error': 'No se seleccionó ningún archivo'}), 400
+    if not banco:
+        return jsonify({'error': 'No se seleccionó ningún banco'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Tipo de archivo no permitido. Solo PDF.'}), 400
+
+    try:
+        get_parser(banco)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    try:
+        filas = min(max(int(request.form.get('filas', PREVIEW_FILAS)), 1), PREVIEW_MAX_FILAS)
+        paginas = min(max(int(request.form.get('paginas', PREVIEW_PAGINAS)), 1), PREVIEW_MAX_PAGINAS)
+    except ValueError:
+        return jsonify({'error': 'filas y paginas tienen que ser números enteros'}), 400
+
+    ip = client_ip()
+    try:
+        admision.entrar(ip)
+    except Saturado as e:
+        return respuesta_saturado(e)
+    t_turno = time.monotonic()
+
+    fd, temp_pdf = tempfile.mkstemp(suffix='.pdf', dir=app.config['UPLOAD_FOLDER'])
+    os.close(fd)
+    try:
+        file.save(temp_pdf)
+
+        # En el proceso hijo, con el presupuesto de tiempo y memoria del banco
+        vista = previsualizar_supervisado(banco, temp_pdf, filas=filas, paginas=paginas,
+                                          password=password or None)
+        vista['banco'] = banco
+        if not vista['filas']:
+            vista['aviso'] = (f"No se encontraron movimientos en las primeras "
+                              f"{vista['paginas_leidas']} páginas: ¿es un extracto de {banco}?")
+        return Response(json.dumps(vista, ensure_ascii=False), mimetype='application/json')
+
+    except PresupuestoExcedido as e:
+        print(f"⛔ {e}")
+        return jsonify({'error': str(e), 'presupuesto': e.datos()}), 413
+
+    except LimiteMemoriaError as e:
+        print(f"⚠️ {e}")
+        return jsonify({'error': str(e)}), 413
+
+    except Exception as e:
+        print(f"⚠️ Error en la vista previa:")
+        traceback.print_exc()
+        return jsonify({'error': str(e) or "Error interno en la vista previa"}), 500
+
+    finally:
+        admision.salir(time.monotonic() - t_turno)
+        try:
+            os.remove(temp_pdf)
+        except OSError:
+            pass
+
+# Formatos de /process-stream: (writer, mimetype, extensión)
+STREAM_FORMATS = {
+    'csv':   (iter_csv,   'text/csv; charset=utf-8', 'csv'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson',    'jsonl'),
+}
+
+@app.route('/process-stream', methods=['POST'])
+def process_pdf_stream():
+    """
+    Igual que /process pero devuelve los movimientos en CSV o JSONL a medida
+    que se parsean (parse_iter), sin armar el Excel en memoria.
+    """
+    if 'pdf_file' not in request.files:
+        return jsonify({'error': 'No se encontró archivo PDF'}), 400
+
+    file = request.files['pdf_file']
+    banco = request.form.get('banco')
+    password = request.form.get('password', '').strip()
+    formato = request.form.get('formato', 'csv').lower()
+
+    if file.filename == '':
+        return jsonify({'error': 'No se seleccionó ningún archivo'}), 400
+    if not banco:
+        return jsonify({'error': 'No se seleccionó ningún banco'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Tipo de archivo no permitido. Solo PDF.'}), 400
+    if formato not in STREAM_FORMATS:
+        return jsonify({'error': f"Formato no soportado: {formato} (opciones: {', '.join(STREAM_FORMATS)})"}), 400
+
+    try:
+        get_parser(banco)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+
+    # El turno se libera cuando termina de enviarse la respuesta
+    ip = client_ip()
+    try:
+        admision.entrar(ip)
+    except Saturado as e:
+        counter.registrar_fallo(banco, 'rechazado', ip=ip)
+        return respuesta_saturado(e)
+    t_turno = time.monotonic()
+
+    filename = secure_filename(file.filename)
+    # Nombre único: dos streams del mismo archivo no se pisan ni se borran entre sí
+    fd, temp_pdf = tempfile.mkstemp(suffix='.pdf', dir=app.config['UPLOAD_FOLDER'])
+    os.close(fd)
+
+    liberado = []
+    medidas = {}
+
+    def limpiar():
+        # Puede llamarse dos veces (fin del generador y cierre de la respuesta)
+        if liberado:
+            return
+        liberado.append(True)
+        duracion = time.monotonic() - t_turno
+        medidas['duracion'] = round(duracion, 3)
+        admision.salir(duracion)
+        try:
+            if os.path.exists(temp_pdf):
+                os.remove(temp_pdf)
+        except OSError:
+            pass
+
+    try:
+        file.save(temp_pdf)
+        # El parser corre en el proceso hijo con el presupuesto del banco y
+        # los movimientos llegan por el pipe. El primero se pide acá: errores
+        # de apertura, de contraseña o de presupuesto todavía pueden volver
+        # como JSON con su código HTTP
+        registros = iter_supervisado(banco, temp_pdf, password=password or None)
+        primero = next(registros, None)
+    except PresupuestoExcedido as e:
+        print(f"⛔ {e}")
+        limpiar()
+        counter.registrar_fallo(banco, 'error', ip=ip, **medidas)
+        return jsonify({'error': str(e), 'presupuesto': e.datos()}), 413
+    except LimiteMemoriaError as e:
+        limpiar()
+        counter.registrar_fallo(banco, 'error', ip=ip, **medidas)
+        return jsonify({'error': str(e)}), 413
+    except Exception as e:
+        traceback.print_exc()
+        limpiar()
+        counter.registrar_fallo(banco, 'error', ip=ip, **medidas)
+        return jsonify({'error': str(e) or 'Error interno al procesar el PDF'}), 500
+
+    if primero is None:
+        limpiar()
+        counter.registrar_fallo(banco, 'error', ip=ip, **medidas)
+        return jsonify({'error': 'El parser no detectó ninguna cuenta o movimiento'}), 400
+
+    writer, mimetype, ext = STREAM_FORMATS[formato]
+
+    def generar():
+        def todos():
+            yield primero
+            yield from registros
+        filas = enviados = 0
+        resultado = 'error'
+        try:
+            for trozo in writer(todos()):
+                filas += 1
+                enviados += len(trozo.encode('utf-8'))
+                yield trozo
+            resultado = 'ok'
+        except PresupuestoExcedido as e:
+            # Ya se mandaron filas: la respuesta queda cortada
+            print(f"⛔ {e}")
+        except Exception:
+            print("⚠️ Error durante el streaming:")
+            traceback.print_exc()
+        finally:
+            registros.close()
+            limpiar()
+            medidas.update(filas=filas, bytes=enviados)
+            if resultado == 'ok':
+                counter.increment(banco, ip=ip, **medidas)
+            else:
+                counter.registrar_fallo(banco, 'error', ip=ip, **medidas)
+
+    download_name = f"{Path(filename).stem}_movimientos.{ext}"
+    resp = Response(
+        stream_with_context(generar()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"'},
+    )
+    # Si el cliente corta antes de empezar, el generador no llega a su finally
+    resp.call_on_close(limpiar)
+    return resp
+
+@app.route('/progress/<job_id>')
+def progress_stream(job_id):
+    """Server-Sent Events con el avance del /process que lleva este job_id."""
+    if not JOB_ID_RE.match(job_id):
+        return jsonify({'error': 'job_id inválido'}), 400
+
+    def eventos():
+        version, inicio = 0, time.monotonic()
+        yield 'retry: 2000\n\n'
+        while True:
+            nuevo = progress_jobs.esperar(job_id, version, timeout=15)
+            if nuevo is None:
+                if version == 0 and time.monotonic() - inicio > PROGRESS_ESPERA:
+                    return      # /process nunca arrancó con este job_id
+                yield ': keepalive\n\n'
+                continue
+            version, evento, fin = nuevo
+            yield f'data: {json.dumps(evento, ensure_ascii=False)}\n\n'
+            if fin:
+                yield 'event: fin\ndata: {}\n\n'
+                return
+
+    return Response(
+        stream_with_context(eventos()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
 @app.route("/admin/stats")
 def admin_stats():
     stats = counter.get_stats()
-    return render_template("admin_stats.html", stats=stats)
+    desde = (datetime.now() - timedelta(hours=47)).strftime(counter.ROLLUPS["hora"][0])
+    ultimas = counter.get_series("hora", desde=desde)["franjas"]
+    pico = max((sum(f["totales"].values()) for f in ultimas), default=0)
+    return render_template("admin_stats.html", stats=stats, ultimas=ultimas, pico=pico,
+                           metricas=counter.get_metricas())
+
+@app.route("/resultados/<resultado_id>")
+def descargar_resultado(resultado_id):
+    """Vuelve a bajar un Excel ya generado por /process, sin reparsear."""
+    encontrado = resultados.abrir(resultado_id)
+    if encontrado is None:
+        return jsonify({'error': 'Resultado inexistente o vencido'}), 404
+    path, meta = encontrado
+    return send_file(path, mimetype=meta['mimetype'], as_attachment=True, download_name=meta['nombre'])
+
+@app.route("/admin/trazas/<nombre>")
+def admin_traza(nombre):
+    if not TRAZA_RE.match(nombre) or not (TRAZA_DIR / nombre).is_file():
+        return jsonify({'error': 'Traza inexistente o vencida'}), 404
+    return send_file(TRAZA_DIR / nombre, mimetype='application/x-ndjson',
+                     as_attachment=True, download_name=nombre)
+
+@app.route("/admin/stats.json")
+def admin_stats_json():
+    """
+    Series por franja para dimensionar workers:
+    /admin/stats.json?granularidad=hora&desde=2025-10-01T00&hasta=2025-10-07T23&banco=Macro
+    """
+    try:
+        serie = counter.get_series(
+            request.args.get("granularidad", "hora"),
+            desde=request.args.get("desde"),
+            hasta=request.args.get("hasta"),
+            banco=request.args.get("banco"),
+        )
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    resp = jsonify(serie)
+    resp.headers['Cache-Control'] = 'private, max-age=30'
+    return resp
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)